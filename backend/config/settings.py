@@ -10,6 +10,46 @@ class Settings(BaseSettings):
     SUPABASE_KEY: str
     SUPABASE_JWT_SECRET: str
     STORAGE_BUCKET_NAME: str = "food-images"
+    STORAGE_PRIVATE_BUCKET: bool = False  # Serve images through signed URLs instead of public ones
+    SIGNED_URL_EXPIRES_IN: int = 3600  # Lifetime of signed image URLs in seconds
+    SIGNED_URL_CACHE_SIZE: int = 10000  # Signed URLs kept in memory for reuse
+    
+    # Upload Configuration
+    MAX_UPLOAD_BYTES: int = 10 * 1024 * 1024  # Largest accepted food image (10 MB)
+    MAX_BATCH_UPLOAD_IMAGES: int = 20  # Most images accepted by /api/food/upload-batch
+    MAX_BATCH_UPLOAD_BYTES: int = 40 * 1024 * 1024  # Total image bytes held for one batch upload (40 MB)
+    IDEMPOTENCY_DB_PATH: Optional[str] = None  # SQLite file for Idempotency-Key results (in-memory if unset)
+    
+    # Write-behind batching of food_logs inserts (off by default)
+    FOOD_LOG_WRITE_BEHIND: bool = False
+    FOOD_LOG_WRITE_BATCH_SIZE: int = 100  # Flush once this many rows are pending
+    FOOD_LOG_WRITE_INTERVAL_MS: int = 5  # ...or this long after the first pending row
+    
+    # Cold storage of old food logs (Parquet, partitioned by user and month)
+    ARCHIVE_URI: str = "archive"  # Local directory or object store URI (s3://bucket/prefix, gs://...)
+    ARCHIVE_AFTER_DAYS: int = 365  # Whole months older than this are moved out of food_logs
+    
+    # Orphaned image collection
+    IMAGE_GC_INTERVAL_HOURS: Optional[float] = None  # Run the collector in the background this often (off if unset)
+    IMAGE_GC_GRACE_HOURS: int = 24  # Never collect objects younger than this
+    
+    # Population analytics snapshot (in-process copy of food_logs and daily summaries)
+    POPULATION_SNAPSHOT_INTERVAL_MINUTES: Optional[float] = None  # Refresh in the background this often (else on first use, then when older than the max age)
+    POPULATION_FULL_REFRESH_HOURS: int = 24  # Rebuild from scratch this often to pick up deletes
+    POPULATION_SNAPSHOT_MAX_AGE_MINUTES: float = 15  # Older snapshots are refreshed in the background on the next query
+    
+    # Per-process cache of daily summaries (invalidated on writes from this process)
+    SUMMARY_CACHE_SIZE: int = 10000  # Most (user, date) summaries kept in memory
+    SUMMARY_CACHE_TTL_SECONDS: float = 30  # Serve a cached summary this long before reloading it
+    SUMMARY_CACHE_STALE_SECONDS: float = 600  # Keep it this much longer as a fallback when reloads fail
+    
+    # Server-Sent Events stream of dashboard updates (per process)
+    LIVE_UPDATES_QUEUE_SIZE: int = 32  # Undelivered events per client before it is evicted as too slow
+    LIVE_UPDATES_HEARTBEAT_SECONDS: float = 15  # Comment sent on idle streams so proxies keep them open
+    LIVE_UPDATES_RETRY_MS: int = 3000  # Reconnect delay suggested to clients
+    
+    # In-memory streak leaderboard (loaded at startup, updated as this process saves streaks)
+    LEADERBOARD_REFRESH_MINUTES: Optional[float] = None  # Also reload from user_streaks this often (for multi-process deployments)
     
     # Custom ML Service Configuration
     ML_SERVICE_URL: Optional[str] = None  # URL to your custom trained model
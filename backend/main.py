@@ -2,9 +2,13 @@ from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from datetime import datetime
 from config.settings import settings
+from services.food_log_writer import food_log_writer
+from services.image_gc_service import image_gc
+from services.population_service import population_analytics
+from services.leaderboard_service import leaderboard_service
 
 # Import all route modules
-from routes import auth, users, food, goals, analytics, social, chatbot, dev
+from routes import auth, users, food, goals, analytics, social, chatbot, dashboard, dev
 
 app = FastAPI(
     title=settings.APP_NAME,
@@ -31,8 +35,30 @@ app.include_router(goals.router)
 app.include_router(analytics.router)
 app.include_router(social.router)
 app.include_router(chatbot.router)
+app.include_router(dashboard.router)
 app.include_router(dev.router)  # Development/testing endpoints
 
+@app.on_event("startup")
+async def startup_event():
+    """Start background workers"""
+    if settings.FOOD_LOG_WRITE_BEHIND:
+        await food_log_writer.start()
+    if settings.IMAGE_GC_INTERVAL_HOURS:
+        await image_gc.start(settings.IMAGE_GC_INTERVAL_HOURS)
+    if settings.POPULATION_SNAPSHOT_INTERVAL_MINUTES:
+        await population_analytics.start(settings.POPULATION_SNAPSHOT_INTERVAL_MINUTES)
+    await leaderboard_service.start(settings.LEADERBOARD_REFRESH_MINUTES)
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Flush pending writes before the process exits"""
+    await image_gc.stop()
+    await population_analytics.stop()
+    await leaderboard_service.stop()
+    await food_log_writer.stop()
+
+
 @app.get("/")
 async def root():
     """Root endpoint"""
@@ -0,0 +1,113 @@
+"""
+Maintenance commands for the Food App backend
+
+Run from the backend directory, e.g.:
+    python manage.py import-logs --user-id <uuid> history.csv
+    python manage.py rebuild-summaries --checkpoint rebuild.json
+    python manage.py repair-streaks
+    python manage.py archive-logs --dry-run
+    python manage.py gc-images --dry-run
+"""
+
+import argparse
+import asyncio
+import json
+import os
+
+
+async def import_logs(args: argparse.Namespace) -> None:
+    """Bulk import historical food logs from a CSV or JSON file"""
+    from services.import_service import import_service
+
+    fmt = args.format or ("csv" if args.path.lower().endswith(".csv") else "json")
+    with open(args.path, "rb") as stream:
+        if fmt == "csv":
+            records = import_service.parse_csv(stream)
+        else:
+            records = import_service.parse_json(stream)
+        report = await import_service.import_records(args.user_id, records)
+
+    print(json.dumps(report, indent=2))
+
+
+async def rebuild_summaries(args: argparse.Namespace) -> None:
+    """Regenerate daily_nutrition_summary for every user from food_logs"""
+    from services.summary_rebuild_service import summary_rebuild_service
+
+    summary_rebuild_service.batch_size = args.batch_size
+    summary_rebuild_service.concurrency = args.concurrency
+    if args.restart and args.checkpoint and os.path.exists(args.checkpoint):
+        os.remove(args.checkpoint)
+
+    report = await summary_rebuild_service.rebuild(checkpoint_path=args.checkpoint)
+    print(json.dumps(report, indent=2))
+
+
+async def repair_streaks(args: argparse.Namespace) -> None:
+    """Recompute user_streaks from daily_nutrition_summary"""
+    from services.summary_rebuild_service import summary_rebuild_service
+    from services.nutrition_service import nutrition_service
+
+    if args.user_id:
+        report = await nutrition_service.recompute_streak(args.user_id)
+    else:
+        report = await summary_rebuild_service.rebuild_streaks()
+    print(json.dumps(report, indent=2))
+
+
+async def archive_logs(args: argparse.Namespace) -> None:
+    """Move old food logs out of the hot table into Parquet archives"""
+    from services.archive_service import archive_service
+
+    report = await archive_service.archive_old_logs(dry_run=args.dry_run)
+    print(json.dumps(report, indent=2))
+
+
+async def gc_images(args: argparse.Namespace) -> None:
+    """Remove storage objects that no food log references"""
+    from services.image_gc_service import image_gc
+
+    report = await asyncio.to_thread(image_gc.collect, args.dry_run, args.grace_hours)
+    print(json.dumps(report, indent=2))
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Food App maintenance commands")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    cmd = commands.add_parser("import-logs", help="Import food history from a CSV or JSON file")
+    cmd.add_argument("path", help="CSV, JSON array or newline-delimited JSON file")
+    cmd.add_argument("--user-id", required=True, help="User to import the history for")
+    cmd.add_argument("--format", choices=["csv", "json"], help="File format (inferred from extension by default)")
+    cmd.set_defaults(handler=import_logs)
+
+    cmd = commands.add_parser("rebuild-summaries", help="Recompute all daily nutrition summaries")
+    cmd.add_argument("--checkpoint", help="JSON file to resume from and record progress in")
+    cmd.add_argument("--restart", action="store_true", help="Ignore an existing checkpoint and start over")
+    cmd.add_argument("--batch-size", type=int, default=500, help="Summaries per upsert request")
+    cmd.add_argument("--concurrency", type=int, default=4, help="Upsert requests in flight at once")
+    cmd.set_defaults(handler=rebuild_summaries)
+
+    cmd = commands.add_parser("repair-streaks", help="Recompute streaks from daily summaries")
+    cmd.add_argument("--user-id", help="Only repair this user's streak")
+    cmd.set_defaults(handler=repair_streaks)
+
+    cmd = commands.add_parser("archive-logs", help="Archive food logs older than ARCHIVE_AFTER_DAYS")
+    cmd.add_argument("--dry-run", action="store_true", help="Only count the logs that would be archived")
+    cmd.set_defaults(handler=archive_logs)
+
+    cmd = commands.add_parser("gc-images", help="Remove orphaned images from storage")
+    cmd.add_argument("--dry-run", action="store_true", help="Only report the objects that would be removed")
+    cmd.add_argument("--grace-hours", type=float, help="Keep objects younger than this (default IMAGE_GC_GRACE_HOURS)")
+    cmd.set_defaults(handler=gc_images)
+
+    return parser
+
+
+def main() -> None:
+    args = build_parser().parse_args()
+    asyncio.run(args.handler(args))
+
+
+if __name__ == "__main__":
+    main()
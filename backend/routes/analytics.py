@@ -1,7 +1,13 @@
 from fastapi import APIRouter, HTTPException, Query
-from datetime import date
+from datetime import date, timedelta
 from typing import Optional
-from services.supabase_client import get_supabase
+from services.nutrition_service import nutrition_service
+from services.analytics_service import analytics_service
+from services.population_service import population_analytics
+from services.live_update_service import live_updates
+from utils.singleflight import singleflight_stats
+from utils.dataloader import dataloader_stats
+from schemas.goal_schemas import WeeklySummaryResponse, TrendsResponse
 
 router = APIRouter(prefix="/api/analytics", tags=["Analytics"])
 
@@ -23,13 +29,11 @@ async def get_daily_summary(
         else:
             summary_date = date.today().isoformat()
         
-        supabase = get_supabase()
+        # Get daily summary (served from the per-process summary cache when fresh)
+        summary = await nutrition_service.get_daily_summary(user_id, date.fromisoformat(summary_date))
         
-        # Get daily summary from database
-        response = supabase.table("daily_nutrition_summary").select("*").eq("user_id", user_id).eq("date", summary_date).single().execute()
-        
-        if response.data:
-            return response.data
+        if summary:
+            return summary
         else:
             # If no summary exists, return zeros
             return {
@@ -58,16 +62,115 @@ async def get_daily_summary(
         }
 
 
+@router.get("/cache-stats")
+async def get_cache_stats():
+    """Hit rates of this process's daily summary cache, coalescing ratios and batch sizes of its shared reads, open live-update streams"""
+    return {
+        "daily_summary": nutrition_service.summary_cache.stats(),
+        "single_flight": singleflight_stats(),
+        "batch_loaders": dataloader_stats(),
+        "live_updates": live_updates.stats(),
+    }
+
+
 @router.get("/today")
 async def get_today_summary():
     """Get today's nutrition summary"""
     return {"message": "Today's summary endpoint - to be implemented"}
 
 
-@router.get("/week")
-async def get_week_summary():
-    """Get weekly nutrition summary"""
-    return {"message": "Weekly summary endpoint - to be implemented"}
+@router.get("/week", response_model=WeeklySummaryResponse)
+async def get_week_summary(
+    user_id: str = Query(..., description="User's UUID"),
+    week_start: Optional[date] = Query(None, description="First day of the week (YYYY-MM-DD), defaults to this Monday")
+):
+    """
+    Get weekly nutrition summary
+    
+    Returns all seven days (zero-filled when nothing was logged) with the
+    week's average completion, average calories and food-group log count.
+    """
+    if week_start is None:
+        today = date.today()
+        week_start = today - timedelta(days=today.weekday())
+    
+    try:
+        return await nutrition_service.get_weekly_summary(user_id, week_start)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to get weekly summary: {str(e)}")
+
+
+@router.get("/trends", response_model=TrendsResponse)
+async def get_trends(
+    user_id: str = Query(..., description="User's UUID"),
+    # One summary row per day, so the range stays within a single response page
+    days: int = Query(30, description="Range length in days, ending today", ge=1, le=1000),
+    window: int = Query(7, description="Rolling mean window in days", ge=1, le=90),
+    bucket: Optional[str] = Query(None, pattern="^(day|week|month)$", description="Series bucket: day, week or month")
+):
+    """
+    Get calorie, completion and food-group coverage trends (e.g. 30/90/365 days)
+    
+    Long ranges are bucketed by week or month so the series never has more
+    than 92 points.
+    """
+    try:
+        return await analytics_service.get_trends(user_id, days=days, window=window, bucket=bucket)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to get trends: {str(e)}")
+
+
+@router.get("/population/coverage-by-weekday")
+async def get_population_coverage_by_weekday(
+    start_date: Optional[date] = Query(None, description="Start date filter (YYYY-MM-DD)"),
+    end_date: Optional[date] = Query(None, description="End date filter (YYYY-MM-DD)")
+):
+    """Share of logged days covering each food group, by weekday, across all users"""
+    try:
+        return await population_analytics.coverage_by_weekday(start_date, end_date)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to get population coverage: {str(e)}")
+
+
+@router.get("/population/healthiness-by-meal-type")
+async def get_population_healthiness_by_meal_type(
+    start_date: Optional[date] = Query(None, description="Start date filter (YYYY-MM-DD)"),
+    end_date: Optional[date] = Query(None, description="End date filter (YYYY-MM-DD)")
+):
+    """Average healthiness score by meal type across all users"""
+    return await get_population_aggregate("food_logs", "meal_type", "healthiness_score", start_date, end_date)
+
+
+@router.get("/population/completion-distribution")
+async def get_population_completion_distribution(
+    start_date: Optional[date] = Query(None, description="Start date filter (YYYY-MM-DD)"),
+    end_date: Optional[date] = Query(None, description="End date filter (YYYY-MM-DD)")
+):
+    """Number of user-days at each completion percentage across all users"""
+    return await get_population_aggregate("daily_summaries", "completion_percentage", None, start_date, end_date)
+
+
+@router.get("/population/aggregate")
+async def get_population_aggregate(
+    table: str = Query(..., description="food_logs or daily_summaries"),
+    group_by: str = Query(..., description="Dimension, e.g. weekday, month, meal_type, food_category"),
+    metric: Optional[str] = Query(None, description="Metric to aggregate, e.g. calories, healthiness_score"),
+    start_date: Optional[date] = Query(None, description="Start date filter (YYYY-MM-DD)"),
+    end_date: Optional[date] = Query(None, description="End date filter (YYYY-MM-DD)")
+):
+    """
+    Group-by/aggregate query over the population snapshot
+    
+    Answered from an in-process columnar copy of food_logs and daily
+    summaries that is refreshed in the background, never from the
+    production tables directly.
+    """
+    try:
+        return await population_analytics.aggregate(table, group_by, metric, start_date, end_date)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to aggregate population data: {str(e)}")
 
 
 @router.get("/missing")
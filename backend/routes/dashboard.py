@@ -0,0 +1,48 @@
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from datetime import date
+from services.dashboard_service import dashboard_service
+from services.live_update_service import live_updates
+from services.nutrition_service import nutrition_service
+from schemas.goal_schemas import DashboardResponse
+
+router = APIRouter(prefix="/api/dashboard", tags=["Dashboard"])
+
+
+@router.get("", response_model=DashboardResponse)
+async def get_dashboard(
+    user_id: str = Query(..., description="User's UUID"),
+    meal_limit: int = Query(20, description="Most of today's meals to include", ge=1, le=100)
+):
+    """
+    Get the home screen in one round trip
+    
+    Returns today's summary, missing and completed food groups, the active
+    goal with its recommendations, the streak and today's meals.
+    """
+    try:
+        return await dashboard_service.get_dashboard(user_id, meal_limit=meal_limit)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to load dashboard: {str(e)}")
+
+
+@router.get("/stream")
+async def stream_dashboard_updates(user_id: str = Query(..., description="User's UUID")):
+    """
+    Live dashboard updates as Server-Sent Events
+    
+    Sends today's summary, missing groups and streak on connect, then a
+    "summary" event whenever one of the user's days changes (a meal is
+    logged, re-logged or deleted). Idle streams get a heartbeat comment;
+    a client that falls too far behind receives an "evicted" event and
+    should reconnect.
+    """
+    async def snapshot():
+        summary = await nutrition_service.get_daily_summary(user_id, date.today())
+        return live_updates.summary_event(summary, await nutrition_service.get_streak(user_id))
+    
+    return StreamingResponse(
+        live_updates.stream(user_id, snapshot),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,20 +1,40 @@
-from fastapi import APIRouter, Query, HTTPException, UploadFile, File, Form
-from typing import Optional
+from fastapi import APIRouter, Query, HTTPException, UploadFile, File, Form, Header
+from fastapi.responses import StreamingResponse
+from typing import List, Optional, Dict
 from datetime import date
+import asyncio
 import base64
 from services.food_service import food_service
 from services.storage_service import storage_service
 from services.ml_service import ml_service
-from schemas.food_schemas import FoodUploadResponse
+from services.export_service import export_service
+from services.idempotency_service import idempotency_service
+from services.import_service import import_service
+from schemas.food_schemas import (
+    FoodUploadResponse,
+    FoodLogsListResponse,
+    FoodBatchItemResult,
+    FoodBatchUploadResponse,
+    FoodLogSearchResponse,
+    FoodImportReport
+)
+from config.settings import settings
+from utils.pagination import parse_fields
+from utils.uploads import read_image_upload, IngestedImage
+from utils.exceptions import NotFoundError, PayloadTooLargeError
 
 router = APIRouter(prefix="/api/food", tags=["Food Logging"])
 
+# Images stored to Supabase at the same time during a batch upload
+BATCH_STORAGE_CONCURRENCY = 4
+
 
 @router.post("/upload", response_model=FoodUploadResponse)
 async def upload_food_image(
     image: UploadFile = File(...),
     user_id: Optional[str] = Form(None),
-    meal_type: Optional[str] = Form(None)
+    meal_type: Optional[str] = Form(None),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")
 ):
     """
     Upload food image and analyze with ML
@@ -23,88 +43,434 @@ async def upload_food_image(
     - image: The food image file
     - user_id: Optional user ID (None for anonymous users)
     - meal_type: Optional meal type (breakfast, lunch, dinner, snack)
+    - Idempotency-Key header: Optional client-generated key; retries with the
+      same key return the original response instead of logging the food again
     
     Returns:
     - Food log entry with ML analysis results
     """
     try:
-        # Read image file
-        image_bytes = await image.read()
+        # Read the upload in bounded chunks, checking its real type and hashing it
+        upload = await read_image_upload(image)
         
-        # Determine file extension
-        file_extension = "jpg"
-        if image.filename:
-            ext = image.filename.split(".")[-1].lower()
-            if ext in ["jpg", "jpeg", "png", "gif", "webp"]:
-                file_extension = ext
+        if not idempotency_key:
+            response = await _process_upload(upload, user_id, meal_type)
+            return (await _sign_upload_responses([response]))[0]
         
-        # Upload image to storage
-        image_url = await storage_service.upload_food_image(
-            user_id=user_id,
-            image_data=image_bytes,
-            file_extension=file_extension
+        async def operation() -> Dict:
+            response = await _process_upload(upload, user_id, meal_type)
+            return response.model_dump(mode="json")
+        
+        result = await idempotency_service.run(
+            key=f"upload:{user_id or 'anonymous'}:{idempotency_key}",
+            fingerprint=f"{upload.content_hash}:{meal_type or ''}",
+            operation=operation
+        )
+        # Stored unsigned: signed URLs expire, so replays are signed afresh
+        return (await _sign_upload_responses([FoodUploadResponse(**result)]))[0]
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to upload and analyze food image: {str(e)}")
+
+
+async def _process_upload(
+    upload: IngestedImage,
+    user_id: Optional[str],
+    meal_type: Optional[str]
+) -> FoodUploadResponse:
+    """Analyze, log and store one uploaded image"""
+    image_bytes = upload.data
+    
+    # Analyze first: nothing is stored or referenced for an image that fails here
+    image_base64 = base64.b64encode(image_bytes).decode('utf-8')
+    ml_result = await ml_service.analyze_food_image(image_base64)
+    
+    # Create food log entry, taking the image blob reference in the same call
+    food_log = await food_service.create_food_log(
+        user_id=user_id,
+        image_url=None,
+        detected_food_name=ml_result["food_name"],
+        food_category=ml_result["category"],
+        healthiness_score=ml_result["healthiness_score"],
+        calories=ml_result.get("calories"),
+        meal_type=meal_type,
+        image_blob=storage_service.image_blob_fields(
+            upload.content_hash, upload.file_extension, upload.size
+        )
+    )
+    
+    # Upload the image and its derivatives unless the blob is already stored
+    food_log = await food_service.attach_food_image(food_log, image_bytes, upload.content_type)
+    
+    return FoodUploadResponse(
+        log_id=food_log["id"],
+        image_url=food_log["image_url"],
+        thumbnail_url=food_log.get("thumbnail_url"),
+        medium_url=food_log.get("medium_url"),
+        detected_food_name=ml_result["food_name"],
+        food_category=ml_result["category"],
+        healthiness_score=ml_result["healthiness_score"],
+        calories=ml_result.get("calories"),
+        meal_type=meal_type,
+        confidence=ml_result.get("confidence"),
+        message="Food image uploaded and analyzed successfully"
+    )
+
+
+async def _sign_upload_responses(responses: List[FoodUploadResponse]) -> List[FoodUploadResponse]:
+    """Sign the image URLs of upload responses in one batch (private buckets only)"""
+    if not settings.STORAGE_PRIVATE_BUCKET or not responses:
+        return responses
+    rows = [response.model_dump() for response in responses]
+    await storage_service.sign_food_logs(rows)
+    return [FoodUploadResponse(**row) for row in rows]
+
+
+@router.post("/upload-batch", response_model=FoodBatchUploadResponse)
+async def upload_food_images_batch(
+    images: List[UploadFile] = File(...),
+    user_id: Optional[str] = Form(None),
+    meal_type: Optional[str] = Form(None)
+):
+    """
+    Upload several food images in one request
+    
+    Images are analyzed with a single ML call, logged with one bulk insert
+    and then stored concurrently, so the daily summary is recomputed once
+    per affected day instead of once per image. Images past
+    MAX_BATCH_UPLOAD_BYTES in total are rejected individually, which bounds
+    the memory one batch holds.
+    
+    This endpoint accepts:
+    - images: The food image files
+    - user_id: Optional user ID (None for anonymous users)
+    - meal_type: Optional meal type applied to every image
+    
+    Returns:
+    - Per-image status with the ML analysis for each created log
+    """
+    if len(images) > settings.MAX_BATCH_UPLOAD_IMAGES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {settings.MAX_BATCH_UPLOAD_IMAGES} images per batch"
         )
+    
+    items = [
+        FoodBatchItemResult(index=i, filename=image.filename, status="failed")
+        for i, image in enumerate(images)
+    ]
+    
+    try:
+        # Read and validate every upload; bad files fail on their own, and so
+        # do files past the batch's total size budget
+        uploads: Dict[int, IngestedImage] = {}
+        remaining = settings.MAX_BATCH_UPLOAD_BYTES
+        for i, image in enumerate(images):
+            limit = min(settings.MAX_UPLOAD_BYTES, remaining)
+            try:
+                uploads[i] = await read_image_upload(image, max_bytes=limit)
+                remaining -= uploads[i].size
+            except PayloadTooLargeError as e:
+                items[i].error = e.detail if limit == settings.MAX_UPLOAD_BYTES else (
+                    f"Batch exceeds the {settings.MAX_BATCH_UPLOAD_BYTES // (1024 * 1024)} MB total upload limit"
+                )
+            except HTTPException as e:
+                items[i].error = e.detail
         
-        # Analyze image with ML service
-        image_base64 = base64.b64encode(image_bytes).decode('utf-8')
-        ml_result = await ml_service.analyze_food_image(image_base64)
+        # One ML call for every valid image
+        indexes = list(uploads)
+        ml_results = await ml_service.analyze_food_images([
+            base64.b64encode(uploads[i].data).decode('utf-8') for i in indexes
+        ])
         
-        # Create food log entry
-        food_log = await food_service.create_food_log(
-            user_id=user_id,
-            image_url=image_url,
-            detected_food_name=ml_result["food_name"],
-            food_category=ml_result["category"],
-            healthiness_score=ml_result["healthiness_score"],
-            calories=ml_result.get("calories"),
-            meal_type=meal_type
+        # Images the ML service could not analyze fail on their own
+        analyzed = [(i, r) for i, r in zip(indexes, ml_results) if not isinstance(r, Exception)]
+        for i, ml_result in zip(indexes, ml_results):
+            if isinstance(ml_result, Exception):
+                items[i].error = f"Analysis failed: {ml_result}"
+                del uploads[i]
+        indexes = [i for i, _ in analyzed]
+        ml_results = [r for _, r in analyzed]
+        
+        # One bulk insert for every analyzed image, taking the blob references with it
+        entries = []
+        for i, ml_result in zip(indexes, ml_results):
+            upload = uploads[i]
+            entries.append({
+                "user_id": user_id,
+                "detected_food_name": ml_result["food_name"],
+                "food_category": ml_result["category"],
+                "healthiness_score": ml_result["healthiness_score"],
+                "calories": ml_result.get("calories"),
+                "meal_type": meal_type,
+                **storage_service.image_blob_fields(upload.content_hash, upload.file_extension, upload.size),
+            })
+        food_logs = await food_service.create_food_logs(entries)
+        
+        # Store originals and derivatives concurrently
+        semaphore = asyncio.Semaphore(BATCH_STORAGE_CONCURRENCY)
+        
+        async def store(i: int, food_log: Dict) -> Dict:
+            async with semaphore:
+                try:
+                    return await food_service.attach_food_image(food_log, uploads[i].data, uploads[i].content_type)
+                finally:
+                    # Drop the buffer as soon as this image is stored
+                    del uploads[i]
+        
+        stored = await asyncio.gather(
+            *(store(i, food_log) for i, food_log in zip(indexes, food_logs)),
+            return_exceptions=True
         )
         
-        return FoodUploadResponse(
-            log_id=food_log["id"],
-            image_url=image_url,
-            detected_food_name=ml_result["food_name"],
-            food_category=ml_result["category"],
-            healthiness_score=ml_result["healthiness_score"],
-            calories=ml_result.get("calories"),
-            meal_type=meal_type,
-            confidence=ml_result.get("confidence"),
-            message="Food image uploaded and analyzed successfully"
+        for i, ml_result, food_log in zip(indexes, ml_results, stored):
+            if isinstance(food_log, Exception):
+                items[i].error = f"Storage upload failed: {food_log}"
+                continue
+            items[i].status = "created"
+            items[i].result = FoodUploadResponse(
+                log_id=food_log["id"],
+                image_url=food_log["image_url"],
+                thumbnail_url=food_log.get("thumbnail_url"),
+                medium_url=food_log.get("medium_url"),
+                detected_food_name=ml_result["food_name"],
+                food_category=ml_result["category"],
+                healthiness_score=ml_result["healthiness_score"],
+                calories=ml_result.get("calories"),
+                meal_type=meal_type,
+                confidence=ml_result.get("confidence"),
+                message="Food image uploaded and analyzed successfully"
+            )
+        
+        created_items = [item for item in items if item.result is not None]
+        signed = await _sign_upload_responses([item.result for item in created_items])
+        for item, result in zip(created_items, signed):
+            item.result = result
+        
+        created = sum(1 for item in items if item.status == "created")
+        return FoodBatchUploadResponse(
+            items=items,
+            created=created,
+            failed=len(items) - created
         )
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to upload and analyze food image: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to upload food images: {str(e)}")
+
+
+@router.post("/import", response_model=FoodImportReport)
+async def import_food_logs(
+    file: UploadFile = File(...),
+    user_id: str = Form(...),
+    format: Optional[str] = Form(None)
+):
+    """
+    Import food history exported from another tracker
+    
+    This endpoint accepts:
+    - file: CSV with a header row, a JSON array, or newline-delimited JSON
+    - user_id: User to import the history for
+    - format: csv or json (inferred from the filename if omitted)
+    
+    Each record needs detected_food_name, food_category, healthiness_score
+    and logged_at; calories, meal_type and image_url are optional.
+    
+    Returns:
+    - Counts of imported and rejected rows, the first errors and throughput
+    """
+    if format is None:
+        format = "csv" if (file.filename or "").lower().endswith(".csv") else "json"
+    if format not in ("csv", "json"):
+        raise HTTPException(status_code=400, detail="Invalid format. Must be one of: csv, json")
+    
+    try:
+        if format == "csv":
+            records = import_service.parse_csv(file.file)
+        else:
+            records = import_service.parse_json(file.file)
+        return await import_service.import_records(user_id, records)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise HTTPException(status_code=400, detail=f"Could not parse import file: {str(e)}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to import food logs: {str(e)}")
 
 
-@router.get("/logs")
+@router.get("/logs", response_model=FoodLogsListResponse)
 async def get_food_logs(
     limit: int = Query(100, description="Maximum number of logs to return", ge=1, le=1000),
     start_date: Optional[date] = Query(None, description="Start date filter (YYYY-MM-DD)"),
-    end_date: Optional[date] = Query(None, description="End date filter (YYYY-MM-DD)")
+    end_date: Optional[date] = Query(None, description="End date filter (YYYY-MM-DD)"),
+    cursor: Optional[str] = Query(None, description="Cursor from the previous page's next_cursor"),
+    fields: Optional[str] = Query(None, description="Comma-separated columns to return, e.g. id,food_category")
 ):
     """
     Get all food logs from all users
     
     Query Parameters:
-    - limit: Maximum number of logs (default: 100, max: 1000)
+    - limit: Maximum number of logs per page (default: 100, max: 1000)
     - start_date: Optional start date filter
     - end_date: Optional end date filter
+    - cursor: Optional cursor to fetch the next page
+    - fields: Optional column projection
+    """
+    return await _list_food_logs(None, limit, start_date, end_date, cursor, fields)
+
+
+@router.get("/history/{user_id}", response_model=FoodLogsListResponse)
+async def get_user_food_logs(
+    user_id: str,
+    limit: int = Query(50, description="Maximum number of logs to return", ge=1, le=1000),
+    start_date: Optional[date] = Query(None, description="Start date filter (YYYY-MM-DD)"),
+    end_date: Optional[date] = Query(None, description="End date filter (YYYY-MM-DD)"),
+    cursor: Optional[str] = Query(None, description="Cursor from the previous page's next_cursor"),
+    fields: Optional[str] = Query(None, description="Comma-separated columns to return, e.g. id,food_category")
+):
     """
+    Get a user's food log history, newest first
+    
+    Query Parameters:
+    - limit: Maximum number of logs per page (default: 50, max: 1000)
+    - start_date: Optional start date filter
+    - end_date: Optional end date filter
+    - cursor: Optional cursor to fetch the next page
+    - fields: Optional column projection
+    """
+    return await _list_food_logs(user_id, limit, start_date, end_date, cursor, fields)
+
+
+@router.get("/history/{user_id}/search", response_model=FoodLogSearchResponse)
+async def search_user_food_logs(
+    user_id: str,
+    q: str = Query(..., min_length=1, max_length=100, description="Food name to search for"),
+    limit: int = Query(20, description="Maximum number of matches to return", ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="Cursor from the previous page's next_cursor")
+):
+    """
+    Search a user's food history, e.g. "when did I last eat salmon"
+    
+    Supports prefix and fuzzy (typo-tolerant) matching on the detected food
+    name. Results are ranked by relevance, then by most recent.
+    """
+    try:
+        page = await food_service.search_food_logs(user_id, q, limit=limit, cursor=cursor)
+        await storage_service.sign_food_logs(page["results"])
+        return FoodLogSearchResponse(
+            query=q,
+            results=page["results"],
+            limit=limit,
+            next_cursor=page["next_cursor"]
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to search food logs: {str(e)}")
+
+
+async def _list_food_logs(
+    user_id: Optional[str],
+    limit: int,
+    start_date: Optional[date],
+    end_date: Optional[date],
+    cursor: Optional[str],
+    fields: Optional[str]
+) -> FoodLogsListResponse:
+    """Fetch one keyset page of food logs for the listing endpoints"""
     try:
-        logs = await food_service.get_all_food_logs(
+        columns = parse_fields(fields)
+        page = await food_service.get_food_logs_page(
+            user_id=user_id,
             limit=limit,
             start_date=start_date,
-            end_date=end_date
+            end_date=end_date,
+            cursor=cursor,
+            fields=columns
         )
+        await storage_service.sign_food_logs(page["logs"])
         
-        return {
-            "logs": logs,
-            "total": len(logs),
-            "limit": limit
-        }
+        return FoodLogsListResponse(
+            logs=page["logs"],
+            total=len(page["logs"]),
+            limit=limit,
+            next_cursor=page["next_cursor"]
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch food logs: {str(e)}")
 
 
+@router.get("/export/{user_id}")
+async def export_food_history(
+    user_id: str,
+    format: str = Query("ndjson", description="Export format: ndjson or csv"),
+    start_date: Optional[date] = Query(None, description="Start date filter (YYYY-MM-DD)"),
+    end_date: Optional[date] = Query(None, description="End date filter (YYYY-MM-DD)")
+):
+    """
+    Export a user's food logs and daily summaries
+    
+    The export is streamed: rows are fetched page by page while the response
+    is being written, so any length of history can be downloaded.
+    
+    Query Parameters:
+    - format: ndjson (default) or csv
+    - start_date: Optional start date filter
+    - end_date: Optional end date filter
+    """
+    if format == "ndjson":
+        body = export_service.stream_ndjson(user_id, start_date, end_date)
+        media_type = "application/x-ndjson"
+    elif format == "csv":
+        body = export_service.stream_csv(user_id, start_date, end_date)
+        media_type = "text/csv"
+    else:
+        raise HTTPException(status_code=400, detail="Invalid format. Must be one of: ndjson, csv")
+    
+    filename = f"food-history-{user_id}.{format}"
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+
+@router.post("/logs/{log_id}/relog", response_model=FoodUploadResponse)
+async def relog_food(
+    log_id: str,
+    user_id: str = Query(..., description="User's UUID"),
+    meal_type: Optional[str] = Query(None, description="Meal type, defaults to the original log's")
+):
+    """
+    Log a previous meal again with one tap
+    
+    Reuses the original log's image and analysis, so nothing is uploaded
+    or sent to the ML service.
+    """
+    try:
+        food_log = await food_service.relog_food(log_id, user_id, meal_type)
+        if not food_log:
+            raise NotFoundError(f"Food log {log_id} not found")
+        
+        response = FoodUploadResponse(
+            log_id=food_log["id"],
+            image_url=food_log["image_url"],
+            thumbnail_url=food_log.get("thumbnail_url"),
+            medium_url=food_log.get("medium_url"),
+            detected_food_name=food_log["detected_food_name"],
+            food_category=food_log["food_category"],
+            healthiness_score=food_log["healthiness_score"],
+            calories=food_log.get("calories"),
+            meal_type=food_log.get("meal_type"),
+            confidence=None,
+            message="Meal logged again successfully"
+        )
+        return (await _sign_upload_responses([response]))[0]
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to re-log food: {str(e)}")
+
+
 @router.get("/logs/{log_id}")
 async def get_food_log(log_id: str):
     """Get specific food log"""
@@ -112,9 +478,47 @@ async def get_food_log(log_id: str):
 
 
 @router.delete("/logs/{log_id}")
-async def delete_food_log(log_id: str):
-    """Delete food log"""
-    return {"message": f"Delete food log {log_id} endpoint - to be implemented"}
+async def delete_food_log(
+    log_id: str,
+    user_id: str = Query(..., description="User's UUID")
+):
+    """
+    Delete food log
+    
+    The day's summary is adjusted and the image is removed from storage once
+    no other log uses it.
+    """
+    try:
+        result = await food_service.delete_food_logs(user_id, log_ids=[log_id])
+        if not result["deleted"]:
+            raise NotFoundError(f"Food log {log_id} not found")
+        return {"message": "Food log deleted successfully", **result}
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to delete food log: {str(e)}")
+
+
+@router.delete("/logs")
+async def delete_food_logs(
+    user_id: str = Query(..., description="User's UUID"),
+    start_date: date = Query(..., description="First day to delete (YYYY-MM-DD)"),
+    end_date: date = Query(..., description="Last day to delete (YYYY-MM-DD)")
+):
+    """
+    Delete all of a user's food logs in a date range
+    
+    Logs and images are removed in batches and each affected day's summary
+    is adjusted in place. Archived logs in the range are deleted too.
+    """
+    if end_date < start_date:
+        raise HTTPException(status_code=400, detail="end_date must not be before start_date")
+    
+    try:
+        result = await food_service.delete_food_logs(user_id, start_date=start_date, end_date=end_date)
+        return {"message": f"Deleted {result['deleted']} food logs", **result}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to delete food logs: {str(e)}")
 
 
 @router.put("/logs/{log_id}")
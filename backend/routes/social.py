@@ -1,4 +1,7 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, HTTPException, Query
+from typing import Optional
+from services.leaderboard_service import leaderboard_service
+from schemas.goal_schemas import LeaderboardResponse
 
 router = APIRouter(prefix="/api/social", tags=["Social"])
 
@@ -15,8 +18,31 @@ async def add_friend():
     return {"message": "Add friend endpoint - to be implemented (future feature)"}
 
 
-@router.get("/leaderboard")
-async def get_leaderboard():
-    """Get friends streak leaderboard"""
-    return {"message": "Leaderboard endpoint - to be implemented (future feature)"}
-
+@router.get("/leaderboard", response_model=LeaderboardResponse)
+async def get_leaderboard(
+    board: str = Query("current", description="Rank by 'current' or 'longest' streak"),
+    limit: int = Query(10, description="Number of top entries", ge=1, le=100),
+    user_id: Optional[str] = Query(None, description="Also return this user's rank and neighbours"),
+    around: int = Query(5, description="Neighbours above and below the user", ge=0, le=50)
+):
+    """
+    Get the streak leaderboard
+    
+    Returns the top entries and, if user_id is given, that user's rank with
+    the entries around it. Users with equal streaks share a rank.
+    """
+    try:
+        top = await leaderboard_service.top(board, limit=limit)
+        result = {
+            "board": board,
+            "total_users": await leaderboard_service.size(board),
+            "top": top,
+        }
+        if user_id:
+            mine = await leaderboard_service.around(user_id, board, k=around)
+            result.update(user_rank=mine["rank"], user_streak=mine["streak"], around_user=mine["entries"])
+        return result
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to load leaderboard: {str(e)}")
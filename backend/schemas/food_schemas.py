@@ -1,6 +1,6 @@
-from pydantic import BaseModel
-from typing import Optional
-from datetime import datetime
+from pydantic import BaseModel, field_validator
+from typing import Any, Dict, Optional
+from datetime import datetime, timezone
 from uuid import UUID
 
 
@@ -13,6 +13,56 @@ class FoodLogBase(BaseModel):
     meal_type: Optional[str] = None  # 'breakfast', 'lunch', 'dinner', 'snack'
 
 
+class FoodLogImportRow(FoodLogBase):
+    """One historical food log row in a bulk import"""
+    logged_at: datetime
+    image_url: str = ""
+    
+    @field_validator("logged_at")
+    @classmethod
+    def validate_logged_at(cls, v: datetime) -> datetime:
+        # Stored and bucketed into daily summaries by UTC date; naive times are taken as UTC
+        if v.tzinfo is None:
+            return v.replace(tzinfo=timezone.utc)
+        return v.astimezone(timezone.utc)
+    
+    @field_validator("food_category")
+    @classmethod
+    def validate_category(cls, v: str) -> str:
+        v = v.strip().lower()
+        if v not in {"fruit", "vegetable", "protein", "dairy", "grain", "other"}:
+            raise ValueError("must be one of fruit, vegetable, protein, dairy, grain, other")
+        return v
+    
+    @field_validator("meal_type")
+    @classmethod
+    def validate_meal_type(cls, v: Optional[str]) -> Optional[str]:
+        if v is None or not v.strip():
+            return None
+        v = v.strip().lower()
+        if v not in {"breakfast", "lunch", "dinner", "snack"}:
+            raise ValueError("must be one of breakfast, lunch, dinner, snack")
+        return v
+    
+    @field_validator("healthiness_score")
+    @classmethod
+    def validate_score(cls, v: int) -> int:
+        if not 0 <= v <= 100:
+            raise ValueError("must be between 0 and 100")
+        return v
+
+
+class FoodImportReport(BaseModel):
+    """Outcome of a bulk food log import"""
+    received: int
+    imported: int
+    rejected: int
+    errors: list[Dict[str, Any]]  # first rejected rows: {"row": n, "error": "..."}
+    affected_days: int
+    duration_seconds: float
+    rows_per_second: float
+
+
 class FoodLogCreate(BaseModel):
     """Schema for creating a food log"""
     meal_type: Optional[str] = None
@@ -28,6 +78,8 @@ class FoodUploadResponse(BaseModel):
     """Response after uploading and analyzing food image"""
     log_id: UUID
     image_url: str
+    thumbnail_url: Optional[str] = None
+    medium_url: Optional[str] = None
     detected_food_name: str
     food_category: str
     healthiness_score: int
@@ -37,11 +89,29 @@ class FoodUploadResponse(BaseModel):
     message: str
 
 
+class FoodBatchItemResult(BaseModel):
+    """Outcome of one image in a batch upload"""
+    index: int  # position of the image in the request
+    filename: Optional[str]
+    status: str  # 'created' or 'failed'
+    result: Optional[FoodUploadResponse] = None
+    error: Optional[str] = None
+
+
+class FoodBatchUploadResponse(BaseModel):
+    """Response after uploading several food images at once"""
+    items: list[FoodBatchItemResult]
+    created: int
+    failed: int
+
+
 class FoodLogResponse(FoodLogBase):
     """Complete food log response"""
     id: UUID
     user_id: UUID
     image_url: str
+    thumbnail_url: Optional[str] = None  # ~200px WebP for lists and feeds
+    medium_url: Optional[str] = None  # ~800px WebP for detail views
     logged_at: datetime
     created_at: datetime
     
@@ -59,11 +129,19 @@ class FoodLogUpdate(BaseModel):
 
 
 class FoodLogsListResponse(BaseModel):
-    """Response for list of food logs"""
-    logs: list[FoodLogResponse]
-    total: int
-    page: int
+    """Response for a page of food logs"""
+    logs: list[Dict[str, Any]]  # full rows, or only the requested `fields`
+    total: int  # number of logs on this page
+    limit: int
+    next_cursor: Optional[str] = None  # pass back as `cursor` for the next page
+
+
+class FoodLogSearchResponse(BaseModel):
+    """Ranked food history search results"""
+    query: str
+    results: list[Dict[str, Any]]  # food logs with a relevance `score`
     limit: int
+    next_cursor: Optional[str] = None  # pass back as `cursor` for the next page
 
 
 class MLAnalysisResult(BaseModel):
@@ -52,9 +52,51 @@ class WeeklySummaryResponse(BaseModel):
     week_end: str
     daily_summaries: list[DailySummaryResponse]
     average_completion: float
+    average_calories: float = 0.0
     total_logs: int
 
 
+class TrendPoint(BaseModel):
+    """One day, week or month of a trend series"""
+    start_date: str
+    end_date: str
+    days_logged: int
+    average_calories: float
+    average_completion: float
+    calories_rolling: float
+    completion_rolling: float
+    coverage: dict[str, float]
+
+
+class TrendsResponse(BaseModel):
+    """Calorie, completion and food-group coverage trends"""
+    user_id: str
+    start_date: str
+    end_date: str
+    days: int
+    bucket: str
+    window: int
+    days_logged: int
+    average_calories: float
+    average_completion: float
+    coverage: dict[str, float]
+    series: list[TrendPoint]
+
+
+class DashboardResponse(BaseModel):
+    """Everything the home screen needs, in one response"""
+    user_id: str
+    date: str
+    summary: Optional[dict[str, int]] = None  # null if it could not be loaded
+    missing_groups: list[str]
+    completed_groups: list[str]
+    goal: Optional[dict] = None
+    recommendations: NutritionRecommendation
+    streak: Optional[dict[str, int]] = None  # null if it could not be loaded
+    meals: list[dict]
+    unavailable: list[str] = []  # parts that failed to load and were left empty
+
+
 class MissingFoodGroupsResponse(BaseModel):
     """Response for missing food groups"""
     date: str
@@ -71,3 +113,19 @@ class StreakResponse(BaseModel):
     last_logged_date: Optional[str]
     message: str
 
+
+class LeaderboardEntry(BaseModel):
+    """One ranked user on a streak leaderboard"""
+    rank: int
+    user_id: str
+    streak: int
+
+
+class LeaderboardResponse(BaseModel):
+    """Top of a streak leaderboard, and the requesting user's neighbourhood"""
+    board: str
+    total_users: int
+    top: list[LeaderboardEntry]
+    user_rank: Optional[int] = None
+    user_streak: Optional[int] = None
+    around_user: list[LeaderboardEntry] = []
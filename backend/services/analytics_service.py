@@ -0,0 +1,189 @@
+from typing import Dict, List, Optional
+from datetime import date, timedelta
+import numpy as np
+from services.supabase_client import get_supabase
+
+
+# daily_nutrition_summary count column per food group
+FOOD_GROUP_COLUMNS = {
+    "fruits": "fruits_count",
+    "vegetables": "vegetables_count",
+    "protein": "protein_count",
+    "dairy": "dairy_count",
+    "grains": "grains_count",
+}
+
+
+class AnalyticsService:
+    """Service for trend analytics over daily nutrition summaries"""
+
+    # Most points a trend series returns; longer ranges are bucketed by week or month
+    MAX_TREND_POINTS = 92
+
+    def __init__(self):
+        self.supabase = None
+
+    def _get_supabase(self):
+        """Lazy load Supabase client"""
+        if self.supabase is None:
+            self.supabase = get_supabase()
+        return self.supabase
+
+    def choose_bucket(self, start_date: date, end_date: date, bucket: Optional[str] = None) -> str:
+        """
+        Pick the finest bucket that keeps the series within MAX_TREND_POINTS
+
+        Buckets are counted as they are laid out (Monday-based weeks and
+        calendar months), including the partial ones at either end.
+
+        Args:
+            start_date: First day of the range
+            end_date: Last day of the range
+            bucket: Requested bucket ("day", "week" or "month"), if any
+
+        Returns:
+            Bucket to use (never finer than requested)
+        """
+        counts = {
+            "day": (end_date - start_date).days + 1,
+            # date.toordinal() is 1 on a Monday
+            "week": (end_date.toordinal() - 1) // 7 - (start_date.toordinal() - 1) // 7 + 1,
+            "month": (end_date.year - start_date.year) * 12 + end_date.month - start_date.month + 1,
+        }
+        order = ["day", "week", "month"]
+        start = order.index(bucket) if bucket else 0
+        for candidate in order[start:]:
+            if counts[candidate] <= self.MAX_TREND_POINTS:
+                return candidate
+        return "month"
+
+    async def get_trends(
+        self,
+        user_id: str,
+        days: int = 30,
+        window: int = 7,
+        bucket: Optional[str] = None,
+        end_date: Optional[date] = None,
+    ) -> Dict:
+        """
+        Calorie, completion and food-group coverage trends for a user
+
+        The range is fetched with one query and laid out as day-indexed
+        NumPy arrays; rolling means, coverage rates and weekly/monthly
+        buckets are all computed on those arrays.
+
+        Days without a summary count as 0% complete with no groups covered.
+        Calories are averaged over logged days only.
+
+        Args:
+            user_id: User's UUID
+            days: Number of days up to and including end_date
+            window: Rolling mean window in days
+            bucket: "day", "week" or "month" (coarsened if the range needs it)
+            end_date: Last day of the range (defaults to today)
+
+        Returns:
+            Dict matching TrendsResponse
+        """
+        end_date = end_date or date.today()
+        start_date = end_date - timedelta(days=days - 1)
+        bucket = self.choose_bucket(start_date, end_date, bucket)
+
+        response = self._get_supabase().table("daily_nutrition_summary").select(
+            "date,total_calories,completion_percentage," + ",".join(FOOD_GROUP_COLUMNS.values())
+        ).eq("user_id", user_id).gte("date", start_date.isoformat()).lte(
+            "date", end_date.isoformat()
+        ).execute()
+        rows = response.data or []
+
+        # Day-indexed arrays, zero-filled where nothing was logged
+        index = np.array(
+            [(date.fromisoformat(row["date"]) - start_date).days for row in rows], dtype=np.int64
+        )
+        logged = np.zeros(days, dtype=bool)
+        calories = np.zeros(days)
+        completion = np.zeros(days)
+        covered = np.zeros((len(FOOD_GROUP_COLUMNS), days), dtype=bool)
+        if rows:
+            logged[index] = True
+            calories[index] = [row.get("total_calories") or 0 for row in rows]
+            completion[index] = [row.get("completion_percentage") or 0 for row in rows]
+            for i, column in enumerate(FOOD_GROUP_COLUMNS.values()):
+                covered[i, index] = [(row.get(column) or 0) > 0 for row in rows]
+
+        calories_rolling = self._rolling_mean(calories, logged, window)
+        completion_rolling = self._rolling_mean(completion, np.ones(days, dtype=bool), window)
+
+        day_numbers = np.arange(days)
+        dates = np.datetime64(start_date.isoformat()) + day_numbers
+        if bucket == "week":
+            # Monday-based weeks
+            keys = (dates.astype("datetime64[D]").astype(np.int64) + 3) // 7
+        elif bucket == "month":
+            keys = dates.astype("datetime64[M]").astype(np.int64)
+        else:
+            keys = day_numbers
+
+        # Days are in order, so each bucket is one contiguous slice
+        starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+        ends = np.r_[starts[1:], days] - 1
+        lengths = ends - starts + 1
+        logged_days = np.add.reduceat(logged.astype(np.int64), starts)
+        calorie_sums = np.add.reduceat(calories, starts)
+        completion_means = np.add.reduceat(completion, starts) / lengths
+        coverage_rates = np.add.reduceat(covered.astype(np.int64), starts, axis=1) / lengths
+        calorie_means = np.divide(
+            calorie_sums, logged_days, out=np.zeros(len(starts)), where=logged_days > 0
+        )
+
+        series: List[Dict] = []
+        for b, (first, last) in enumerate(zip(starts, ends)):
+            series.append({
+                "start_date": (start_date + timedelta(days=int(first))).isoformat(),
+                "end_date": (start_date + timedelta(days=int(last))).isoformat(),
+                "days_logged": int(logged_days[b]),
+                "average_calories": round(float(calorie_means[b]), 1),
+                "average_completion": round(float(completion_means[b]), 1),
+                "calories_rolling": round(float(calories_rolling[last]), 1),
+                "completion_rolling": round(float(completion_rolling[last]), 1),
+                "coverage": {
+                    group: round(float(coverage_rates[i, b]), 3) for i, group in enumerate(FOOD_GROUP_COLUMNS)
+                },
+            })
+
+        logged_count = int(logged.sum())
+        return {
+            "user_id": user_id,
+            "start_date": start_date.isoformat(),
+            "end_date": end_date.isoformat(),
+            "days": days,
+            "bucket": bucket,
+            "window": window,
+            "days_logged": logged_count,
+            "average_calories": round(float(calories[logged].mean()), 1) if logged_count else 0.0,
+            "average_completion": round(float(completion.mean()), 1),
+            "coverage": {
+                group: round(float(rate), 3) for group, rate in zip(FOOD_GROUP_COLUMNS, covered.mean(axis=1))
+            },
+            "series": series,
+        }
+
+    def _rolling_mean(self, values: np.ndarray, mask: np.ndarray, window: int) -> np.ndarray:
+        """
+        Trailing mean of the masked values over the last `window` days
+
+        Windows at the start of the range (and windows with no masked days)
+        average over whatever days they have.
+        """
+        weights = mask.astype(float)
+        value_sums = np.cumsum(np.r_[0.0, values * weights])
+        weight_sums = np.cumsum(np.r_[0.0, weights])
+        ends = np.arange(1, len(values) + 1)
+        begins = np.maximum(ends - window, 0)
+        totals = value_sums[ends] - value_sums[begins]
+        counts = weight_sums[ends] - weight_sums[begins]
+        return np.divide(totals, counts, out=np.zeros(len(values)), where=counts > 0)
+
+
+# Global service instance
+analytics_service = AnalyticsService()
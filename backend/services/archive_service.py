@@ -0,0 +1,454 @@
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+from datetime import date, datetime, timedelta, timezone
+import hashlib
+import os
+import time
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.fs as pafs
+import pyarrow.parquet as pq
+from services.supabase_client import get_supabase
+from config.settings import settings
+
+
+# Column types of archived food logs
+ARCHIVE_SCHEMA = pa.schema([
+    ("id", pa.string()),
+    ("user_id", pa.string()),
+    ("logged_at", pa.timestamp("us", tz="UTC")),
+    ("created_at", pa.timestamp("us", tz="UTC")),
+    ("detected_food_name", pa.string()),
+    ("food_category", pa.string()),
+    ("healthiness_score", pa.int16()),
+    ("calories", pa.int32()),
+    ("meal_type", pa.string()),
+    ("image_url", pa.string()),
+    ("thumbnail_url", pa.string()),
+    ("medium_url", pa.string()),
+])
+
+# Partition columns encoded in the directory layout: user_id=<uuid>/month=<YYYY-MM>/
+PARTITIONING = ds.partitioning(
+    pa.schema([("user_id", pa.string()), ("month", pa.string())]),
+    flavor="hive",
+)
+
+
+class ArchiveService:
+    """Service for moving old food logs into compressed Parquet partitions"""
+
+    def __init__(self, page_size: int = 1000, delete_chunk_size: int = 200):
+        self.supabase = None
+        self.page_size = page_size
+        self.delete_chunk_size = delete_chunk_size
+        self._fs: Optional[pafs.FileSystem] = None
+        self._root: Optional[str] = None
+
+    def _get_supabase(self):
+        """Lazy load Supabase client"""
+        if self.supabase is None:
+            self.supabase = get_supabase()
+        return self.supabase
+
+    def _get_filesystem(self) -> Tuple[pafs.FileSystem, str]:
+        """Resolve ARCHIVE_URI (local path, s3://, gs://...) into a filesystem and root"""
+        if self._fs is None:
+            uri = settings.ARCHIVE_URI
+            if "://" not in uri:
+                uri = os.path.abspath(uri)
+            self._fs, self._root = pafs.FileSystem.from_uri(uri)
+            self._fs.create_dir(self._root, recursive=True)
+        return self._fs, self._root
+
+    def archive_cutoff(self, today: Optional[date] = None) -> date:
+        """
+        First day that stays in the hot table
+
+        Only whole months older than ARCHIVE_AFTER_DAYS are archived, so each
+        month partition is written once and never changes afterwards.
+        """
+        today = today or date.today()
+        return (today - timedelta(days=settings.ARCHIVE_AFTER_DAYS)).replace(day=1)
+
+    def _iter_old_logs(self, cutoff: date) -> Iterator[Dict]:
+        """Stream food logs logged before the cutoff, ordered by (user_id, logged_at, id)"""
+        last = None
+        while True:
+            query = self._get_supabase().table("food_logs").select("*").not_.is_(
+                "user_id", "null"
+            ).lt("logged_at", cutoff.isoformat())
+
+            if last:
+                user_id, logged_at, log_id = last["user_id"], last["logged_at"], last["id"]
+                query = query.or_(
+                    f"user_id.gt.{user_id},"
+                    f'and(user_id.eq.{user_id},logged_at.gt."{logged_at}"),'
+                    f'and(user_id.eq.{user_id},logged_at.eq."{logged_at}",id.gt.{log_id})'
+                )
+
+            response = query.order("user_id").order("logged_at").order("id").limit(self.page_size).execute()
+            rows = response.data if response.data else []
+            yield from rows
+
+            if len(rows) < self.page_size:
+                break
+            last = rows[-1]
+
+    async def archive_old_logs(self, dry_run: bool = False) -> Dict:
+        """
+        Move food logs older than the cutoff into Parquet partitions
+
+        Each (user, month) group is written as one zstd-compressed file and
+        only deleted from food_logs after the file is written. Rerunning
+        after a failure between the two is safe: rows already in the
+        partition are not written again, and files are named after their
+        contents, so a repeated write replaces the same file. Daily
+        summaries are left untouched.
+
+        Args:
+            dry_run: Count what would be archived without writing or deleting
+
+        Returns:
+            Report with the cutoff, logs archived, partitions written and rows/sec
+        """
+        started = time.perf_counter()
+        cutoff = self.archive_cutoff()
+        archived = 0
+        partitions = 0
+        group: List[Dict] = []
+        group_key: Optional[Tuple[str, str]] = None
+
+        def flush() -> None:
+            nonlocal archived, partitions
+            if not group:
+                return
+            if not dry_run:
+                self._write_partition(group_key[0], group_key[1], group)
+                self._delete_logs([row["id"] for row in group])
+            archived += len(group)
+            partitions += 1
+            group.clear()
+
+        for log in self._iter_old_logs(cutoff):
+            key = (log["user_id"], str(log["logged_at"])[:7])
+            if key != group_key:
+                flush()
+                group_key = key
+            group.append(log)
+        flush()
+
+        duration = time.perf_counter() - started
+        return {
+            "cutoff": cutoff.isoformat(),
+            "dry_run": dry_run,
+            "logs_archived": archived,
+            "partitions_written": 0 if dry_run else partitions,
+            "duration_seconds": round(duration, 3),
+            "rows_per_second": round(archived / duration, 1) if duration > 0 else 0.0,
+        }
+
+    def _write_partition(self, user_id: str, month: str, rows: List[Dict]) -> None:
+        """Write the rows of one (user, month) group not yet in its partition"""
+        fs, root = self._get_filesystem()
+        directory = f"{root}/user_id={user_id}/month={month}"
+        fs.create_dir(directory, recursive=True)
+
+        archived = self._partition_ids(directory)
+        rows = [row for row in rows if str(row["id"]) not in archived]
+        if rows:
+            self._write_file(directory, rows)
+
+    def _write_file(self, directory: str, rows: List[Dict]) -> str:
+        """Write rows as one zstd-compressed file in a partition directory and return its path"""
+        fs, _ = self._get_filesystem()
+        columns = {}
+        for field in ARCHIVE_SCHEMA:
+            values = [row.get(field.name) for row in rows]
+            if pa.types.is_timestamp(field.type):
+                values = [datetime.fromisoformat(v) if isinstance(v, str) else v for v in values]
+            columns[field.name] = pa.array(values, type=field.type)
+
+        # Deterministic name: writing the same rows again overwrites the file
+        digest = hashlib.sha1("\n".join(sorted(str(row["id"]) for row in rows)).encode("utf-8")).hexdigest()
+        path = f"{directory}/part-{digest[:32]}.parquet"
+        table = pa.table(columns, schema=ARCHIVE_SCHEMA).drop_columns(["user_id"])
+        pq.write_table(table, path, filesystem=fs, compression="zstd")
+        return path
+
+    def _partition_files(self, directory: str) -> List[str]:
+        """Parquet files of one (user, month) partition directory"""
+        fs, _ = self._get_filesystem()
+        if fs.get_file_info(directory).type == pafs.FileType.NotFound:
+            return []
+        return [
+            info.path for info in fs.get_file_info(pafs.FileSelector(directory))
+            if info.type == pafs.FileType.File and info.path.endswith(".parquet")
+        ]
+
+    def _partition_ids(self, directory: str) -> Set[str]:
+        """Ids already archived in one (user, month) partition directory"""
+        fs, _ = self._get_filesystem()
+        files = self._partition_files(directory)
+        if not files:
+            return set()
+        return set(ds.dataset(files, filesystem=fs, format="parquet").to_table(columns=["id"]).column("id").to_pylist())
+
+    def _user_months(self, user_id: str) -> List[str]:
+        """Archived months (YYYY-MM) of one user, newest first"""
+        fs, root = self._get_filesystem()
+        base = f"{root}/user_id={user_id}"
+        if fs.get_file_info(base).type == pafs.FileType.NotFound:
+            return []
+        return sorted(
+            (info.base_name.split("=", 1)[1] for info in fs.get_file_info(pafs.FileSelector(base))
+             if info.type == pafs.FileType.Directory and info.base_name.startswith("month=")),
+            reverse=True,
+        )
+
+    def delete_archived_logs(
+        self,
+        user_id: str,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+    ) -> List[Dict]:
+        """
+        Delete a user's archived food logs in a date range
+
+        Each affected month partition is rewritten without the deleted rows
+        (or removed when none are left). The new file is written before the
+        old ones are deleted, and rows are de-duplicated by id on rewrite,
+        so rerunning after a failure in between finishes the job.
+
+        Args:
+            user_id: User's UUID
+            start_date: First day to delete (None for no lower bound)
+            end_date: Last day to delete, inclusive (None for no upper bound)
+
+        Returns:
+            Deleted rows with user_id and ISO timestamp strings
+        """
+        if start_date and start_date >= self.archive_cutoff():
+            return []
+
+        fs, root = self._get_filesystem()
+        deleted: List[Dict] = []
+        for month in self._user_months(user_id):
+            if start_date and month < start_date.isoformat()[:7]:
+                continue
+            if end_date and month > end_date.isoformat()[:7]:
+                continue
+            directory = f"{root}/user_id={user_id}/month={month}"
+            files = self._partition_files(directory)
+            if not files:
+                continue
+
+            dataset = ds.dataset(files, filesystem=fs, format="parquet")
+            rows = dataset.to_table(
+                columns=[name for name in ARCHIVE_SCHEMA.names if name in dataset.schema.names]
+            ).to_pylist()
+            kept: Dict[str, Dict] = {}
+            dropped: Dict[str, Dict] = {}
+            for row in rows:
+                logged = row["logged_at"].astimezone(timezone.utc).date() if row.get("logged_at") else None
+                in_range = (
+                    logged is not None
+                    and (start_date is None or logged >= start_date)
+                    and (end_date is None or logged <= end_date)
+                )
+                target = dropped if in_range else kept
+                target[str(row["id"])] = row
+            if not dropped:
+                continue
+
+            written = self._write_file(directory, list(kept.values())) if kept else None
+            for path in files:
+                if path != written:
+                    fs.delete_file(path)
+            if written is None:
+                fs.delete_dir(directory)
+
+            for row in dropped.values():
+                row["user_id"] = user_id
+                for key, value in row.items():
+                    if isinstance(value, datetime):
+                        row[key] = value.isoformat()
+                deleted.append(row)
+        return deleted
+
+    def _delete_logs(self, log_ids: List[str]) -> None:
+        """Delete archived rows from the hot table in chunks"""
+        for i in range(0, len(log_ids), self.delete_chunk_size):
+            chunk = log_ids[i:i + self.delete_chunk_size]
+            self._get_supabase().table("food_logs").delete().in_("id", chunk).execute()
+
+    def _dataset(self, user_id: Optional[str] = None) -> Optional[ds.Dataset]:
+        """
+        Open the archive (or one user's part of it) as a partitioned dataset
+
+        Rooting the dataset at a user's directory avoids listing every
+        other user's files.
+
+        Returns:
+            Dataset, or None if nothing has been archived there
+        """
+        fs, root = self._get_filesystem()
+        if user_id:
+            base = f"{root}/user_id={user_id}"
+            partitioning = ds.partitioning(pa.schema([("month", pa.string())]), flavor="hive")
+        else:
+            base, partitioning = root, PARTITIONING
+
+        if fs.get_file_info(base).type == pafs.FileType.NotFound:
+            return None
+        dataset = ds.dataset(base, filesystem=fs, format="parquet", partitioning=partitioning)
+        return dataset if dataset.files else None
+
+    def read_archived_logs(
+        self,
+        user_id: Optional[str] = None,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        columns: Optional[List[str]] = None,
+    ) -> List[Dict]:
+        """
+        Read archived food logs, newest first
+
+        Partition pruning on user_id and month means only the files for the
+        requested user and range are opened.
+
+        Args:
+            user_id: Optional user filter
+            start_date: Optional start date filter
+            end_date: Optional end date filter (inclusive)
+            columns: Optional columns to read
+
+        Returns:
+            Archived food log rows with ISO timestamp strings
+        """
+        table = self.read_archived_table(user_id, start_date, end_date, columns)
+        if table is None or table.num_rows == 0:
+            return []
+
+        if "logged_at" in table.column_names:
+            table = table.sort_by([("logged_at", "descending")])
+        rows = table.to_pylist()
+        for row in rows:
+            for key, value in row.items():
+                if isinstance(value, datetime):
+                    row[key] = value.isoformat()
+        return rows
+
+    def archived_month_ranges(
+        self,
+        user_id: str,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+    ) -> List[Tuple[date, date]]:
+        """
+        List the archived months that overlap a date range, newest first
+
+        Each range is clipped to the requested dates, so it can be passed
+        straight to read_archived_logs.
+
+        Args:
+            user_id: User's UUID
+            start_date: Optional start date filter
+            end_date: Optional end date filter (inclusive)
+
+        Returns:
+            (start, end) date pairs, one per archived month
+        """
+        if start_date and start_date >= self.archive_cutoff():
+            return []
+
+        ranges = []
+        for month in self._user_months(user_id):
+            if start_date and month < start_date.isoformat()[:7]:
+                continue
+            if end_date and month > end_date.isoformat()[:7]:
+                continue
+            month_start = date.fromisoformat(f"{month}-01")
+            month_end = (month_start + timedelta(days=31)).replace(day=1) - timedelta(days=1)
+            ranges.append((
+                max(start_date, month_start) if start_date else month_start,
+                min(end_date, month_end) if end_date else month_end,
+            ))
+        return ranges
+
+    def iter_archived_logs(
+        self,
+        user_id: str,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        columns: Optional[List[str]] = None,
+    ) -> Iterator[Dict]:
+        """
+        Stream a user's archived food logs month by month, newest first
+
+        Only one month partition is held in memory at a time, which keeps
+        long exports flat in memory.
+
+        Args:
+            user_id: User's UUID
+            start_date: Optional start date filter
+            end_date: Optional end date filter (inclusive)
+            columns: Optional columns to read
+
+        Yields:
+            Archived food log rows with ISO timestamp strings
+        """
+        for month_start, month_end in self.archived_month_ranges(user_id, start_date, end_date):
+            yield from self.read_archived_logs(user_id, month_start, month_end, columns)
+
+    def read_archived_table(
+        self,
+        user_id: Optional[str] = None,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        columns: Optional[List[str]] = None,
+    ) -> Optional[pa.Table]:
+        """
+        Read archived food logs as an Arrow table for columnar analytics
+
+        Args:
+            user_id: Optional user filter
+            start_date: Optional start date filter
+            end_date: Optional end date filter (inclusive)
+            columns: Optional columns to read
+
+        Returns:
+            Arrow table, or None if nothing has been archived yet
+        """
+        # Everything from the cutoff on is still in the hot table
+        if start_date and start_date >= self.archive_cutoff():
+            return None
+
+        dataset = self._dataset(user_id)
+        if dataset is None:
+            return None
+
+        expression = None
+
+        def add(condition):
+            nonlocal expression
+            expression = condition if expression is None else expression & condition
+
+        if start_date:
+            add(ds.field("month") >= start_date.isoformat()[:7])
+            add(ds.field("logged_at") >= pa.scalar(
+                datetime.combine(start_date, datetime.min.time()), pa.timestamp("us", tz="UTC")
+            ))
+        if end_date:
+            add(ds.field("month") <= end_date.isoformat()[:7])
+            add(ds.field("logged_at") < pa.scalar(
+                datetime.combine(end_date + timedelta(days=1), datetime.min.time()), pa.timestamp("us", tz="UTC")
+            ))
+
+        # The month partition key is layout only; user_id is only a column in all-user reads
+        available = [name for name in ARCHIVE_SCHEMA.names if name in dataset.schema.names]
+        columns = [c for c in columns if c in available] if columns else available
+        return dataset.to_table(columns=columns, filter=expression)
+
+
+# Global service instance
+archive_service = ArchiveService()
@@ -45,7 +45,7 @@ class ChatbotService:
             )
             
             # Get user's streak
-            streak_info = await nutrition_service.calculate_streak(user_id)
+            streak_info = await nutrition_service.get_streak(user_id)
             
             # Get user's goal
             user_goal = await goal_service.get_active_goal(user_id)
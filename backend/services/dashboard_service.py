@@ -0,0 +1,90 @@
+from typing import Dict, Optional
+from datetime import date
+import asyncio
+from services.food_service import food_service
+from services.goal_service import goal_service
+from services.nutrition_service import nutrition_service, SUMMARY_FIELDS
+from services.storage_service import storage_service
+
+
+# Columns of today's meals on the home screen
+DASHBOARD_MEAL_FIELDS = [
+    "id", "detected_food_name", "food_category", "healthiness_score",
+    "calories", "meal_type", "logged_at", "thumbnail_url",
+]
+
+
+class DashboardService:
+    """Service assembling everything the home screen shows in one call"""
+
+    async def get_dashboard(self, user_id: str, meal_limit: int = 20) -> Dict:
+        """
+        Gather today's summary, missing groups, goal, recommendations, streak and meals
+
+        The four underlying reads (summary, active goal, streak, today's
+        meals) run concurrently, and each is made once: missing groups are
+        derived from the summary and recommendations from the goal rather
+        than read again. A read that fails leaves its part empty (null, or
+        no meals) and is named in `unavailable` instead of failing the
+        whole bundle.
+
+        Args:
+            user_id: User's UUID
+            meal_limit: Most of today's meals to include
+
+        Returns:
+            Dict matching DashboardResponse
+        """
+        today = date.today()
+        parts = ["summary", "goal", "streak", "meals"]
+        results = await asyncio.gather(
+            nutrition_service.get_daily_summary(user_id, today),
+            goal_service.get_active_goal(user_id),
+            nutrition_service.get_streak(user_id),
+            food_service.get_food_logs_page(
+                user_id=user_id,
+                limit=meal_limit,
+                start_date=today,
+                end_date=today,
+                fields=DASHBOARD_MEAL_FIELDS,
+            ),
+            return_exceptions=True,
+        )
+
+        unavailable = []
+        for part, result in zip(parts, results):
+            if isinstance(result, Exception):
+                print(f"Error loading dashboard {part}: {result}")
+                unavailable.append(part)
+        summary, goal, streak, meals = [
+            None if isinstance(result, Exception) else result for result in results
+        ]
+
+        if "summary" in unavailable:
+            missing, completed = [], []
+        else:
+            missing = nutrition_service.missing_food_groups(summary)
+            completed = [g for g in ["fruits", "vegetables", "protein", "dairy", "grains"] if g not in missing]
+        return {
+            "user_id": user_id,
+            "date": today.isoformat(),
+            "summary": None if "summary" in unavailable else {
+                field: (summary or {}).get(field) or 0 for field in SUMMARY_FIELDS
+            },
+            "missing_groups": missing,
+            "completed_groups": completed,
+            "goal": self._compact_goal(goal),
+            "recommendations": nutrition_service.recommendations_for_goal(goal),
+            "streak": streak,
+            "meals": await storage_service.sign_food_logs(meals["logs"]) if meals else [],
+            "unavailable": unavailable,
+        }
+
+    def _compact_goal(self, goal: Optional[Dict]) -> Optional[Dict]:
+        if not goal:
+            return None
+        return {"goal_type": goal.get("goal_type"), "target_calories": goal.get("target_calories")}
+
+
+# Global service instance
+dashboard_service = DashboardService()
@@ -0,0 +1,230 @@
+from typing import AsyncIterator, Dict, Optional
+from datetime import date
+import asyncio
+import csv
+import io
+import json
+from services.supabase_client import get_supabase
+from services.food_service import food_service
+from services.archive_service import archive_service
+
+
+FOOD_LOG_EXPORT_COLUMNS = [
+    "id",
+    "logged_at",
+    "detected_food_name",
+    "food_category",
+    "healthiness_score",
+    "calories",
+    "meal_type",
+    "image_url",
+    "thumbnail_url",
+    "medium_url",
+]
+
+SUMMARY_EXPORT_COLUMNS = [
+    "date",
+    "fruits_count",
+    "vegetables_count",
+    "protein_count",
+    "dairy_count",
+    "grains_count",
+    "total_calories",
+    "completion_percentage",
+]
+
+# CSV exports put both record types in one file, tagged by record_type
+# (plus a final record_type=error row, with its message, if the export fails)
+CSV_COLUMNS = ["record_type"] + list(dict.fromkeys(FOOD_LOG_EXPORT_COLUMNS + SUMMARY_EXPORT_COLUMNS)) + ["error"]
+
+
+class ExportService:
+    """Service for streaming a user's food history out as NDJSON or CSV"""
+
+    def __init__(self, page_size: int = 500):
+        self.supabase = None
+        self.page_size = page_size
+
+    def _get_supabase(self):
+        """Lazy load Supabase client"""
+        if self.supabase is None:
+            self.supabase = get_supabase()
+        return self.supabase
+
+    async def iter_food_logs(
+        self,
+        user_id: str,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+    ) -> AsyncIterator[Dict]:
+        """
+        Yield a user's food logs one page at a time, newest first
+
+        Logs moved to cold storage are read from the archive after the hot
+        table is exhausted, so the export always covers the full range.
+
+        Args:
+            user_id: User's UUID
+            start_date: Optional start date filter
+            end_date: Optional end date filter (inclusive)
+
+        Yields:
+            Food log rows
+        """
+        cursor = None
+        while True:
+            page = await food_service.get_food_logs_page(
+                user_id=user_id,
+                limit=self.page_size,
+                start_date=start_date,
+                end_date=end_date,
+                cursor=cursor,
+                fields=FOOD_LOG_EXPORT_COLUMNS,
+            )
+            for log in page["logs"]:
+                yield log
+
+            cursor = page["next_cursor"]
+            if not cursor:
+                break
+
+        # Archived logs are all older than anything left in food_logs. Each
+        # month is read off the event loop, one partition in memory at a time
+        months = await asyncio.to_thread(
+            archive_service.archived_month_ranges, user_id, start_date, end_date
+        )
+        for month_start, month_end in months:
+            logs = await asyncio.to_thread(
+                archive_service.read_archived_logs,
+                user_id,
+                month_start,
+                month_end,
+                FOOD_LOG_EXPORT_COLUMNS,
+            )
+            for log in logs:
+                yield log
+
+    async def iter_daily_summaries(
+        self,
+        user_id: str,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+    ) -> AsyncIterator[Dict]:
+        """
+        Yield a user's daily summaries one page at a time, oldest first
+
+        (user_id, date) is unique, so the last date seen is the keyset cursor.
+
+        Args:
+            user_id: User's UUID
+            start_date: Optional start date filter
+            end_date: Optional end date filter (inclusive)
+
+        Yields:
+            Daily summary rows
+        """
+        last_date = None
+        while True:
+            query = self._get_supabase().table("daily_nutrition_summary").select(
+                ",".join(SUMMARY_EXPORT_COLUMNS)
+            ).eq("user_id", user_id)
+
+            if last_date:
+                query = query.gt("date", last_date)
+            elif start_date:
+                query = query.gte("date", start_date.isoformat())
+            if end_date:
+                query = query.lte("date", end_date.isoformat())
+
+            response = await asyncio.to_thread(
+                query.order("date").limit(self.page_size).execute
+            )
+            rows = response.data if response.data else []
+            for row in rows:
+                yield row
+
+            if len(rows) < self.page_size:
+                break
+            last_date = rows[-1]["date"]
+
+    async def stream_ndjson(
+        self,
+        user_id: str,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+    ) -> AsyncIterator[str]:
+        """
+        Stream a user's history as newline-delimited JSON
+
+        Each line carries a "type" of food_log or daily_summary. If a read
+        fails after the response has started, a final "error" line is
+        written and the stream is aborted rather than ended cleanly, so a
+        partial export cannot be mistaken for a complete one.
+
+        Args:
+            user_id: User's UUID
+            start_date: Optional start date filter
+            end_date: Optional end date filter (inclusive)
+
+        Yields:
+            One JSON line per record
+        """
+        try:
+            async for log in self.iter_food_logs(user_id, start_date, end_date):
+                yield json.dumps({"type": "food_log", **log}, default=str) + "\n"
+            async for summary in self.iter_daily_summaries(user_id, start_date, end_date):
+                yield json.dumps({"type": "daily_summary", **summary}, default=str) + "\n"
+        except Exception as e:
+            print(f"Error exporting food history: {e}")
+            yield json.dumps({"type": "error", "error": f"Export incomplete: {str(e)}"}) + "\n"
+            raise
+
+    async def stream_csv(
+        self,
+        user_id: str,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+    ) -> AsyncIterator[str]:
+        """
+        Stream a user's history as CSV
+
+        Food logs and daily summaries share one header; the record_type
+        column tells them apart and unused columns are left empty. A failed
+        export ends with a record_type=error row and an aborted stream.
+
+        Args:
+            user_id: User's UUID
+            start_date: Optional start date filter
+            end_date: Optional end date filter (inclusive)
+
+        Yields:
+            CSV text, one row per chunk after the header
+        """
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=CSV_COLUMNS, extrasaction="ignore")
+
+        def flush() -> str:
+            text = buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate(0)
+            return text
+
+        writer.writeheader()
+        yield flush()
+
+        try:
+            async for log in self.iter_food_logs(user_id, start_date, end_date):
+                writer.writerow({"record_type": "food_log", **log})
+                yield flush()
+            async for summary in self.iter_daily_summaries(user_id, start_date, end_date):
+                writer.writerow({"record_type": "daily_summary", **summary})
+                yield flush()
+        except Exception as e:
+            print(f"Error exporting food history: {e}")
+            writer.writerow({"record_type": "error", "error": f"Export incomplete: {str(e)}"})
+            yield flush()
+            raise
+
+
+# Global service instance
+export_service = ExportService()
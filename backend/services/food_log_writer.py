@@ -0,0 +1,151 @@
+from typing import Dict, List, Optional, Tuple
+import asyncio
+from postgrest.exceptions import APIError
+from services.supabase_client import get_supabase
+from services.storage_service import storage_service
+from config.settings import settings
+
+
+# SQLSTATE classes of errors caused by the rows themselves (data exceptions,
+# constraint violations): retrying the same rows fails the same way
+ROW_ERROR_CLASSES = ("22", "23")
+
+
+class FoodLogWriteBuffer:
+    """
+    Write-behind buffer that coalesces food_logs inserts into bulk inserts
+
+    Callers submit a row and await its inserted version. A background task
+    flushes pending rows every few milliseconds or once a batch fills up.
+    Batches go through the insert_food_logs function, which also takes the
+    image blob reference of every row that carries image blob fields.
+    """
+
+    def __init__(self, max_batch: int = 100, flush_interval_ms: int = 5, max_pending: int = 1000):
+        self.supabase = None
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval_ms / 1000
+        self.max_pending = max_pending
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def _get_supabase(self):
+        """Lazy load Supabase client"""
+        if self.supabase is None:
+            self.supabase = get_supabase()
+        return self.supabase
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def start(self) -> None:
+        """Start the background flush task"""
+        if self.running:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_pending)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Flush every pending row, then stop the background task"""
+        if not self.running:
+            return
+        await self._queue.join()
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def submit(self, row: Dict) -> Dict:
+        """
+        Queue a row for insertion and wait until it is written
+
+        Waits for space when the buffer is full, so producers slow down to
+        the rate the database can absorb.
+
+        Args:
+            row: food_logs row to insert
+
+        Returns:
+            Inserted row as returned by Supabase (including its id)
+        """
+        if not self.running:
+            raise RuntimeError("Food log write buffer is not running")
+
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((row, future))
+        return await future
+
+    async def _run(self) -> None:
+        """Collect pending rows into batches and flush them"""
+        while True:
+            batch = [await self._queue.get()]
+            deadline = asyncio.get_running_loop().time() + self.flush_interval
+
+            while len(batch) < self.max_batch:
+                timeout = deadline - asyncio.get_running_loop().time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            try:
+                await self._flush(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def _flush(self, batch: List[Tuple[Dict, asyncio.Future]]) -> None:
+        """
+        Insert a batch with one request and resolve each caller's future
+
+        If the database rejects the batch because of its rows (e.g. one
+        row references an unknown user), nothing was written, so the batch
+        is split in half and each half retried and only the callers whose
+        rows cannot be inserted get the error. Any other failure (network
+        errors, timeouts) may have happened after the insert committed and
+        insert_food_logs is not idempotent, so the whole batch fails
+        instead of being retried.
+
+        Args:
+            batch: Pending (row, future) pairs
+        """
+        try:
+            query = self._get_supabase().rpc("insert_food_logs", {
+                "p_logs": [row for row, _ in batch],
+                "p_url_prefix": storage_service.public_url_prefix(),
+            })
+            response = await asyncio.to_thread(query.execute)
+            inserted = response.data if response.data else []
+            if len(inserted) != len(batch):
+                raise RuntimeError(f"Expected {len(batch)} inserted rows, got {len(inserted)}")
+        except Exception as e:
+            if len(batch) > 1 and self._is_row_error(e):
+                middle = len(batch) // 2
+                await self._flush(batch[:middle])
+                await self._flush(batch[middle:])
+                return
+            print(f"Error flushing food log batch of {len(batch)}: {e}")
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future), row in zip(batch, inserted):
+            if not future.done():
+                future.set_result(row)
+
+    def _is_row_error(self, error: Exception) -> bool:
+        """Whether the database rejected the rows themselves (safe to retry in parts)"""
+        return isinstance(error, APIError) and str(error.code or "")[:2] in ROW_ERROR_CLASSES
+
+
+# Global buffer instance (started at app startup when FOOD_LOG_WRITE_BEHIND is enabled)
+food_log_writer = FoodLogWriteBuffer(
+    max_batch=settings.FOOD_LOG_WRITE_BATCH_SIZE,
+    flush_interval_ms=settings.FOOD_LOG_WRITE_INTERVAL_MS,
+)
@@ -1,12 +1,29 @@
 from typing import List, Optional, Dict
-from datetime import datetime, date
+from datetime import datetime, date, timedelta
 from uuid import UUID
+import asyncio
 from services.supabase_client import get_supabase
+from services.food_log_writer import food_log_writer
+from services.storage_service import storage_service
+from services.archive_service import archive_service
+from services.nutrition_service import nutrition_service
+from services.live_update_service import live_updates
+from utils.pagination import (
+    encode_cursor,
+    decode_cursor,
+    encode_search_cursor,
+    decode_search_cursor,
+    build_select,
+    project_rows,
+)
 
 
 class FoodService:
     """Service for food logging business logic"""
     
+    # Rows per select/delete request when deleting many logs
+    DELETE_CHUNK_SIZE = 500
+    
     def __init__(self):
         self.supabase = None
     
@@ -19,27 +36,36 @@ class FoodService:
     async def create_food_log(
         self,
         user_id: Optional[str],
-        image_url: str,
+        image_url: Optional[str],
         detected_food_name: str,
         food_category: str,
         healthiness_score: int,
         calories: Optional[int] = None,
         meal_type: Optional[str] = None,
+        thumbnail_url: Optional[str] = None,
+        medium_url: Optional[str] = None,
+        image_blob: Optional[Dict] = None,
     ) -> Dict:
         """
         Create a new food log entry
         
         Args:
             user_id: User's UUID (optional, None for anonymous users)
-            image_url: URL to uploaded food image
+            image_url: URL to uploaded food image (None with image_blob)
             detected_food_name: Name detected by ML model
             food_category: Category (fruit, vegetable, etc)
             healthiness_score: Score from 0-100
             calories: Optional calorie count
             meal_type: Optional meal type
+            thumbnail_url: Optional URL of the small WebP derivative
+            medium_url: Optional URL of the medium WebP derivative
+            image_blob: storage_service.image_blob_fields() of an uploaded
+                image; the blob reference is taken with the insert and the
+                image URLs filled in from it
             
         Returns:
-            Created food log data
+            Created food log data; with image_blob, also blob_path and
+            upload_needed for attach_food_image
         """
         try:
             data = {
@@ -50,19 +76,375 @@ class FoodService:
                 "healthiness_score": healthiness_score,
                 "calories": calories,
                 "meal_type": meal_type,
+                "thumbnail_url": thumbnail_url,
+                "medium_url": medium_url,
                 "logged_at": datetime.utcnow().isoformat(),
+                **(image_blob or {}),
             }
-            response = self._get_supabase().table("food_logs").insert(data).execute()
+            if food_log_writer.running:
+                # Coalesced with concurrent uploads into one bulk insert
+                created = await food_log_writer.submit(data)
+            else:
+                inserted = await asyncio.to_thread(self.insert_food_logs, [data])
+                created = inserted[0] if inserted else None
             
-            # Update daily summary after creating log (only for authenticated users)
-            if response.data and user_id:
-                await self.update_daily_summary(user_id, date.today())
+            # Update daily summary after creating log (only for authenticated users),
+            # keyed by the UTC day of logged_at like every other summary write
+            if created and user_id:
+                await self.update_daily_summary(user_id, date.fromisoformat(str(created["logged_at"])[:10]))
             
-            return response.data[0] if response.data else None
+            return created
         except Exception as e:
             print(f"Error creating food log: {e}")
             raise
     
+    async def create_food_logs(self, entries: List[Dict], update_summaries: bool = True) -> List[Dict]:
+        """
+        Create many food log entries with a single bulk insert
+        
+        Daily summaries are recomputed once per affected (user, day) rather
+        than once per row.
+        
+        Args:
+            entries: Food log rows with the same fields as create_food_log
+                (including image blob fields); logged_at defaults to now
+            update_summaries: Set False when the caller recomputes summaries
+                itself after several batches
+            
+        Returns:
+            Created food log rows, in the same order as entries
+        """
+        if not entries:
+            return []
+        
+        try:
+            now = datetime.utcnow().isoformat()
+            rows = [{**entry, "logged_at": entry.get("logged_at") or now} for entry in entries]
+            created = await asyncio.to_thread(self.insert_food_logs, rows)
+            if not update_summaries:
+                return created
+            
+            affected_days = {
+                (row["user_id"], date.fromisoformat(str(row["logged_at"])[:10]))
+                for row in created
+                if row.get("user_id")
+            }
+            for user_id, day in sorted(affected_days):
+                await self.update_daily_summary(user_id, day)
+            
+            return created
+        except Exception as e:
+            print(f"Error creating food logs: {e}")
+            raise
+    
+    def insert_food_logs(self, rows: List[Dict]) -> List[Dict]:
+        """
+        Insert food log rows with one insert_food_logs call
+        
+        Rows carrying image blob fields take their blob reference in the
+        same transaction, so a reference only exists for a log that does.
+        
+        Args:
+            rows: Food log rows, optionally with image blob fields
+            
+        Returns:
+            Inserted rows in order, each with blob_path and upload_needed
+        """
+        response = self._get_supabase().rpc("insert_food_logs", {
+            "p_logs": rows,
+            "p_url_prefix": storage_service.public_url_prefix(),
+        }).execute()
+        return response.data if response.data else []
+    
+    async def attach_food_image(self, food_log: Dict, image_data: bytes, content_type: Optional[str] = None) -> Dict:
+        """
+        Store the image of a food log created with image blob fields
+        
+        If storing fails, the log is discarded (releasing its reference)
+        and the error re-raised, so no log points at a missing image.
+        
+        Args:
+            food_log: Row returned by create_food_log / create_food_logs
+            image_data: Image file bytes
+            content_type: MIME type of the image
+            
+        Returns:
+            The food log, without derivative URLs if they could not be rendered
+        """
+        blob_path = food_log.pop("blob_path", None)
+        upload_needed = bool(food_log.pop("upload_needed", False))
+        if not blob_path:
+            return food_log
+        
+        try:
+            derivatives = await storage_service.store_food_image(blob_path, image_data, upload_needed, content_type)
+        except Exception:
+            await self.discard_food_log(food_log)
+            raise
+        
+        if not derivatives and food_log.get("thumbnail_url"):
+            query = self._get_supabase().table("food_logs").update(
+                {"thumbnail_url": None, "medium_url": None}
+            ).eq("id", food_log["id"])
+            await asyncio.to_thread(query.execute)
+            food_log.update(thumbnail_url=None, medium_url=None)
+        return food_log
+    
+    async def discard_food_log(self, food_log: Dict) -> None:
+        """
+        Remove a just-created food log whose image could not be stored
+        
+        Args:
+            food_log: Row returned by create_food_log / create_food_logs
+        """
+        try:
+            query = self._get_supabase().table("food_logs").delete().eq("id", food_log["id"])
+            await asyncio.to_thread(query.execute)
+            if food_log.get("user_id"):
+                await self._decrement_summaries([food_log])
+            await storage_service.delete_food_images([food_log.get("image_url")])
+        except Exception as e:
+            print(f"Error discarding food log: {e}")
+    
+    async def relog_food(self, source_log_id: str, user_id: str, meal_type: Optional[str] = None) -> Optional[Dict]:
+        """
+        Log a previous meal again without re-uploading or re-analyzing it
+        
+        The relog_food database function copies the source log, takes another
+        reference on its image and increments the day's summary in one call,
+        returning the summary and streak row so the streak is updated from
+        them without reading either again.
+        
+        Args:
+            source_log_id: ID of the user's food log to repeat
+            user_id: User's UUID (must own the source log)
+            meal_type: Optional meal type, defaults to the source log's
+            
+        Returns:
+            Created food log data, or None if the source log was not found
+        """
+        try:
+            response = self._get_supabase().rpc("relog_food", {
+                "p_source_id": source_log_id,
+                "p_user_id": user_id,
+                "p_meal_type": meal_type,
+            }).execute()
+            result = response.data
+            if not result or not result.get("log"):
+                return None
+            
+            created = result["log"]
+            summary = result.get("summary") or {}
+            day = date.fromisoformat(str(summary.get("date") or created["logged_at"])[:10])
+            nutrition_service.invalidate_daily_summary(user_id, day)
+            streak = await nutrition_service.record_day_completion(
+                user_id,
+                day,
+                summary.get("completion_percentage") == 100,
+                was_complete=result.get("was_complete"),
+                streak_row=result.get("streak") or {},
+            )
+            await self._publish_summary(user_id, summary, streak, day)
+            return created
+        except Exception as e:
+            print(f"Error re-logging food: {e}")
+            raise
+    
+    async def search_food_logs(
+        self,
+        user_id: str,
+        query: str,
+        limit: int = 20,
+        cursor: Optional[str] = None,
+    ) -> Dict:
+        """
+        Search a user's food history by detected food name
+        
+        Matching runs in the search_food_logs database function on a
+        per-user pg_trgm index: prefix and whole-word matches rank first,
+        then fuzzy matches by trigram similarity, newest first within equal
+        scores. Pages continue from a (score, logged_at, id) keyset cursor.
+        
+        Args:
+            user_id: User's UUID
+            query: Text to search for (e.g. "salmon")
+            limit: Maximum number of matches to return
+            cursor: Opaque cursor returned with the previous page
+            
+        Returns:
+            Dict with results (food logs with a relevance score) and
+            next_cursor (None on the last page)
+            
+        Raises:
+            ValueError: If the cursor is malformed
+        """
+        params = {
+            "p_user_id": user_id,
+            "p_query": query.strip(),
+            # One extra row to learn whether another page exists
+            "p_limit": limit + 1,
+        }
+        if cursor:
+            score, logged_at, log_id = decode_search_cursor(cursor)
+            params.update(p_after_score=score, p_after_logged_at=logged_at, p_after_id=log_id)
+        
+        response = await asyncio.to_thread(self._get_supabase().rpc("search_food_logs", params).execute)
+        rows = response.data if response.data else []
+        
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last = rows[-1]
+            next_cursor = encode_search_cursor(last["score"], last["logged_at"], str(last["id"]))
+        
+        return {"results": rows, "next_cursor": next_cursor}
+    
+    async def delete_food_logs(
+        self,
+        user_id: str,
+        log_ids: Optional[List[str]] = None,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+    ) -> Dict:
+        """
+        Delete a user's food logs by ID or date range
+        
+        Rows are deleted in chunks, their images are released in batches and
+        the affected daily summaries are decremented in place instead of
+        being recomputed from the remaining logs. A date range that reaches
+        before the archive cutoff (or is open-ended) also removes the user's
+        archived logs in that range from their Parquet partitions.
+        
+        Args:
+            user_id: User's UUID (only this user's logs are deleted)
+            log_ids: Specific log IDs to delete
+            start_date: Start of a date range to delete (None for no lower bound)
+            end_date: End of a date range to delete, inclusive (None for no upper bound)
+            
+        Returns:
+            Dict with deleted (log count) and images_removed (storage objects)
+        """
+        columns = "id,user_id,logged_at,food_category,calories,image_url,thumbnail_url,medium_url"
+        deleted_rows: List[Dict] = []
+        by_range = log_ids is None
+        last_id = None
+        
+        while True:
+            query = self._get_supabase().table("food_logs").select(columns).eq("user_id", user_id)
+            if not by_range:
+                chunk = log_ids[:self.DELETE_CHUNK_SIZE]
+                log_ids = log_ids[self.DELETE_CHUNK_SIZE:]
+                if not chunk:
+                    break
+                query = query.in_("id", chunk)
+            else:
+                # Keyset on id: each pass moves past the rows it saw, so the loop
+                # ends even if a delete removes nothing
+                query = self._apply_date_range(query, start_date, end_date)
+                if last_id:
+                    query = query.gt("id", last_id)
+                query = query.order("id").limit(self.DELETE_CHUNK_SIZE)
+            
+            rows = query.execute().data or []
+            if rows:
+                response = self._get_supabase().table("food_logs").delete().in_(
+                    "id", [row["id"] for row in rows]
+                ).execute()
+                # Only rows the delete actually removed are released and subtracted
+                removed = {row["id"] for row in response.data or []}
+                deleted_rows.extend(row for row in rows if row["id"] in removed)
+            if by_range:
+                if len(rows) < self.DELETE_CHUNK_SIZE:
+                    break
+                last_id = rows[-1]["id"]
+        
+        if by_range:
+            deleted_rows.extend(await asyncio.to_thread(
+                archive_service.delete_archived_logs, user_id, start_date, end_date
+            ))
+        
+        if not deleted_rows:
+            return {"deleted": 0, "images_removed": 0}
+        
+        await self._decrement_summaries(deleted_rows)
+        
+        # Legacy (non content-addressed) images can still be shared by re-logged entries
+        urls = [row["image_url"] for row in deleted_rows if row.get("image_url")]
+        legacy = list({url for url in urls if f"/{storage_service.BLOB_PREFIX}/" not in url})
+        if legacy:
+            still_used = self._get_supabase().table("food_logs").select("image_url").in_(
+                "image_url", legacy
+            ).execute().data or []
+            kept = {row["image_url"] for row in still_used}
+            urls = [url for url in urls if url not in kept]
+        
+        images_removed = await storage_service.delete_food_images(urls)
+        return {"deleted": len(deleted_rows), "images_removed": images_removed}
+    
+    async def _decrement_summaries(self, deleted_rows: List[Dict]) -> None:
+        """
+        Subtract deleted logs from their daily summaries (and streaks)
+        
+        Args:
+            deleted_rows: Deleted food logs (user_id, logged_at, food_category, calories)
+        """
+        count_columns = {
+            "fruit": "fruits_count",
+            "vegetable": "vegetables_count",
+            "protein": "protein_count",
+            "dairy": "dairy_count",
+            "grain": "grains_count",
+        }
+        
+        # (user_id, date) -> amounts to subtract
+        deltas: Dict[tuple, Dict[str, int]] = {}
+        for row in deleted_rows:
+            key = (row["user_id"], str(row["logged_at"])[:10])
+            delta = deltas.setdefault(key, {column: 0 for column in [*count_columns.values(), "total_calories", "log_count"]})
+            column = count_columns.get(row.get("food_category"))
+            if column:
+                delta[column] += 1
+            delta["total_calories"] += row.get("calories") or 0
+            delta["log_count"] += 1
+        
+        users: Dict[str, List[str]] = {}
+        for user_id, day in deltas:
+            users.setdefault(user_id, []).append(day)
+        
+        updated = []
+        uncompleted = []
+        for user_id, days in users.items():
+            summaries = self._get_supabase().table("daily_nutrition_summary").select("*").eq(
+                "user_id", user_id
+            ).in_("date", days).execute().data or []
+            
+            for summary in summaries:
+                delta = deltas[(user_id, summary["date"])]
+                row = {"user_id": user_id, "date": summary["date"]}
+                for column, amount in delta.items():
+                    row[column] = max((summary.get(column) or 0) - amount, 0)
+                row["completion_percentage"] = 20 * sum(1 for column in count_columns.values() if row[column] > 0)
+                updated.append(row)
+                if summary.get("completion_percentage") == 100 and row["completion_percentage"] < 100:
+                    uncompleted.append((user_id, date.fromisoformat(summary["date"])))
+        
+        if updated:
+            self._get_supabase().table("daily_nutrition_summary").upsert(
+                updated, on_conflict="user_id,date"
+            ).execute()
+            for row in updated:
+                nutrition_service.invalidate_daily_summary(row["user_id"], date.fromisoformat(row["date"]))
+        
+        # Latest day first, so each one only shortens the current run
+        streaks: Dict[str, Dict] = {}
+        for user_id, day in sorted(uncompleted, key=lambda item: item[1], reverse=True):
+            streaks[user_id] = await nutrition_service.record_day_completion(user_id, day, False, was_complete=True)
+        
+        for row in updated:
+            await self._publish_summary(
+                row["user_id"], row, streaks.get(row["user_id"]), date.fromisoformat(row["date"])
+            )
+    
     async def get_food_logs(
         self,
         user_id: str,
@@ -84,11 +466,7 @@ class FoodService:
         """
         try:
             query = self._get_supabase().table("food_logs").select("*").eq("user_id", user_id).order("logged_at", desc=True).limit(limit)
-            
-            if start_date:
-                query = query.gte("logged_at", start_date.isoformat())
-            if end_date:
-                query = query.lte("logged_at", end_date.isoformat())
+            query = self._apply_date_range(query, start_date, end_date)
             
             response = query.execute()
             return response.data if response.data else []
@@ -115,11 +493,7 @@ class FoodService:
         """
         try:
             query = self._get_supabase().table("food_logs").select("*").order("logged_at", desc=True).limit(limit)
-            
-            if start_date:
-                query = query.gte("logged_at", start_date.isoformat())
-            if end_date:
-                query = query.lte("logged_at", end_date.isoformat())
+            query = self._apply_date_range(query, start_date, end_date)
             
             response = query.execute()
             return response.data if response.data else []
@@ -127,68 +501,201 @@ class FoodService:
             print(f"Error fetching all food logs: {e}")
             return []
     
-    async def update_daily_summary(self, user_id: str, summary_date: date) -> None:
+    async def get_food_logs_page(
+        self,
+        user_id: Optional[str] = None,
+        limit: int = 50,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        cursor: Optional[str] = None,
+        fields: Optional[List[str]] = None,
+    ) -> Dict:
+        """
+        Get one page of food logs using keyset pagination on (logged_at, id)
+        
+        Each page is located by seeking past the last row of the previous
+        page, so deep pages cost the same as the first one.
+        
+        Args:
+            user_id: User's UUID, or None to list logs from all users
+            limit: Maximum number of logs on the page
+            start_date: Optional start date filter
+            end_date: Optional end date filter (inclusive)
+            cursor: Opaque cursor returned with the previous page
+            fields: Optional list of columns to return
+            
+        Returns:
+            Dict with logs and next_cursor (None on the last page)
+            
+        Raises:
+            ValueError: If the cursor is malformed
+        """
+        query = self._get_supabase().table("food_logs").select(build_select(fields))
+        
+        if user_id:
+            query = query.eq("user_id", user_id)
+        query = self._apply_date_range(query, start_date, end_date)
+        
+        if cursor:
+            logged_at, log_id = decode_cursor(cursor)
+            query = query.or_(
+                f'logged_at.lt."{logged_at}",and(logged_at.eq."{logged_at}",id.lt.{log_id})'
+            )
+        
+        # Fetch one extra row to learn whether another page exists
+        query = query.order("logged_at", desc=True).order("id", desc=True).limit(limit + 1)
+        
+        # Off the event loop, so it overlaps with reads gathered alongside it
+        response = await asyncio.to_thread(query.execute)
+        rows = response.data if response.data else []
+        
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last = rows[-1]
+            next_cursor = encode_cursor(last["logged_at"], str(last["id"]))
+        
+        return {
+            "logs": project_rows(rows, fields),
+            "next_cursor": next_cursor,
+        }
+    
+    def _apply_date_range(self, query, start_date: Optional[date], end_date: Optional[date]):
+        """
+        Restrict a food_logs query to a date range
+        
+        The end date is inclusive, so logs from anywhere on that day match.
+        
+        Args:
+            query: Supabase query builder
+            start_date: Optional start date filter
+            end_date: Optional end date filter
+            
+        Returns:
+            Filtered query builder
+        """
+        if start_date:
+            query = query.gte("logged_at", start_date.isoformat())
+        if end_date:
+            query = query.lt("logged_at", (end_date + timedelta(days=1)).isoformat())
+        return query
+    
+    async def update_daily_summary(self, user_id: str, summary_date: date, update_streak: bool = True) -> None:
         """
         Update or create daily nutrition summary for a user
         
         Args:
             user_id: User's UUID
             summary_date: Date to calculate summary for
+            update_streak: Set False when the caller recomputes the streak
+                itself afterwards
         """
         try:
             # Get all food logs for the day
             logs = await self.get_food_logs(
                 user_id,
+                limit=1000,
                 start_date=summary_date,
                 end_date=summary_date,
             )
             
-            # Calculate counts by category
-            category_counts = {
-                "fruits_count": 0,
-                "vegetables_count": 0,
-                "protein_count": 0,
-                "dairy_count": 0,
-                "grains_count": 0,
-                "total_calories": 0,
-            }
+            data = self.build_daily_summary(user_id, summary_date, logs)
             
-            for log in logs:
-                category = log.get("food_category")
-                if category == "fruit":
-                    category_counts["fruits_count"] += 1
-                elif category == "vegetable":
-                    category_counts["vegetables_count"] += 1
-                elif category == "protein":
-                    category_counts["protein_count"] += 1
-                elif category == "dairy":
-                    category_counts["dairy_count"] += 1
-                elif category == "grain":
-                    category_counts["grains_count"] += 1
-                
-                if log.get("calories"):
-                    category_counts["total_calories"] += log["calories"]
-            
-            # Calculate completion percentage (each category = 20%)
-            completion = sum([
-                20 if category_counts["fruits_count"] > 0 else 0,
-                20 if category_counts["vegetables_count"] > 0 else 0,
-                20 if category_counts["protein_count"] > 0 else 0,
-                20 if category_counts["dairy_count"] > 0 else 0,
-                20 if category_counts["grains_count"] > 0 else 0,
-            ])
-            
-            # Upsert daily summary
-            data = {
-                "user_id": user_id,
-                "date": summary_date.isoformat(),
-                **category_counts,
-                "completion_percentage": completion,
-            }
+            self._get_supabase().table("daily_nutrition_summary").upsert(
+                data, on_conflict="user_id,date"
+            ).execute()
+            nutrition_service.invalidate_daily_summary(user_id, summary_date)
             
-            self._get_supabase().table("daily_nutrition_summary").upsert(data).execute()
+            streak = None
+            if update_streak:
+                streak = await nutrition_service.record_day_completion(
+                    user_id, summary_date, data["completion_percentage"] == 100
+                )
+            await self._publish_summary(user_id, data, streak, summary_date)
         except Exception as e:
             print(f"Error updating daily summary: {e}")
+    
+    async def _publish_summary(
+        self,
+        user_id: str,
+        summary: Optional[Dict],
+        streak: Optional[Dict],
+        summary_date: date,
+    ) -> None:
+        """
+        Push a user's updated summary to their open live-update streams
+        
+        Args:
+            user_id: User's UUID
+            summary: The day's summary row after the write
+            streak: Streak after the write, read here if not already known
+            summary_date: Day the summary belongs to
+        """
+        if not live_updates.has_subscribers(user_id):
+            return
+        
+        try:
+            if streak is None:
+                streak = await nutrition_service.get_streak(user_id)
+            live_updates.publish_summary(user_id, {**(summary or {}), "date": summary_date.isoformat()}, streak)
+        except Exception as e:
+            print(f"Error publishing live update: {e}")
+    
+    def build_daily_summary(self, user_id: str, summary_date: date, logs: List[Dict]) -> Dict:
+        """
+        Aggregate one day's food logs into a daily_nutrition_summary row
+        
+        Args:
+            user_id: User's UUID
+            summary_date: Date the logs belong to
+            logs: All of the user's food logs for that date
+            
+        Returns:
+            Summary row ready to upsert
+        """
+        # Calculate counts by category
+        category_counts = {
+            "fruits_count": 0,
+            "vegetables_count": 0,
+            "protein_count": 0,
+            "dairy_count": 0,
+            "grains_count": 0,
+            "total_calories": 0,
+        }
+        
+        for log in logs:
+            category = log.get("food_category")
+            if category == "fruit":
+                category_counts["fruits_count"] += 1
+            elif category == "vegetable":
+                category_counts["vegetables_count"] += 1
+            elif category == "protein":
+                category_counts["protein_count"] += 1
+            elif category == "dairy":
+                category_counts["dairy_count"] += 1
+            elif category == "grain":
+                category_counts["grains_count"] += 1
+            
+            if log.get("calories"):
+                category_counts["total_calories"] += log["calories"]
+        
+        # Calculate completion percentage (each category = 20%)
+        completion = sum([
+            20 if category_counts["fruits_count"] > 0 else 0,
+            20 if category_counts["vegetables_count"] > 0 else 0,
+            20 if category_counts["protein_count"] > 0 else 0,
+            20 if category_counts["dairy_count"] > 0 else 0,
+            20 if category_counts["grains_count"] > 0 else 0,
+        ])
+        
+        return {
+            "user_id": user_id,
+            "date": summary_date.isoformat(),
+            **category_counts,
+            # Every log, including "other" and uncategorized ones
+            "log_count": len(logs),
+            "completion_percentage": completion,
+        }
 
 
 # Global service instance
@@ -1,7 +1,10 @@
 from typing import Dict, Optional, List
 from datetime import datetime, date
 from uuid import UUID
+import asyncio
 from services.supabase_client import get_supabase
+from utils.singleflight import SingleFlight
+from utils.dataloader import BatchLoader
 
 
 class GoalService:
@@ -9,6 +12,9 @@ class GoalService:
     
     def __init__(self):
         self.supabase = None
+        self._active_goal_flight = SingleFlight("goal.active_goal")
+        # Lookups from concurrent requests are sent as one in_("user_id", [...]) query
+        self._active_goal_loader = BatchLoader("user_goals", self._load_active_goals)
     
     def _get_supabase(self):
         """Lazy load Supabase client"""
@@ -47,6 +53,8 @@ class GoalService:
                 "is_active": True,
             }
             response = self._get_supabase().table("user_goals").insert(data).execute()
+            # A read already in flight may have seen the old goal; don't let later callers join it
+            self._active_goal_flight.forget(user_id)
             
             return response.data[0] if response.data else None
         except Exception as e:
@@ -64,15 +72,24 @@ class GoalService:
             Active goal data or None
         """
         try:
-            response = self._get_supabase().table("user_goals").select("*").eq(
-                "user_id", user_id
-            ).eq("is_active", True).order("created_at", desc=True).limit(1).execute()
-            
-            return response.data[0] if response.data else None
+            # Concurrent requests for the same user share one query
+            return await self._active_goal_flight.do(user_id, lambda: self._active_goal_loader.load(user_id))
         except Exception as e:
             print(f"Error fetching active goal: {e}")
             return None
     
+    async def _load_active_goals(self, user_ids: List[str]) -> Dict[str, Dict]:
+        """Batch function for the active goal loader: newest active goal per user"""
+        query = self._get_supabase().table("user_goals").select("*").in_(
+            "user_id", user_ids
+        ).eq("is_active", True).order("created_at", desc=True)
+        response = await asyncio.to_thread(query.execute)
+        
+        goals = {}
+        for row in response.data or []:
+            goals.setdefault(row["user_id"], row)
+        return goals
+    
     async def get_nutrition_recommendations(self, goal_type: str) -> Dict:
         """
         Get personalized nutrition recommendations based on goal type
@@ -272,6 +289,7 @@ class GoalService:
                     self._get_supabase().table("user_goals").update(
                         {"target_calories": target_calories}
                     ).eq("id", goal["id"]).execute()
+                    self._active_goal_flight.forget(user_id)
                 
                 return target_calories
             else:
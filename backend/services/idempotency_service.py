@@ -0,0 +1,161 @@
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+from collections import OrderedDict
+import asyncio
+import json
+import sqlite3
+import time
+from config.settings import settings
+from utils.exceptions import ValidationError
+
+
+class MemoryIdempotencyStore:
+    """Bounded in-process store of completed results, evicting least recently used"""
+
+    def __init__(self, max_entries: int = 10000, ttl_seconds: int = 86400):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[float, str, Dict]]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[Tuple[str, Dict]]:
+        """Return (fingerprint, result) for a completed key, or None"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        stored_at, fingerprint, result = entry
+        if time.time() - stored_at > self.ttl_seconds:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return fingerprint, result
+
+    def set(self, key: str, fingerprint: str, result: Dict) -> None:
+        """Record the result of a completed key"""
+        self._entries[key] = (time.time(), fingerprint, result)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+class SQLiteIdempotencyStore:
+    """Completed results kept in a local SQLite file, so they survive restarts"""
+
+    def __init__(self, path: str, max_entries: int = 10000, ttl_seconds: int = 86400):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS idempotency_keys ("
+            "key TEXT PRIMARY KEY, stored_at REAL NOT NULL, fingerprint TEXT NOT NULL, result TEXT NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[Tuple[str, Dict]]:
+        """Return (fingerprint, result) for a completed key, or None"""
+        row = self._conn.execute(
+            "SELECT stored_at, fingerprint, result FROM idempotency_keys WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None or time.time() - row[0] > self.ttl_seconds:
+            return None
+        return row[1], json.loads(row[2])
+
+    def set(self, key: str, fingerprint: str, result: Dict) -> None:
+        """Record the result of a completed key, pruning the oldest beyond the limit"""
+        self._conn.execute(
+            "INSERT OR REPLACE INTO idempotency_keys (key, stored_at, fingerprint, result) VALUES (?, ?, ?, ?)",
+            (key, time.time(), fingerprint, json.dumps(result)),
+        )
+        self._conn.execute(
+            "DELETE FROM idempotency_keys WHERE stored_at < ? OR key NOT IN "
+            "(SELECT key FROM idempotency_keys ORDER BY stored_at DESC LIMIT ?)",
+            (time.time() - self.ttl_seconds, self.max_entries),
+        )
+        self._conn.commit()
+
+
+class IdempotencyService:
+    """Service for de-duplicating retried requests by Idempotency-Key"""
+
+    def __init__(self, store=None):
+        self.store = store
+        self._in_flight: Dict[str, asyncio.Future] = {}
+
+    def _get_store(self):
+        """Lazy create the configured result store"""
+        if self.store is None:
+            if settings.IDEMPOTENCY_DB_PATH:
+                self.store = SQLiteIdempotencyStore(settings.IDEMPOTENCY_DB_PATH)
+            else:
+                self.store = MemoryIdempotencyStore()
+        return self.store
+
+    async def run(
+        self,
+        key: str,
+        fingerprint: str,
+        operation: Callable[[], Awaitable[Dict]],
+    ) -> Dict:
+        """
+        Run an operation at most once per idempotency key
+
+        A completed key returns its recorded result immediately. A key that is
+        still in flight makes the caller wait for the first attempt and share
+        its outcome. Failed attempts are not recorded, so they can be retried.
+
+        Args:
+            key: Idempotency key, already scoped to the caller
+            fingerprint: Digest of the request payload
+            operation: Coroutine factory producing a JSON-serializable result
+
+        Returns:
+            Result of the operation (original or recorded)
+
+        Raises:
+            ValidationError: If the key was used with a different payload
+        """
+        store = self._get_store()
+
+        while True:
+            completed = store.get(key)
+            if completed is not None:
+                self._check_fingerprint(completed[0], fingerprint)
+                return completed[1]
+
+            in_flight = self._in_flight.get(key)
+            if in_flight is None:
+                break
+            try:
+                stored_fingerprint, result = await asyncio.shield(in_flight)
+            except asyncio.CancelledError:
+                if in_flight.cancelled():
+                    # The first attempt was abandoned; take over
+                    continue
+                raise
+            self._check_fingerprint(stored_fingerprint, fingerprint)
+            return result
+
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        try:
+            result = await operation()
+            store.set(key, fingerprint, result)
+            future.set_result((fingerprint, result))
+            return result
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Mark retrieved so an attempt nobody waited on does not log a warning
+            future.exception()
+            raise
+        finally:
+            del self._in_flight[key]
+
+    def _check_fingerprint(self, stored: str, received: str) -> None:
+        """Reject reuse of a key for a different request"""
+        if stored != received:
+            raise ValidationError("Idempotency-Key was already used with a different request")
+
+
+# Global service instance
+idempotency_service = IdempotencyService()
@@ -0,0 +1,171 @@
+from typing import Dict, Iterator, Optional, Set
+from datetime import datetime, timedelta, timezone
+import asyncio
+import time
+from services.supabase_client import get_supabase
+from services.storage_service import storage_service
+from services.archive_service import archive_service
+from config.settings import settings
+
+
+IMAGE_URL_COLUMNS = ["image_url", "thumbnail_url", "medium_url"]
+
+
+class ImageGarbageCollector:
+    """Finds storage objects no food log references any more and removes them in batches"""
+
+    def __init__(self, page_size: int = 1000):
+        self.supabase = None
+        self.page_size = page_size
+        self._task: Optional[asyncio.Task] = None
+
+    def _get_supabase(self):
+        """Lazy load Supabase client"""
+        if self.supabase is None:
+            self.supabase = get_supabase()
+        return self.supabase
+
+    def _referenced_paths(self) -> Set[str]:
+        """Storage paths referenced by any food log, hot or archived"""
+        referenced: Set[str] = set()
+
+        last_id = None
+        while True:
+            query = self._get_supabase().table("food_logs").select("id," + ",".join(IMAGE_URL_COLUMNS))
+            if last_id:
+                query = query.gt("id", last_id)
+            rows = query.order("id").limit(self.page_size).execute().data or []
+            for row in rows:
+                referenced.update(storage_service._path_from_url(row[c]) for c in IMAGE_URL_COLUMNS if row.get(c))
+            if len(rows) < self.page_size:
+                break
+            last_id = rows[-1]["id"]
+
+        archived = archive_service.read_archived_table(columns=IMAGE_URL_COLUMNS)
+        if archived is not None:
+            for column in archived.column_names:
+                referenced.update(
+                    storage_service._path_from_url(url) for url in archived.column(column).to_pylist() if url
+                )
+
+        return referenced
+
+    def _blob_stem(self, path: str) -> str:
+        """Blob path without extension or derivative suffix (blobs/ab/<hash>[-<suffix>])"""
+        return path.rsplit(".", 1)[0].split("_")[0]
+
+    def _walk(self, prefix: str = "") -> Iterator[Dict]:
+        """Recursively list every object in the bucket"""
+        bucket = self._get_supabase().storage.from_(storage_service.bucket_name)
+        offset = 0
+        while True:
+            entries = bucket.list(prefix, {"limit": self.page_size, "offset": offset}) or []
+            for entry in entries:
+                path = f"{prefix}/{entry['name']}" if prefix else entry["name"]
+                if entry.get("id") is None:
+                    # Folders have no id
+                    yield from self._walk(path)
+                else:
+                    yield {**entry, "path": path}
+            if len(entries) < self.page_size:
+                break
+            offset += self.page_size
+
+    def collect(self, dry_run: bool = False, grace_hours: Optional[float] = None) -> Dict:
+        """
+        Remove storage objects that no food log references
+
+        Objects newer than the grace period are kept, since an upload may
+        still be on its way to inserting its food log. Derivatives are kept
+        as long as their original is referenced.
+
+        Args:
+            dry_run: Only report what would be removed
+            grace_hours: Minimum object age to collect (defaults to IMAGE_GC_GRACE_HOURS)
+
+        Returns:
+            Report with objects scanned, objects removed and duration
+        """
+        started = time.perf_counter()
+        if grace_hours is None:
+            grace_hours = settings.IMAGE_GC_GRACE_HOURS
+        cutoff = datetime.now(timezone.utc) - timedelta(hours=grace_hours)
+
+        referenced = self._referenced_paths()
+        blob_prefix = f"{storage_service.BLOB_PREFIX}/"
+        # An original and its derivatives share a stem (path without extension or derivative suffix)
+        referenced_stems = {self._blob_stem(p) for p in referenced if p.startswith(blob_prefix)}
+
+        scanned = 0
+        orphans = []
+        for obj in self._walk():
+            scanned += 1
+            path = obj["path"]
+            if path in referenced:
+                continue
+            if path.startswith(blob_prefix) and self._blob_stem(path) in referenced_stems:
+                continue
+            created_at = obj.get("created_at")
+            if created_at and datetime.fromisoformat(created_at.replace("Z", "+00:00")) > cutoff:
+                continue
+            orphans.append(path)
+
+        removed = []
+        if not dry_run and orphans:
+            # An upload may have referenced a blob again since the scan, so blob
+            # objects are only removed if their row was deleted unreferenced
+            # just now, or never existed
+            stems = sorted({self._blob_stem(p) for p in orphans if p.startswith(blob_prefix)})
+            live = set()
+            for i in range(0, len(stems), self.page_size):
+                response = self._get_supabase().rpc(
+                    "collect_image_blobs", {"p_stems": stems[i:i + self.page_size]}
+                ).execute()
+                live.update(row["stem"] for row in response.data or [] if not row.get("deleted"))
+            removed = [
+                p for p in orphans
+                if not p.startswith(blob_prefix) or self._blob_stem(p) not in live
+            ]
+
+            bucket = self._get_supabase().storage.from_(storage_service.bucket_name)
+            batch_size = storage_service.REMOVE_BATCH_SIZE
+            for i in range(0, len(removed), batch_size):
+                bucket.remove(removed[i:i + batch_size])
+
+        return {
+            "dry_run": dry_run,
+            "objects_scanned": scanned,
+            "objects_referenced": len(referenced),
+            "objects_removed": len(removed),
+            "orphans_found": len(orphans),
+            "duration_seconds": round(time.perf_counter() - started, 3),
+        }
+
+    async def start(self, interval_hours: float) -> None:
+        """Run the collector in the background every interval_hours"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(interval_hours))
+
+    async def stop(self) -> None:
+        """Stop the background collector"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self, interval_hours: float) -> None:
+        while True:
+            await asyncio.sleep(interval_hours * 3600)
+            try:
+                # Listing and removal are blocking calls; keep them off the event loop
+                report = await asyncio.to_thread(self.collect)
+                print(f"Image garbage collection: {report}")
+            except Exception as e:
+                print(f"Error collecting orphaned images: {e}")
+
+
+# Global collector instance (started at app startup when IMAGE_GC_INTERVAL_HOURS is set)
+image_gc = ImageGarbageCollector()
@@ -0,0 +1,145 @@
+from typing import Dict, Iterable, Iterator, List, Set, Tuple, IO
+from datetime import date
+import csv
+import io
+import json
+import time
+from pydantic import ValidationError as PydanticValidationError
+from services.food_service import food_service
+from services.nutrition_service import nutrition_service
+from schemas.food_schemas import FoodLogImportRow
+
+
+class ImportService:
+    """Service for bulk importing historical food logs from other trackers"""
+
+    def __init__(self, batch_size: int = 500, max_reported_errors: int = 100):
+        self.batch_size = batch_size
+        self.max_reported_errors = max_reported_errors
+
+    def parse_csv(self, stream: IO[bytes]) -> Iterator[Dict]:
+        """
+        Read import records from a CSV file with a header row
+
+        Args:
+            stream: Binary file object
+
+        Yields:
+            One dict per row, with empty cells as None
+        """
+        reader = csv.DictReader(io.TextIOWrapper(stream, encoding="utf-8-sig", newline=""))
+        for row in reader:
+            yield {k.strip(): (v if v != "" else None) for k, v in row.items() if k}
+
+    def parse_json(self, stream: IO[bytes]) -> Iterator[Dict]:
+        """
+        Read import records from a JSON array or newline-delimited JSON
+
+        Args:
+            stream: Binary file object
+
+        Yields:
+            One dict per record
+        """
+        text = io.TextIOWrapper(stream, encoding="utf-8-sig")
+        first = text.read(1)
+        while first and first.isspace():
+            first = text.read(1)
+
+        if first == "[":
+            yield from json.loads(first + text.read())
+            return
+
+        lines = iter(text)
+        pending = first
+        for line in lines:
+            line = (pending + line).strip()
+            pending = ""
+            if line:
+                yield json.loads(line)
+        if pending.strip():
+            yield json.loads(pending)
+
+    async def import_records(self, user_id: str, records: Iterable[Dict]) -> Dict:
+        """
+        Validate and insert historical food logs for a user
+
+        Rows are inserted in large batches without touching summaries; each
+        affected day's summary is then recomputed once and the streak once
+        at the end.
+
+        Args:
+            user_id: User's UUID
+            records: Raw records (parsed CSV/JSON rows)
+
+        Returns:
+            Import report with counts, rejected rows and throughput
+        """
+        started = time.perf_counter()
+        received = 0
+        imported = 0
+        rejected = 0
+        errors: List[Dict] = []
+        affected_days: Set = set()
+        batch: List[Tuple[int, Dict]] = []
+
+        def reject(row_number: int, error: str) -> None:
+            nonlocal rejected
+            rejected += 1
+            if len(errors) < self.max_reported_errors:
+                errors.append({"row": row_number, "error": error})
+
+        async def flush() -> None:
+            nonlocal imported
+            if not batch:
+                return
+            try:
+                created = await food_service.create_food_logs(
+                    [entry for _, entry in batch], update_summaries=False
+                )
+                imported += len(created)
+                # Days as stored, the same way create_food_logs derives them
+                for row in created:
+                    affected_days.add(str(row["logged_at"])[:10])
+            except Exception as e:
+                for row_number, _ in batch:
+                    reject(row_number, f"Insert failed: {e}")
+            batch.clear()
+
+        for row_number, record in enumerate(records, start=1):
+            received += 1
+            try:
+                row = FoodLogImportRow.model_validate(record)
+            except PydanticValidationError as e:
+                reject(row_number, "; ".join(
+                    f"{'.'.join(str(p) for p in err['loc'])}: {err['msg']}" for err in e.errors()
+                ))
+                continue
+
+            batch.append((row_number, {
+                "user_id": user_id,
+                **row.model_dump(mode="json"),
+            }))
+            if len(batch) >= self.batch_size:
+                await flush()
+        await flush()
+
+        for day in sorted(affected_days):
+            await food_service.update_daily_summary(user_id, date.fromisoformat(day), update_streak=False)
+        if affected_days:
+            await nutrition_service.recompute_streak(user_id)
+
+        duration = time.perf_counter() - started
+        return {
+            "received": received,
+            "imported": imported,
+            "rejected": rejected,
+            "errors": errors,
+            "affected_days": len(affected_days),
+            "duration_seconds": round(duration, 3),
+            "rows_per_second": round(imported / duration, 1) if duration > 0 else 0.0,
+        }
+
+
+# Global service instance
+import_service = ImportService()
@@ -0,0 +1,230 @@
+from typing import Dict, List, Optional, Tuple
+from datetime import date
+import asyncio
+from services.supabase_client import get_supabase
+from utils.ranking import RankedSet
+
+
+BOARDS = ["current", "longest"]
+
+
+class LeaderboardService:
+    """
+    Streak leaderboards kept in memory and updated as streaks change
+
+    Each board is a RankedSet of users by streak, loaded from user_streaks
+    at startup and then kept current by NutritionService saving streaks,
+    so top-N and "my rank" queries never sort the table. Only users with a
+    non-zero streak are ranked; a current streak counts only while today
+    is complete (the same rule as get_streak), so the current board is
+    emptied when the day changes.
+    """
+
+    def __init__(self, page_size: int = 1000):
+        self.supabase = None
+        self.page_size = page_size
+        self._boards: Dict[str, RankedSet] = {board: RankedSet() for board in BOARDS}
+        self._day = date.today()
+        self._loaded = False
+        # Streak changes made while a rebuild is loading, replayed onto its result
+        self._pending: Optional[Dict[str, Tuple[int, int, Optional[date]]]] = None
+        self._build_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    def _get_supabase(self):
+        """Lazy load Supabase client"""
+        if self.supabase is None:
+            self.supabase = get_supabase()
+        return self.supabase
+
+    # -- Maintenance ----------------------------------------------------------
+
+    def update(self, user_id: str, current: int, longest: int, last: Optional[date]) -> None:
+        """
+        Re-rank a user after their streak changed
+
+        Args:
+            user_id: User's UUID
+            current: Length of the user's most recent run of complete days
+            longest: User's longest run
+            last: Last day of the most recent run
+        """
+        self._roll_over()
+        if self._pending is not None:
+            self._pending[user_id] = (current, longest, last)
+        self._apply(self._boards, self._day, user_id, current, longest, last)
+
+    def _apply(
+        self,
+        boards: Dict[str, RankedSet],
+        today: date,
+        user_id: str,
+        current: int,
+        longest: int,
+        last: Optional[date],
+    ) -> None:
+        if current > 0 and last == today:
+            boards["current"].set(user_id, current)
+        else:
+            boards["current"].discard(user_id)
+        if longest > 0:
+            boards["longest"].set(user_id, longest)
+        else:
+            boards["longest"].discard(user_id)
+
+    def _roll_over(self) -> None:
+        """Drop yesterday's current streaks once the day changes"""
+        today = date.today()
+        if today != self._day:
+            self._boards["current"] = RankedSet()
+            self._day = today
+
+    def _load_boards(self, today: date) -> Tuple[Dict[str, RankedSet], int]:
+        """Build both boards from user_streaks, keyset paged by user_id"""
+        boards = {board: RankedSet() for board in BOARDS}
+        rows = 0
+        last_user = None
+        while True:
+            query = self._get_supabase().table("user_streaks").select(
+                "user_id,current_streak,longest_streak,last_logged_date"
+            ).or_("current_streak.gt.0,longest_streak.gt.0")
+            if last_user:
+                query = query.gt("user_id", last_user)
+            page = query.order("user_id").limit(self.page_size).execute().data or []
+            for row in page:
+                last = date.fromisoformat(row["last_logged_date"]) if row.get("last_logged_date") else None
+                self._apply(
+                    boards, today, row["user_id"],
+                    row.get("current_streak") or 0, row.get("longest_streak") or 0, last,
+                )
+            rows += len(page)
+            if len(page) < self.page_size:
+                break
+            last_user = page[-1]["user_id"]
+        return boards, rows
+
+    async def rebuild(self) -> Dict:
+        """
+        Reload both boards from user_streaks
+
+        Returns:
+            Dict with the number of rows loaded and users ranked per board
+        """
+        async with self._build_lock:
+            return await self._rebuild()
+
+    async def _rebuild(self) -> Dict:
+        today = date.today()
+        self._pending = {}
+        try:
+            boards, rows = await asyncio.to_thread(self._load_boards, today)
+            for user_id, (current, longest, last) in self._pending.items():
+                self._apply(boards, today, user_id, current, longest, last)
+        finally:
+            self._pending = None
+        self._boards = boards
+        self._day = today
+        self._loaded = True
+        self._roll_over()
+        return {"rows": rows, **{board: len(ranked) for board, ranked in boards.items()}}
+
+    async def ensure_loaded(self) -> None:
+        """Load the boards if no rebuild has completed yet (one load, shared by waiting requests)"""
+        if self._loaded:
+            return
+        async with self._build_lock:
+            if not self._loaded:
+                await self._rebuild()
+
+    async def start(self, interval_minutes: Optional[float] = None) -> None:
+        """Load the boards in the background, then reload every interval_minutes if given"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(interval_minutes))
+
+    async def stop(self) -> None:
+        """Stop background reloads"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self, interval_minutes: Optional[float]) -> None:
+        while True:
+            try:
+                await self.rebuild()
+            except Exception as e:
+                print(f"Error rebuilding streak leaderboard: {e}")
+            if not interval_minutes:
+                return
+            await asyncio.sleep(interval_minutes * 60)
+
+    # -- Queries --------------------------------------------------------------
+
+    async def top(self, board: str = "current", limit: int = 10) -> List[Dict]:
+        """
+        Highest streaks on a board
+
+        Args:
+            board: "current" or "longest"
+            limit: Number of entries
+
+        Returns:
+            Entries with rank, user_id and streak; equal streaks share a rank
+        """
+        ranked = await self._board(board)
+        return self._entries(ranked, 0, limit)
+
+    async def around(self, user_id: str, board: str = "current", k: int = 5) -> Dict:
+        """
+        A user's rank with the k entries above and below them
+
+        Args:
+            user_id: User's UUID
+            board: "current" or "longest"
+            k: Neighbours to include on each side
+
+        Returns:
+            Dict with the user's rank and streak (None and 0 if unranked) and entries
+        """
+        ranked = await self._board(board)
+        position = ranked.position(user_id)
+        if position is None:
+            return {"rank": None, "streak": 0, "entries": []}
+
+        streak = ranked.score(user_id)
+        return {
+            "rank": ranked.count_above(streak) + 1,
+            "streak": streak,
+            "entries": self._entries(ranked, position - k, position + k + 1),
+        }
+
+    async def size(self, board: str = "current") -> int:
+        """Number of users ranked on a board"""
+        return len(await self._board(board))
+
+    async def _board(self, board: str) -> RankedSet:
+        if board not in BOARDS:
+            raise ValueError(f"Unknown leaderboard '{board}', expected one of {BOARDS}")
+        await self.ensure_loaded()
+        self._roll_over()
+        return self._boards[board]
+
+    def _entries(self, ranked: RankedSet, start: int, stop: int) -> List[Dict]:
+        """Entries at positions start..stop-1 with competition ranks (1, 2, 2, 4)"""
+        start = max(start, 0)
+        entries = []
+        rank = 0
+        previous = None
+        for offset, (user_id, streak) in enumerate(ranked.slice(start, stop)):
+            if streak != previous:
+                rank = ranked.count_above(streak) + 1 if previous is None else start + offset + 1
+                previous = streak
+            entries.append({"rank": rank, "user_id": user_id, "streak": streak})
+        return entries
+
+
+# Global service instance
+leaderboard_service = LeaderboardService()
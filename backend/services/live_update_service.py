@@ -0,0 +1,158 @@
+from typing import AsyncIterator, Awaitable, Callable, Dict, Optional, Set
+from datetime import date
+import asyncio
+import json
+from services.nutrition_service import nutrition_service, SUMMARY_FIELDS
+from config.settings import settings
+
+
+class Subscription:
+    """One connected client's bounded queue of pending SSE messages"""
+
+    def __init__(self, user_id: str, max_queue: int):
+        self.user_id = user_id
+        self.queue: "asyncio.Queue[Optional[str]]" = asyncio.Queue(maxsize=max_queue)
+        self.evicted = False
+
+
+class LiveUpdateBroker:
+    """
+    In-process pub/sub of per-user dashboard updates for Server-Sent Events
+
+    FoodService publishes after it writes a user's summary; every open
+    stream for that user gets the message on its own bounded queue. A
+    client that stops reading until its queue is full is evicted rather
+    than allowed to hold memory. Only clients connected to this process
+    are reached.
+    """
+
+    def __init__(self):
+        self._subscribers: Dict[str, Set[Subscription]] = {}
+        self._stats = {"published": 0, "delivered": 0, "evicted": 0}
+
+    def has_subscribers(self, user_id: str) -> bool:
+        """Whether any stream is open for the user (skip building events otherwise)"""
+        return bool(self._subscribers.get(user_id))
+
+    def subscribe(self, user_id: str) -> Subscription:
+        """Register a new stream for the user"""
+        subscription = Subscription(user_id, settings.LIVE_UPDATES_QUEUE_SIZE)
+        self._subscribers.setdefault(user_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        """Remove a stream (on disconnect or eviction)"""
+        subscribers = self._subscribers.get(subscription.user_id)
+        if subscribers is not None:
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self._subscribers[subscription.user_id]
+
+    def publish(self, user_id: str, event: str, data: Dict) -> int:
+        """
+        Send an event to every stream open for the user
+
+        Args:
+            user_id: User's UUID
+            event: SSE event name
+            data: JSON-serializable payload
+
+        Returns:
+            Number of streams the event was queued for
+        """
+        subscribers = self._subscribers.get(user_id)
+        if not subscribers:
+            return 0
+
+        self._stats["published"] += 1
+        message = self.format_event(event, data)
+        delivered = 0
+        for subscription in list(subscribers):
+            try:
+                subscription.queue.put_nowait(message)
+                delivered += 1
+            except asyncio.QueueFull:
+                self._evict(subscription)
+        self._stats["delivered"] += delivered
+        return delivered
+
+    def publish_summary(self, user_id: str, summary: Optional[Dict], streak: Dict) -> int:
+        """Publish a user's updated summary, missing groups and streak"""
+        return self.publish(user_id, "summary", self.summary_event(summary, streak))
+
+    def summary_event(self, summary: Optional[Dict], streak: Dict) -> Dict:
+        """Payload of a summary event"""
+        return {
+            "date": (summary or {}).get("date") or date.today().isoformat(),
+            "summary": {field: (summary or {}).get(field) or 0 for field in SUMMARY_FIELDS},
+            "missing_groups": nutrition_service.missing_food_groups(summary),
+            "streak": streak,
+        }
+
+    def format_event(self, event: str, data: Dict) -> str:
+        """Encode one SSE message"""
+        return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+    def _evict(self, subscription: Subscription) -> None:
+        """Drop a slow consumer: discard its backlog and tell its stream to close"""
+        subscription.evicted = True
+        while not subscription.queue.empty():
+            subscription.queue.get_nowait()
+        subscription.queue.put_nowait(None)
+        self.unsubscribe(subscription)
+        self._stats["evicted"] += 1
+
+    async def stream(
+        self,
+        user_id: str,
+        snapshot: Optional[Callable[[], Awaitable[Dict]]] = None,
+    ) -> AsyncIterator[str]:
+        """
+        SSE body of one client's stream, with heartbeats while idle
+
+        The client is subscribed before the snapshot is read, so no update
+        between the two is lost, and unsubscribed when the stream ends or
+        the client disconnects.
+
+        Args:
+            user_id: User's UUID
+            snapshot: Optional loader of the current summary event, sent first
+
+        Yields:
+            SSE-formatted messages
+        """
+        subscription = self.subscribe(user_id)
+        try:
+            yield f"retry: {settings.LIVE_UPDATES_RETRY_MS}\n\n"
+            if snapshot is not None:
+                try:
+                    yield self.format_event("summary", await snapshot())
+                except Exception as e:
+                    print(f"Error loading live update snapshot: {e}")
+            while True:
+                try:
+                    message = await asyncio.wait_for(
+                        subscription.queue.get(), timeout=settings.LIVE_UPDATES_HEARTBEAT_SECONDS
+                    )
+                except asyncio.TimeoutError:
+                    # Comment line: keeps proxies from closing the idle connection
+                    yield ": heartbeat\n\n"
+                    continue
+                if message is None:
+                    yield self.format_event("evicted", {"reason": "client too slow, reconnect"})
+                    break
+                yield message
+        finally:
+            self.unsubscribe(subscription)
+
+    def stats(self) -> Dict:
+        """Open streams and message counters"""
+        return {
+            **self._stats,
+            "users": len(self._subscribers),
+            "subscribers": sum(len(s) for s in self._subscribers.values()),
+        }
+
+
+# Global broker instance
+live_updates = LiveUpdateBroker()
@@ -1,4 +1,5 @@
-from typing import Dict, Optional
+from typing import Dict, List, Optional, Union
+import asyncio
 import httpx
 from config.settings import settings
 
@@ -60,15 +61,7 @@ class MLService:
                 result = response.json()
                 
                 # Validate and normalize response from custom model
-                validated_result = {
-                    "food_name": result.get("food_name", "Unknown Food"),
-                    "category": self._validate_category(result.get("category", "other")),
-                    "healthiness_score": min(max(int(result.get("healthiness_score", 50)), 0), 100),
-                    "calories": int(result.get("calories", 100)) if result.get("calories") else 100,
-                    "confidence": min(max(float(result.get("confidence", 0.8)), 0.0), 1.0)
-                }
-                
-                return validated_result
+                return self._normalize_result(result)
         except httpx.TimeoutException:
             print("ML service timeout")
             raise
@@ -79,6 +72,69 @@ class MLService:
             print(f"ML service error: {e}")
             raise
     
+    async def analyze_food_images(self, images_base64: List[str]) -> List[Union[Dict, Exception]]:
+        """
+        Analyze several food images with a single ML service call
+        
+        If the batch call itself fails, each image is analyzed on its own
+        (as a single upload would be) rather than every image getting the
+        mock response. Images the ML service could not analyze (e.g. an
+        undecodable file) get an exception in place of their result.
+        
+        Args:
+            images_base64: Base64 encoded food images
+            
+        Returns:
+            One result dict (or exception) per image, in the same order
+        """
+        if not images_base64:
+            return []
+        
+        if not self.ml_service_url:
+            print("ML service URL not configured, using mock response")
+            return [self._get_mock_response() for _ in images_base64]
+        
+        try:
+            async with httpx.AsyncClient(timeout=self.timeout) as client:
+                response = await client.post(
+                    f"{self.ml_service_url}/analyze-batch",
+                    json={"images": images_base64}
+                )
+                response.raise_for_status()
+                body = response.json()
+                results = body.get("results", [])
+                errors = body.get("errors") or [None] * len(results)
+                
+                if len(results) != len(images_base64) or len(errors) != len(results):
+                    raise ValueError(f"Expected {len(images_base64)} results, got {len(results)}")
+                
+                return [
+                    self._normalize_result(result) if result is not None
+                    else ValueError(error or "Image could not be analyzed")
+                    for result, error in zip(results, errors)
+                ]
+        except Exception as e:
+            print(f"ML service batch error: {e}, analyzing images one by one")
+            return list(await asyncio.gather(*(self.analyze_food_image(image) for image in images_base64)))
+    
+    def _normalize_result(self, result: Dict) -> Dict:
+        """
+        Validate and normalize one result from the ML service
+        
+        Args:
+            result: Raw result from the ML service
+            
+        Returns:
+            Dict with food_name, category, healthiness_score, calories, confidence
+        """
+        return {
+            "food_name": result.get("food_name", "Unknown Food"),
+            "category": self._validate_category(result.get("category", "other")),
+            "healthiness_score": min(max(int(result.get("healthiness_score", 50)), 0), 100),
+            "calories": int(result.get("calories", 100)) if result.get("calories") else 100,
+            "confidence": min(max(float(result.get("confidence", 0.8)), 0.0), 1.0)
+        }
+    
     def _validate_category(self, category: str) -> str:
         """
         Validate and normalize food category
@@ -1,6 +1,20 @@
-from typing import Dict, List
+from typing import Dict, List, Optional, Tuple
 from datetime import date, timedelta
+import asyncio
 from services.supabase_client import get_supabase
+from services.goal_service import goal_service
+from services.leaderboard_service import leaderboard_service
+from config.settings import settings
+from utils.cache import ReadThroughCache
+from utils.singleflight import SingleFlight
+from utils.dataloader import BatchLoader
+
+
+# Summary columns shown to clients (dashboard and live updates)
+SUMMARY_FIELDS = [
+    "fruits_count", "vegetables_count", "protein_count", "dairy_count",
+    "grains_count", "total_calories", "completion_percentage",
+]
 
 
 class NutritionService:
@@ -8,6 +22,17 @@ class NutritionService:
     
     def __init__(self):
         self.supabase = None
+        # (user_id, date) -> daily_nutrition_summary row or None; invalidated by FoodService writes
+        self.summary_cache = ReadThroughCache(
+            max_entries=settings.SUMMARY_CACHE_SIZE,
+            ttl_seconds=settings.SUMMARY_CACHE_TTL_SECONDS,
+            stale_seconds=settings.SUMMARY_CACHE_STALE_SECONDS,
+        )
+        self._summary_flight = SingleFlight("nutrition.daily_summary")
+        self._streak_flight = SingleFlight("nutrition.streak")
+        # Lookups from concurrent requests are sent as one in_("user_id", [...]) query per table
+        self._summary_loader = BatchLoader("daily_nutrition_summary", self._load_summaries)
+        self._streak_loader = BatchLoader("user_streaks", self._load_streaks)
     
     def _get_supabase(self):
         """Lazy load Supabase client"""
@@ -15,6 +40,47 @@ class NutritionService:
             self.supabase = get_supabase()
         return self.supabase
     
+    async def get_daily_summary(self, user_id: str, summary_date: date) -> Optional[Dict]:
+        """
+        Get user's daily_nutrition_summary row for a date (read-through cached)
+        
+        Args:
+            user_id: User's UUID
+            summary_date: Date of the summary
+            
+        Returns:
+            Summary row, or None if nothing was logged that day
+        """
+        key = (user_id, summary_date.isoformat())
+        
+        # Concurrent cache misses for the same day (e.g. get_missing_food_groups
+        # from several requests) share one query, batched with other users'
+        return await self.summary_cache.get(
+            key, lambda: self._summary_flight.do(key, lambda: self._summary_loader.load(key))
+        )
+    
+    async def _load_summaries(self, keys: List[Tuple[str, str]]) -> Dict[Tuple[str, str], Dict]:
+        """Batch function for the summary loader: one query per distinct date"""
+        users_by_date: Dict[str, List[str]] = {}
+        for user_id, day in keys:
+            users_by_date.setdefault(day, []).append(user_id)
+        
+        results = {}
+        for day, user_ids in users_by_date.items():
+            query = self._get_supabase().table("daily_nutrition_summary").select("*").in_(
+                "user_id", user_ids
+            ).eq("date", day)
+            response = await asyncio.to_thread(query.execute)
+            for row in response.data or []:
+                results[(row["user_id"], day)] = row
+        return results
+    
+    def invalidate_daily_summary(self, user_id: str, summary_date: date) -> None:
+        """Drop a cached summary after it was written"""
+        key = (user_id, summary_date.isoformat())
+        self.summary_cache.invalidate(key)
+        self._summary_flight.forget(key)
+    
     async def get_missing_food_groups(self, user_id: str, target_date: date = None) -> List[str]:
         """
         Determine which food groups user is missing for a specific date
@@ -30,33 +96,92 @@ class NutritionService:
             target_date = date.today()
         
         try:
-            response = self._get_supabase().table("daily_nutrition_summary").select("*").eq("user_id", user_id).eq("date", target_date.isoformat()).execute()
-            
-            if not response.data:
-                return ["fruits", "vegetables", "protein", "dairy", "grains"]
-            
-            summary = response.data[0]
-            missing = []
-            
-            if summary.get("fruits_count", 0) == 0:
-                missing.append("fruits")
-            if summary.get("vegetables_count", 0) == 0:
-                missing.append("vegetables")
-            if summary.get("protein_count", 0) == 0:
-                missing.append("protein")
-            if summary.get("dairy_count", 0) == 0:
-                missing.append("dairy")
-            if summary.get("grains_count", 0) == 0:
-                missing.append("grains")
-            
-            return missing
+            summary = await self.get_daily_summary(user_id, target_date)
+            return self.missing_food_groups(summary)
         except Exception as e:
             print(f"Error getting missing food groups: {e}")
             return []
     
-    async def calculate_streak(self, user_id: str) -> Dict:
+    def missing_food_groups(self, summary: Optional[Dict]) -> List[str]:
         """
-        Calculate and update user's streak
+        Food groups with no logs in a daily summary
+        
+        Args:
+            summary: daily_nutrition_summary row, or None if nothing was logged
+            
+        Returns:
+            List of missing food group names
+        """
+        if not summary:
+            return ["fruits", "vegetables", "protein", "dairy", "grains"]
+        
+        missing = []
+        
+        if summary.get("fruits_count", 0) == 0:
+            missing.append("fruits")
+        if summary.get("vegetables_count", 0) == 0:
+            missing.append("vegetables")
+        if summary.get("protein_count", 0) == 0:
+            missing.append("protein")
+        if summary.get("dairy_count", 0) == 0:
+            missing.append("dairy")
+        if summary.get("grains_count", 0) == 0:
+            missing.append("grains")
+        
+        return missing
+    
+    async def get_weekly_summary(self, user_id: str, week_start: date) -> Dict:
+        """
+        Summarize a user's week from one range query over daily_nutrition_summary
+        
+        Days without a summary are filled with zeros, so averages are taken
+        over all seven days.
+        
+        Args:
+            user_id: User's UUID
+            week_start: First day of the week
+            
+        Returns:
+            Dict matching WeeklySummaryResponse
+        """
+        week_end = week_start + timedelta(days=6)
+        response = self._get_supabase().table("daily_nutrition_summary").select(
+            "date,fruits_count,vegetables_count,protein_count,dairy_count,grains_count,"
+            "total_calories,completion_percentage,log_count"
+        ).eq("user_id", user_id).gte("date", week_start.isoformat()).lte(
+            "date", week_end.isoformat()
+        ).order("date").execute()
+        
+        by_date = {row["date"]: row for row in response.data or []}
+        count_columns = ["fruits_count", "vegetables_count", "protein_count", "dairy_count", "grains_count"]
+        daily_summaries = []
+        for offset in range(7):
+            day = (week_start + timedelta(days=offset)).isoformat()
+            row = by_date.get(day, {})
+            daily_summaries.append({
+                "date": day,
+                **{column: row.get(column) or 0 for column in count_columns},
+                "total_calories": row.get("total_calories") or 0,
+                "completion_percentage": row.get("completion_percentage") or 0,
+                "log_count": row.get("log_count") or 0,
+            })
+        
+        return {
+            "week_start": week_start.isoformat(),
+            "week_end": week_end.isoformat(),
+            "daily_summaries": daily_summaries,
+            "average_completion": round(sum(d["completion_percentage"] for d in daily_summaries) / 7, 1),
+            "average_calories": round(sum(d["total_calories"] for d in daily_summaries) / 7, 1),
+            "total_logs": sum(d["log_count"] for d in daily_summaries),
+        }
+    
+    async def get_streak(self, user_id: str) -> Dict:
+        """
+        Get user's streak from their user_streaks row
+        
+        The row is kept up to date as days are completed, so this is a
+        single-row read. A streak only counts as current while today is
+        complete.
         
         Args:
             user_id: User's UUID
@@ -65,68 +190,158 @@ class NutritionService:
             Dict with current_streak and longest_streak
         """
         try:
-            # Get all daily summaries ordered by date
-            response = self._get_supabase().table("daily_nutrition_summary").select("*").eq("user_id", user_id).order("date", desc=True).execute()
-            
-            if not response.data:
-                return {"current_streak": 0, "longest_streak": 0}
-            
-            summaries = response.data
-            current_streak = 0
-            longest_streak = 0
-            temp_streak = 0
-            
-            # Calculate streaks (completion_percentage must be 100% to count)
-            expected_date = date.today()
-            
-            for summary in summaries:
-                summary_date = date.fromisoformat(summary["date"])
-                
-                # Check if this summary is for the expected date
-                if summary_date == expected_date and summary.get("completion_percentage", 0) == 100:
-                    temp_streak += 1
-                    expected_date = expected_date - timedelta(days=1)
-                else:
-                    break
-            
-            current_streak = temp_streak
+            streak = await self._streak_flight.do(user_id, lambda: self._streak_loader.load(user_id))
+            return self._streak_result(streak)
+        except Exception as e:
+            print(f"Error getting streak: {e}")
+            return {"current_streak": 0, "longest_streak": 0}
+    
+    def _streak_result(self, streak: Optional[Dict]) -> Dict:
+        """Current and longest streak as of today from a user_streaks row"""
+        if not streak:
+            return {"current_streak": 0, "longest_streak": 0}
+        
+        current = streak.get("current_streak") or 0
+        if streak.get("last_logged_date") != date.today().isoformat():
+            current = 0
+        
+        return {
+            "current_streak": current,
+            "longest_streak": streak.get("longest_streak") or 0,
+        }
+    
+    async def record_day_completion(
+        self,
+        user_id: str,
+        day: date,
+        complete: bool,
+        was_complete: Optional[bool] = None,
+        streak_row: Optional[Dict] = None,
+    ) -> Dict:
+        """
+        Update user's streak after a day's completion_percentage changed
+        
+        user_streaks stores the most recent run of complete days: it ends on
+        last_logged_date and is current_streak days long. Completing the day
+        after the run extends it, completing a later day starts a new one and
+        un-completing a day inside it shortens it, all from that one row.
+        Changes that could alter an older run (e.g. backfilled days) fall back
+        to recompute_streak.
+        
+        Args:
+            user_id: User's UUID
+            day: Day whose summary changed
+            complete: Whether the day is now at 100% completion
+            was_complete: Whether it was before, if known
+            streak_row: User's user_streaks row if the caller already has it
+                ({} for none), saving the read
             
-            # Calculate longest streak
-            temp_streak = 0
-            prev_date = None
+        Returns:
+            Dict with current_streak and longest_streak
+        """
+        try:
+            streak = streak_row if streak_row is not None else (self._get_streak_row(user_id) or {})
+            current = streak.get("current_streak") or 0
+            longest = streak.get("longest_streak") or 0
+            last = date.fromisoformat(streak["last_logged_date"]) if streak.get("last_logged_date") else None
+            run_start = last - timedelta(days=current - 1) if last and current > 0 else None
             
-            for summary in summaries:
-                summary_date = date.fromisoformat(summary["date"])
-                
-                if summary.get("completion_percentage", 0) == 100:
-                    if prev_date is None or (prev_date - summary_date).days == 1:
-                        temp_streak += 1
-                        longest_streak = max(longest_streak, temp_streak)
-                    else:
-                        temp_streak = 1
+            if run_start and run_start <= day <= last:
+                if complete:
+                    return self._streak_result(streak)
+                if current == longest or current == 1:
+                    # The run may have been the longest one, or the previous run becomes the latest
+                    return await self.recompute_streak(user_id)
+                if day == last:
+                    current, last = current - 1, day - timedelta(days=1)
                 else:
-                    temp_streak = 0
-                
-                prev_date = summary_date
+                    current = (last - day).days
+            elif last is None or day > last:
+                if not complete:
+                    return self._streak_result(streak)
+                current = current + 1 if run_start and day == last + timedelta(days=1) else 1
+                last = day
+                longest = max(longest, current)
+            else:
+                # Before the current run: only safe to ignore if nothing changed
+                if was_complete is not None and was_complete == complete:
+                    return self._streak_result(streak)
+                return await self.recompute_streak(user_id)
             
-            # Update or create streak record
-            streak_data = {
-                "user_id": user_id,
-                "current_streak": current_streak,
-                "longest_streak": max(longest_streak, current_streak),
-                "last_logged_date": date.today().isoformat(),
-            }
+            return self._save_streak(user_id, current, longest, last)
+        except Exception as e:
+            print(f"Error updating streak: {e}")
+            return {"current_streak": 0, "longest_streak": 0}
+    
+    async def recompute_streak(self, user_id: str) -> Dict:
+        """
+        Recompute user's streak from their full summary history (repair)
+        
+        Args:
+            user_id: User's UUID
             
-            self._get_supabase().table("user_streaks").upsert(streak_data).execute()
+        Returns:
+            Dict with current_streak and longest_streak
+        """
+        try:
+            response = self._get_supabase().table("daily_nutrition_summary").select("date").eq(
+                "user_id", user_id
+            ).eq("completion_percentage", 100).order("date").execute()
             
-            return {
-                "current_streak": current_streak,
-                "longest_streak": max(longest_streak, current_streak),
-            }
+            days = [date.fromisoformat(row["date"]) for row in response.data or []]
+            current, longest, last = self.streak_from_days(days)
+            return self._save_streak(user_id, current, longest, last)
         except Exception as e:
             print(f"Error calculating streak: {e}")
             return {"current_streak": 0, "longest_streak": 0}
     
+    def streak_from_days(self, days: List[date]) -> Tuple[int, int, Optional[date]]:
+        """
+        Streak state from a user's complete days
+        
+        Args:
+            days: Days at 100% completion, in ascending order
+            
+        Returns:
+            (length of the most recent run, longest run, last complete day)
+        """
+        current = 0
+        longest = 0
+        prev = None
+        for day in days:
+            current = current + 1 if prev and (day - prev).days == 1 else 1
+            longest = max(longest, current)
+            prev = day
+        return current, longest, prev
+    
+    def _get_streak_row(self, user_id: str) -> Optional[Dict]:
+        """User's user_streaks row, or None"""
+        response = self._get_supabase().table("user_streaks").select(
+            "current_streak,longest_streak,last_logged_date"
+        ).eq("user_id", user_id).limit(1).execute()
+        return response.data[0] if response.data else None
+    
+    async def _load_streaks(self, user_ids: List[str]) -> Dict[str, Dict]:
+        """Batch function for the streak loader"""
+        query = self._get_supabase().table("user_streaks").select(
+            "user_id,current_streak,longest_streak,last_logged_date"
+        ).in_("user_id", user_ids)
+        response = await asyncio.to_thread(query.execute)
+        return {row["user_id"]: row for row in response.data or []}
+    
+    def _save_streak(self, user_id: str, current: int, longest: int, last: Optional[date]) -> Dict:
+        """Write user's streak state and return it as of today"""
+        streak = {
+            "user_id": user_id,
+            "current_streak": current,
+            "longest_streak": longest,
+            "last_logged_date": last.isoformat() if last else None,
+        }
+        self._get_supabase().table("user_streaks").upsert(streak, on_conflict="user_id").execute()
+        self._streak_flight.forget(user_id)
+        leaderboard_service.update(user_id, current, longest, last)
+        return self._streak_result(streak)
+    
     async def get_personalized_recommendations(self, user_id: str) -> Dict:
         """
         Generate personalized nutrition recommendations based on user's goal
@@ -139,46 +354,56 @@ class NutritionService:
         """
         try:
             # Get user's active goal
-            goal_response = self._get_supabase().table("user_goals").select("*").eq("user_id", user_id).eq("is_active", True).execute()
-            
-            if not goal_response.data:
-                return self._get_default_recommendations()
-            
-            goal = goal_response.data[0]
-            goal_type = goal.get("goal_type")
-            
-            recommendations = {
-                "maintain": {
-                    "title": "Maintain Healthy Weight",
-                    "daily_calories": "2000-2500",
-                    "focus": ["Balanced meals from all food groups", "Regular portions", "Stay hydrated"],
-                    "tips": "Aim for variety in your diet to ensure you're getting all nutrients."
-                },
-                "lose_weight": {
-                    "title": "Weight Loss",
-                    "daily_calories": "1500-2000",
-                    "focus": ["High protein foods", "More vegetables and fruits", "Low-calorie options", "Smaller portions"],
-                    "tips": "Focus on lean proteins and vegetables to feel full while reducing calories."
-                },
-                "gain_weight": {
-                    "title": "Weight Gain",
-                    "daily_calories": "2500-3000",
-                    "focus": ["Protein-rich foods", "Healthy fats", "Whole grains", "Larger portions"],
-                    "tips": "Eat calorie-dense, nutritious foods and consider adding healthy snacks between meals."
-                },
-                "diabetes_management": {
-                    "title": "Diabetes Management",
-                    "daily_calories": "1800-2200",
-                    "focus": ["Low glycemic index foods", "High fiber", "Lean proteins", "Limited simple carbs"],
-                    "tips": "Monitor carbohydrate intake and pair carbs with protein to manage blood sugar levels."
-                }
-            }
-            
-            return recommendations.get(goal_type, self._get_default_recommendations())
+            goal = await goal_service.get_active_goal(user_id)
+            return self.recommendations_for_goal(goal)
         except Exception as e:
             print(f"Error getting recommendations: {e}")
             return self._get_default_recommendations()
     
+    def recommendations_for_goal(self, goal: Optional[Dict]) -> Dict:
+        """
+        Nutrition recommendations for a user_goals row
+        
+        Args:
+            goal: Active goal, or None
+            
+        Returns:
+            Dict with recommendations
+        """
+        if not goal:
+            return self._get_default_recommendations()
+        
+        goal_type = goal.get("goal_type")
+        
+        recommendations = {
+            "maintain": {
+                "title": "Maintain Healthy Weight",
+                "daily_calories": "2000-2500",
+                "focus": ["Balanced meals from all food groups", "Regular portions", "Stay hydrated"],
+                "tips": "Aim for variety in your diet to ensure you're getting all nutrients."
+            },
+            "lose_weight": {
+                "title": "Weight Loss",
+                "daily_calories": "1500-2000",
+                "focus": ["High protein foods", "More vegetables and fruits", "Low-calorie options", "Smaller portions"],
+                "tips": "Focus on lean proteins and vegetables to feel full while reducing calories."
+            },
+            "gain_weight": {
+                "title": "Weight Gain",
+                "daily_calories": "2500-3000",
+                "focus": ["Protein-rich foods", "Healthy fats", "Whole grains", "Larger portions"],
+                "tips": "Eat calorie-dense, nutritious foods and consider adding healthy snacks between meals."
+            },
+            "diabetes_management": {
+                "title": "Diabetes Management",
+                "daily_calories": "1800-2200",
+                "focus": ["Low glycemic index foods", "High fiber", "Lean proteins", "Limited simple carbs"],
+                "tips": "Monitor carbohydrate intake and pair carbs with protein to manage blood sugar levels."
+            }
+        }
+        
+        return recommendations.get(goal_type, self._get_default_recommendations())
+    
     def _get_default_recommendations(self) -> Dict:
         """Return default recommendations"""
         return {
@@ -0,0 +1,380 @@
+from typing import Dict, List, Optional, Tuple
+from datetime import date, datetime, timedelta, timezone
+import asyncio
+import time
+import numpy as np
+from services.supabase_client import get_supabase
+from services.archive_service import archive_service
+from services.analytics_service import FOOD_GROUP_COLUMNS
+from models.food_log import FoodCategory, MealType
+from config.settings import settings
+
+
+# Dictionary codes for the categorical columns; the last entry holds missing/unknown values
+CATEGORIES = [c.value for c in FoodCategory] + ["unknown"]
+MEAL_TYPES = [m.value for m in MealType] + ["unknown"]
+WEEKDAYS = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+
+# Dimensions and metrics the aggregate query accepts, per table
+GROUP_BY = {
+    "food_logs": ["weekday", "month", "meal_type", "food_category"],
+    "daily_summaries": ["weekday", "month", "completion_percentage"],
+}
+METRICS = {
+    "food_logs": ["healthiness_score", "calories"],
+    "daily_summaries": ["completion_percentage", "total_calories", *FOOD_GROUP_COLUMNS.values()],
+}
+
+
+def _encode(values: List[Optional[str]], vocabulary: List[str]) -> np.ndarray:
+    """Dictionary-encode strings, mapping unknown values to the last code"""
+    codes = {value: i for i, value in enumerate(vocabulary)}
+    unknown = len(vocabulary) - 1
+    return np.array([codes.get(v, unknown) for v in values], dtype=np.int8)
+
+
+def _days(values: List[Optional[str]]) -> np.ndarray:
+    """ISO dates/timestamps as datetime64[D] (UTC day)"""
+    return np.array([str(v)[:10] for v in values], dtype="datetime64[D]")
+
+
+def _numbers(values: List[Optional[float]]) -> np.ndarray:
+    """Numbers as float64 with NaN for missing values"""
+    return np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+
+
+class PopulationAnalyticsService:
+    """
+    Cross-user analytics answered from an in-process columnar snapshot
+
+    food_logs (hot and archived) and daily_nutrition_summary are copied into
+    NumPy column arrays. Requests only read the snapshot; the production
+    tables are touched by refresh(), which appends new logs and reloads
+    recent summaries, with a periodic full rebuild to pick up deletes.
+    """
+
+    # Summary days reloaded by an incremental refresh (older days rarely change)
+    SUMMARY_REFRESH_DAYS = 2
+
+    def __init__(self, page_size: int = 1000):
+        self.supabase = None
+        self.page_size = page_size
+        self._logs: Dict[str, np.ndarray] = {}
+        self._summaries: Dict[str, np.ndarray] = {}
+        self._watermark: Optional[Tuple[str, str]] = None  # (created_at, id) of the newest log loaded
+        self._snapshot_at: Optional[datetime] = None
+        self._full_at: Optional[datetime] = None
+        self._build_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._refresh_task: Optional[asyncio.Task] = None
+
+    def _get_supabase(self):
+        """Lazy load Supabase client"""
+        if self.supabase is None:
+            self.supabase = get_supabase()
+        return self.supabase
+
+    # -- Snapshot maintenance -------------------------------------------------
+
+    def refresh(self, full: bool = False) -> Dict:
+        """
+        Bring the snapshot up to date
+
+        Args:
+            full: Rebuild from scratch instead of applying changes since the
+                last refresh (done automatically every POPULATION_FULL_REFRESH_HOURS)
+
+        Returns:
+            Report with the refresh kind, rows loaded and duration
+        """
+        started = time.perf_counter()
+        now = datetime.now(timezone.utc)
+        if self._full_at is None or now - self._full_at >= timedelta(hours=settings.POPULATION_FULL_REFRESH_HOURS):
+            full = True
+
+        if full:
+            archived = archive_service.read_archived_table(
+                columns=["logged_at", "food_category", "meal_type", "healthiness_score", "calories"]
+            )
+            rows, watermark = self._fetch_logs(None)
+            logs = self._concat(self._archived_columns(archived), self._log_columns(rows))
+            summary_rows = self._fetch_summaries(None)
+            summaries = self._summary_columns(summary_rows)
+            self._full_at = now
+        else:
+            rows, watermark = self._fetch_logs(self._watermark)
+            logs = self._concat(self._logs, self._log_columns(rows))
+            since = date.today() - timedelta(days=self.SUMMARY_REFRESH_DAYS)
+            summary_rows = self._fetch_summaries(since)
+            keep = self._summaries["date"] < np.datetime64(since.isoformat()) if self._summaries else None
+            kept = {name: column[keep] for name, column in self._summaries.items()} if keep is not None else {}
+            summaries = self._concat(kept, self._summary_columns(summary_rows))
+
+        # Swap whole snapshots so concurrent readers never see a half-applied refresh
+        self._logs, self._summaries = logs, summaries
+        self._watermark = watermark or self._watermark
+        self._snapshot_at = now
+
+        return {
+            "full": full,
+            "logs_loaded": len(rows),
+            "summaries_loaded": len(summary_rows),
+            "logs_total": self._row_count(self._logs),
+            "summaries_total": self._row_count(self._summaries),
+            "duration_seconds": round(time.perf_counter() - started, 3),
+        }
+
+    def _fetch_logs(self, after: Optional[Tuple[str, str]]) -> Tuple[List[Dict], Optional[Tuple[str, str]]]:
+        """Food logs created after the (created_at, id) watermark, oldest first"""
+        rows: List[Dict] = []
+        while True:
+            query = self._get_supabase().table("food_logs").select(
+                "id,created_at,logged_at,food_category,meal_type,healthiness_score,calories"
+            )
+            if after:
+                created_at, log_id = after
+                query = query.or_(f'created_at.gt."{created_at}",and(created_at.eq."{created_at}",id.gt.{log_id})')
+            page = query.order("created_at").order("id").limit(self.page_size).execute().data or []
+            rows.extend(page)
+            if len(page) < self.page_size:
+                break
+            after = (page[-1]["created_at"], page[-1]["id"])
+        watermark = (rows[-1]["created_at"], rows[-1]["id"]) if rows else after
+        return rows, watermark
+
+    def _fetch_summaries(self, since: Optional[date]) -> List[Dict]:
+        """Daily summaries (optionally from a date on), keyset ordered by (date, user_id)"""
+        rows: List[Dict] = []
+        last = None
+        while True:
+            query = self._get_supabase().table("daily_nutrition_summary").select(
+                "user_id,date,total_calories,completion_percentage," + ",".join(FOOD_GROUP_COLUMNS.values())
+            )
+            if since:
+                query = query.gte("date", since.isoformat())
+            if last:
+                query = query.or_(f"date.gt.{last['date']},and(date.eq.{last['date']},user_id.gt.{last['user_id']})")
+            page = query.order("date").order("user_id").limit(self.page_size).execute().data or []
+            rows.extend(page)
+            if len(page) < self.page_size:
+                break
+            last = page[-1]
+        return rows
+
+    def _log_columns(self, rows: List[Dict]) -> Dict[str, np.ndarray]:
+        return {
+            "day": _days([r["logged_at"] for r in rows]),
+            "food_category": _encode([r.get("food_category") for r in rows], CATEGORIES),
+            "meal_type": _encode([r.get("meal_type") for r in rows], MEAL_TYPES),
+            "healthiness_score": _numbers([r.get("healthiness_score") for r in rows]),
+            "calories": _numbers([r.get("calories") for r in rows]),
+        }
+
+    def _archived_columns(self, table) -> Dict[str, np.ndarray]:
+        if table is None or table.num_rows == 0:
+            return {}
+        return {
+            "day": table.column("logged_at").to_numpy().astype("datetime64[D]"),
+            "food_category": _encode(table.column("food_category").to_pylist(), CATEGORIES),
+            "meal_type": _encode(table.column("meal_type").to_pylist(), MEAL_TYPES),
+            "healthiness_score": _numbers(table.column("healthiness_score").to_pylist()),
+            "calories": _numbers(table.column("calories").to_pylist()),
+        }
+
+    def _summary_columns(self, rows: List[Dict]) -> Dict[str, np.ndarray]:
+        columns = {
+            "date": _days([r["date"] for r in rows]),
+            "completion_percentage": np.array([r.get("completion_percentage") or 0 for r in rows], dtype=np.int16),
+            "total_calories": np.array([r.get("total_calories") or 0 for r in rows], dtype=np.float64),
+        }
+        for column in FOOD_GROUP_COLUMNS.values():
+            columns[column] = np.array([r.get(column) or 0 for r in rows], dtype=np.int32)
+        return columns
+
+    def _concat(self, left: Dict[str, np.ndarray], right: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+        if not left:
+            return right
+        return {name: np.concatenate([left[name], right[name]]) for name in right}
+
+    def _row_count(self, columns: Dict[str, np.ndarray]) -> int:
+        return len(next(iter(columns.values()))) if columns else 0
+
+    async def ensure_snapshot(self) -> None:
+        """
+        Build the first snapshot if none exists yet (one build, shared by waiting requests)
+
+        A snapshot older than POPULATION_SNAPSHOT_MAX_AGE_MINUTES is still
+        served, while an incremental refresh runs in the background.
+        """
+        if self._snapshot_at is None:
+            async with self._build_lock:
+                if self._snapshot_at is None:
+                    await asyncio.to_thread(self.refresh, True)
+            return
+
+        if self._is_stale() and (self._refresh_task is None or self._refresh_task.done()):
+            self._refresh_task = asyncio.create_task(self._refresh_stale())
+
+    def _is_stale(self) -> bool:
+        max_age = timedelta(minutes=settings.POPULATION_SNAPSHOT_MAX_AGE_MINUTES)
+        return self._snapshot_at is None or datetime.now(timezone.utc) - self._snapshot_at >= max_age
+
+    async def _refresh_stale(self) -> None:
+        try:
+            async with self._build_lock:
+                if self._is_stale():
+                    await asyncio.to_thread(self.refresh)
+        except Exception as e:
+            print(f"Error refreshing population snapshot: {e}")
+
+    async def start(self, interval_minutes: float) -> None:
+        """Refresh the snapshot in the background every interval_minutes"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(interval_minutes))
+
+    async def stop(self) -> None:
+        """Stop background refreshes"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self, interval_minutes: float) -> None:
+        while True:
+            try:
+                async with self._build_lock:
+                    await asyncio.to_thread(self.refresh)
+            except Exception as e:
+                print(f"Error refreshing population snapshot: {e}")
+            await asyncio.sleep(interval_minutes * 60)
+
+    # -- Queries --------------------------------------------------------------
+
+    async def aggregate(
+        self,
+        table: str,
+        group_by: str,
+        metric: Optional[str] = None,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+    ) -> Dict:
+        """
+        Group the snapshot by one dimension and aggregate a metric
+
+        Args:
+            table: "food_logs" or "daily_summaries"
+            group_by: Dimension from GROUP_BY[table]
+            metric: Optional metric from METRICS[table] (mean/sum/min/max per group)
+            start_date: Optional first day to include
+            end_date: Optional last day to include
+
+        Returns:
+            Dict with snapshot_at and one row per group (count plus metric stats)
+
+        Raises:
+            ValueError: If the table, dimension or metric is not supported
+        """
+        if table not in GROUP_BY:
+            raise ValueError(f"Unknown table '{table}' (expected one of {', '.join(GROUP_BY)})")
+        if group_by not in GROUP_BY[table]:
+            raise ValueError(f"Cannot group {table} by '{group_by}' (expected one of {', '.join(GROUP_BY[table])})")
+        if metric is not None and metric not in METRICS[table]:
+            raise ValueError(f"Unknown metric '{metric}' for {table} (expected one of {', '.join(METRICS[table])})")
+
+        await self.ensure_snapshot()
+        columns = self._logs if table == "food_logs" else self._summaries
+        day_column = "day" if table == "food_logs" else "date"
+        if not columns:
+            return {"snapshot_at": self._snapshot_at.isoformat(), "groups": []}
+
+        days = columns[day_column]
+        mask = np.ones(len(days), dtype=bool)
+        if start_date:
+            mask &= days >= np.datetime64(start_date.isoformat())
+        if end_date:
+            mask &= days <= np.datetime64(end_date.isoformat())
+
+        keys, labels = self._group_keys(columns, day_column, group_by)
+        keys = keys[mask]
+        counts = np.bincount(keys, minlength=len(labels))
+
+        if metric is not None:
+            values = columns[metric][mask].astype(np.float64)
+            valid = ~np.isnan(values)
+            filled = np.where(valid, values, 0.0)
+            valid_counts = np.bincount(keys, weights=valid, minlength=len(labels))
+            sums = np.bincount(keys, weights=filled, minlength=len(labels))
+            means = np.divide(sums, valid_counts, out=np.full(len(labels), np.nan), where=valid_counts > 0)
+            mins = np.full(len(labels), np.inf)
+            maxs = np.full(len(labels), -np.inf)
+            np.minimum.at(mins, keys[valid], values[valid])
+            np.maximum.at(maxs, keys[valid], values[valid])
+
+        groups = []
+        for i, label in enumerate(labels):
+            if counts[i] == 0:
+                continue
+            group = {"group": label, "count": int(counts[i])}
+            if metric is not None:
+                has_values = valid_counts[i] > 0
+                group.update({
+                    "mean": round(float(means[i]), 2) if has_values else None,
+                    "sum": float(sums[i]),
+                    "min": float(mins[i]) if has_values else None,
+                    "max": float(maxs[i]) if has_values else None,
+                })
+            groups.append(group)
+
+        return {"snapshot_at": self._snapshot_at.isoformat(), "groups": groups}
+
+    def _group_keys(self, columns: Dict[str, np.ndarray], day_column: str, group_by: str) -> Tuple[np.ndarray, List[str]]:
+        """Integer group key per row and the label of each key"""
+        if group_by == "weekday":
+            # 1970-01-01 was a Thursday
+            return (columns[day_column].astype(np.int64) + 3) % 7, WEEKDAYS
+        if group_by == "month":
+            months = columns[day_column].astype("datetime64[M]")
+            unique, keys = np.unique(months, return_inverse=True)
+            return keys.astype(np.int64), [str(m) for m in unique]
+        if group_by == "meal_type":
+            return columns["meal_type"].astype(np.int64), MEAL_TYPES
+        if group_by == "food_category":
+            return columns["food_category"].astype(np.int64), CATEGORIES
+        # completion_percentage moves in steps of 20
+        return columns["completion_percentage"].astype(np.int64) // 20, [str(p) for p in range(0, 101, 20)]
+
+    async def coverage_by_weekday(self, start_date: Optional[date] = None, end_date: Optional[date] = None) -> Dict:
+        """
+        Share of logged user-days that covered each food group, by weekday
+
+        Returns:
+            Dict with snapshot_at and one row per weekday
+        """
+        await self.ensure_snapshot()
+        groups = {label: {"weekday": label, "days": 0} for label in WEEKDAYS}
+        columns = self._summaries
+        if columns:
+            days = columns["date"]
+            mask = np.ones(len(days), dtype=bool)
+            if start_date:
+                mask &= days >= np.datetime64(start_date.isoformat())
+            if end_date:
+                mask &= days <= np.datetime64(end_date.isoformat())
+            keys = ((days.astype(np.int64) + 3) % 7)[mask]
+            totals = np.bincount(keys, minlength=7)
+            for group, column in FOOD_GROUP_COLUMNS.items():
+                covered = np.bincount(keys, weights=columns[column][mask] > 0, minlength=7)
+                rates = np.divide(covered, totals, out=np.zeros(7), where=totals > 0)
+                for i, label in enumerate(WEEKDAYS):
+                    groups[label][group] = round(float(rates[i]), 3)
+            for i, label in enumerate(WEEKDAYS):
+                groups[label]["days"] = int(totals[i])
+
+        return {"snapshot_at": self._snapshot_at.isoformat(), "groups": list(groups.values())}
+
+
+# Global service instance (refreshed in the background when POPULATION_SNAPSHOT_INTERVAL_MINUTES is set)
+population_analytics = PopulationAnalyticsService()
@@ -1,17 +1,36 @@
-from typing import Optional
-import base64
-from datetime import datetime
-import uuid
+from typing import Dict, List, Optional, Tuple
+from collections import OrderedDict
+import asyncio
+import time
 from services.supabase_client import get_supabase
 from config.settings import settings
+from utils.images import DERIVATIVE_SPECS, render_derivatives
 
 
 class StorageService:
     """Service for handling image uploads to Supabase Storage"""
     
+    # Folder holding content-addressed images, named by their SHA-256
+    BLOB_PREFIX = "blobs"
+    
+    # Objects per storage remove() request
+    REMOVE_BATCH_SIZE = 100
+    
+    # Paths per create_signed_urls() request
+    SIGN_BATCH_SIZE = 100
+    
+    # Cached signed URLs are dropped this long before they actually expire
+    SIGNED_URL_EXPIRY_MARGIN = 300
+    
+    # Food log columns holding image URLs
+    IMAGE_URL_FIELDS = ("image_url", "thumbnail_url", "medium_url")
+    
     def __init__(self):
         self.supabase = None
         self.bucket_name = settings.STORAGE_BUCKET_NAME
+        # (path, expires_in) -> (signed URL, monotonic time it stops being served)
+        self._signed_urls: "OrderedDict[Tuple[str, int], Tuple[str, float]]" = OrderedDict()
+        self._public_url_prefix: Optional[str] = None
     
     def _get_supabase(self):
         """Lazy load Supabase client"""
@@ -19,46 +38,121 @@ class StorageService:
             self.supabase = get_supabase()
         return self.supabase
     
-    async def upload_food_image(self, user_id: Optional[str], image_data: bytes, file_extension: str = "jpg") -> str:
+    def image_blob_fields(self, content_hash: str, file_extension: str, size_bytes: int) -> Dict:
         """
-        Upload food image to Supabase Storage
+        Fields that make insert_food_logs reference a content-addressed image
+        
+        Merged into a food log entry in place of its image URLs: the database
+        takes the blob reference in the same transaction as the insert and
+        fills in the URLs from the blob's path.
         
         Args:
-            user_id: User's UUID (optional, None for anonymous users)
-            image_data: Image file bytes
+            content_hash: SHA-256 hex digest of the image
             file_extension: File extension (jpg, png, etc)
+            size_bytes: Image size in bytes
+            
+        Returns:
+            Dict to merge into the food log entry
+        """
+        return {"content_hash": content_hash, "file_extension": file_extension, "size_bytes": size_bytes}
+    
+    def public_url_prefix(self) -> str:
+        """Public URL of the bucket root; object URLs are this plus their path"""
+        if self._public_url_prefix is None:
+            marker = "__path__"
+            url = self._get_supabase().storage.from_(self.bucket_name).get_public_url(marker)
+            self._public_url_prefix = url.split(marker)[0]
+        return self._public_url_prefix
+    
+    async def store_food_image(
+        self,
+        blob_path: str,
+        image_data: bytes,
+        upload_needed: bool,
+        content_type: Optional[str] = None,
+    ) -> Dict[str, str]:
+        """
+        Upload the objects of an image blob a new food log references
+        
+        Images are content-addressed: insert_food_logs gives each blob a
+        path when its first reference is taken, and a blob referenced again
+        later keeps that path, so identical images skip the storage write.
+        A blob whose last reference was released gets a fresh path the next
+        time it is referenced, so objects still queued for removal are
+        never reused.
+        
+        Args:
+            blob_path: Path insert_food_logs assigned to the blob
+            image_data: Image file bytes
+            upload_needed: True when the reference created the blob
+            content_type: MIME type of the image (defaults to image/<extension>)
             
         Returns:
-            Public URL of uploaded image
+            Dict with thumbnail_url and medium_url (empty if rendering failed)
         """
         try:
-            # Generate unique filename
-            timestamp = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
-            unique_id = str(uuid.uuid4())[:8]
-            # Use 'anonymous' folder for users without authentication
-            folder = user_id if user_id else "anonymous"
-            filename = f"{folder}/{timestamp}_{unique_id}.{file_extension}"
+            # An existing blob is uploaded again only if its first upload never finished
+            if upload_needed or not await self._blob_exists(blob_path):
+                await asyncio.to_thread(
+                    self._get_supabase().storage.from_(self.bucket_name).upload,
+                    path=blob_path,
+                    file=image_data,
+                    file_options={
+                        "content-type": content_type or f"image/{blob_path.rsplit('.', 1)[-1]}",
+                        "upsert": "true",
+                    }
+                )
+            return await self.upload_derivatives(image_data, blob_path, upload_needed)
+        except Exception as e:
+            print(f"Error uploading image: {e}")
+            raise
+    
+    async def upload_derivatives(self, image_data: bytes, blob_path: str, upload_needed: bool = False) -> Dict[str, str]:
+        """
+        Store WebP thumbnail and medium versions next to an uploaded image
+        
+        Derivatives live next to their blob, so they are only rendered and
+        uploaded the first time the blob is stored.
+        
+        Args:
+            image_data: Original image bytes
+            blob_path: Path of the original image blob
+            upload_needed: Render even if a thumbnail already exists
             
-            # Upload to Supabase Storage
+        Returns:
+            Dict with thumbnail_url and medium_url (empty if rendering failed)
+        """
+        try:
             supabase = self._get_supabase()
-            response = supabase.storage.from_(self.bucket_name).upload(
-                path=filename,
-                file=image_data,
-                file_options={"content-type": f"image/{file_extension}"}
-            )
+            paths = self._derivative_paths(blob_path)
             
-            # Get public URL
-            public_url = supabase.storage.from_(self.bucket_name).get_public_url(filename)
+            if upload_needed or not await self._blob_exists(paths["thumb"]):
+                # Pillow work is CPU-bound, keep it off the event loop
+                rendered = await asyncio.to_thread(render_derivatives, image_data)
+                for name, data in rendered.items():
+                    await asyncio.to_thread(
+                        supabase.storage.from_(self.bucket_name).upload,
+                        path=paths[name],
+                        file=data,
+                        file_options={"content-type": "image/webp", "upsert": "true"}
+                    )
             
-            return public_url
+            bucket = supabase.storage.from_(self.bucket_name)
+            return {
+                "thumbnail_url": bucket.get_public_url(paths["thumb"]),
+                "medium_url": bucket.get_public_url(paths["medium"]),
+            }
         except Exception as e:
-            print(f"Error uploading image: {e}")
-            raise
+            print(f"Error creating image derivatives: {e}")
+            return {}
     
     async def delete_food_image(self, image_url: str) -> bool:
         """
         Delete food image from Supabase Storage
         
+        Content-addressed images are only removed once no food log references
+        them any more; legacy per-upload images are removed directly.
+        
         Args:
             image_url: Full URL of the image to delete
             
@@ -66,36 +160,191 @@ class StorageService:
             True if successful, False otherwise
         """
         try:
-            # Extract filename from URL
-            # URL format: https://.../storage/v1/object/public/bucket-name/path/to/file.jpg
-            filename = image_url.split(f"{self.bucket_name}/")[-1]
-            
-            self._get_supabase().storage.from_(self.bucket_name).remove([filename])
+            await self.delete_food_images([image_url])
             return True
         except Exception as e:
             print(f"Error deleting image: {e}")
             return False
     
-    async def get_signed_url(self, image_path: str, expires_in: int = 3600) -> Optional[str]:
+    async def delete_food_images(self, image_urls: List[str]) -> int:
         """
-        Generate signed URL for private image access
+        Release the images of deleted food logs, removing unreferenced objects
+        
+        References are released with one release_image_blobs call, and all
+        objects that are no longer needed (originals and derivatives) are
+        removed with multi-object remove() calls.
         
         Args:
-            image_path: Path to image in storage bucket
-            expires_in: URL expiration time in seconds (default 1 hour)
+            image_urls: Image URLs of the deleted logs (one entry per log)
             
         Returns:
-            Signed URL or None if error
+            Number of storage objects removed
         """
+        paths = [self._path_from_url(url) for url in image_urls if url]
+        blob_prefix = f"{self.BLOB_PREFIX}/"
+        # Blob file names are <hash>.<ext>, or <hash>-<suffix>.<ext> since paths are per incarnation
+        hashes = [p.rsplit("/", 1)[-1].split(".")[0].split("-")[0] for p in paths if p.startswith(blob_prefix)]
+        legacy_paths = {p for p in paths if not p.startswith(blob_prefix)}
+        
+        supabase = self._get_supabase()
+        to_remove = list(legacy_paths)
+        if hashes:
+            response = await asyncio.to_thread(
+                supabase.rpc("release_image_blobs", {"p_hashes": hashes}).execute
+            )
+            for row in response.data or []:
+                to_remove.append(row["path"])
+                to_remove += list(self._derivative_paths(row["path"]).values())
+        
+        await self.remove_objects(to_remove)
+        return len(to_remove)
+    
+    async def remove_objects(self, paths: List[str]) -> None:
+        """
+        Remove storage objects in multi-object batches
+        
+        Args:
+            paths: Object paths in the bucket
+        """
+        bucket = self._get_supabase().storage.from_(self.bucket_name)
+        for i in range(0, len(paths), self.REMOVE_BATCH_SIZE):
+            await asyncio.to_thread(bucket.remove, paths[i:i + self.REMOVE_BATCH_SIZE])
+    
+    def _derivative_paths(self, blob_path: str) -> Dict[str, str]:
+        """Storage paths of a blob's WebP derivatives, by derivative name"""
+        stem = blob_path.rsplit(".", 1)[0]
+        return {name: f"{stem}_{name}.webp" for name in DERIVATIVE_SPECS}
+    
+    def _path_from_url(self, image_url: str) -> str:
+        """Storage path of an image from its public URL"""
+        return image_url.split(f"{self.bucket_name}/")[-1].split("?")[0]
+    
+    async def _blob_exists(self, path: str) -> bool:
+        """
+        Check whether an object already exists in the bucket
+        
+        Args:
+            path: Object path in the bucket
+            
+        Returns:
+            True if the object exists
+        """
+        folder, name = path.rsplit("/", 1)
         try:
-            response = self._get_supabase().storage.from_(self.bucket_name).create_signed_url(
-                path=image_path,
-                expires_in=expires_in
+            entries = await asyncio.to_thread(
+                self._get_supabase().storage.from_(self.bucket_name).list,
+                folder, {"limit": 1, "search": name}
             )
-            return response.get("signedURL")
+            return any(entry.get("name") == name for entry in entries or [])
         except Exception as e:
-            print(f"Error generating signed URL: {e}")
-            return None
+            print(f"Error checking image existence: {e}")
+            return False
+    
+    async def get_signed_url(self, image_path: str, expires_in: Optional[int] = None) -> Optional[str]:
+        """
+        Generate signed URL for private image access
+        
+        Args:
+            image_path: Path to image in storage bucket
+            expires_in: URL expiration time in seconds (default SIGNED_URL_EXPIRES_IN)
+            
+        Returns:
+            Signed URL or None if error
+        """
+        signed = await self.get_signed_urls([image_path], expires_in)
+        return signed.get(image_path)
+    
+    async def get_signed_urls(self, image_paths: List[str], expires_in: Optional[int] = None) -> Dict[str, str]:
+        """
+        Sign many image paths at once
+        
+        Paths signed recently are served from a bounded LRU cache until
+        shortly before their URLs expire; the rest are signed with
+        multi-path create_signed_urls() calls. The client raises for a
+        whole call when any path in it fails (e.g. a deleted object), so a
+        failed chunk is retried path by path.
+        
+        Args:
+            image_paths: Paths to images in the storage bucket
+            expires_in: URL expiration time in seconds (default SIGNED_URL_EXPIRES_IN)
+            
+        Returns:
+            Dict of path -> signed URL (paths that failed to sign are left out)
+        """
+        expires_in = expires_in or settings.SIGNED_URL_EXPIRES_IN
+        now = time.monotonic()
+        signed: Dict[str, str] = {}
+        missing: List[str] = []
+        
+        for path in dict.fromkeys(p for p in image_paths if p):
+            key = (path, expires_in)
+            cached = self._signed_urls.get(key)
+            if cached and cached[1] > now:
+                self._signed_urls.move_to_end(key)
+                signed[path] = cached[0]
+            else:
+                missing.append(path)
+        
+        if not missing:
+            return signed
+        
+        cache_for = expires_in - min(self.SIGNED_URL_EXPIRY_MARGIN, expires_in // 2)
+        bucket = self._get_supabase().storage.from_(self.bucket_name)
+        for i in range(0, len(missing), self.SIGN_BATCH_SIZE):
+            chunk = missing[i:i + self.SIGN_BATCH_SIZE]
+            try:
+                items = [
+                    (item["path"], item.get("signedURL") or item.get("signedUrl"))
+                    for item in await asyncio.to_thread(bucket.create_signed_urls, chunk, expires_in) or []
+                    if not item.get("error")
+                ]
+            except Exception as e:
+                print(f"Error generating signed URLs, signing {len(chunk)} paths one by one: {e}")
+                items = []
+                for path in chunk:
+                    try:
+                        item = await asyncio.to_thread(bucket.create_signed_url, path, expires_in)
+                        items.append((path, item.get("signedURL") or item.get("signedUrl")))
+                    except Exception as path_error:
+                        print(f"Error generating signed URL for {path}: {path_error}")
+            for path, url in items:
+                if not url:
+                    continue
+                signed[path] = url
+                self._signed_urls[(path, expires_in)] = (url, now + cache_for)
+                self._signed_urls.move_to_end((path, expires_in))
+        
+        while len(self._signed_urls) > settings.SIGNED_URL_CACHE_SIZE:
+            self._signed_urls.popitem(last=False)
+        
+        return signed
+    
+    async def sign_food_logs(self, logs: List[Dict]) -> List[Dict]:
+        """
+        Replace the image URLs of food logs with signed URLs (private buckets)
+        
+        Every image in the listing is signed in one batched call. Does
+        nothing while the bucket is public.
+        
+        Args:
+            logs: Food log rows (modified in place)
+            
+        Returns:
+            The same rows
+        """
+        if not settings.STORAGE_PRIVATE_BUCKET or not logs:
+            return logs
+        
+        paths = [
+            self._path_from_url(log[field])
+            for log in logs for field in self.IMAGE_URL_FIELDS if log.get(field)
+        ]
+        signed = await self.get_signed_urls(paths)
+        for log in logs:
+            for field in self.IMAGE_URL_FIELDS:
+                if log.get(field):
+                    log[field] = signed.get(self._path_from_url(log[field]), log[field])
+        return logs
 
 
 # Global service instance
@@ -0,0 +1,313 @@
+from typing import Dict, Iterator, List, Optional, Set
+from datetime import date
+import asyncio
+import json
+import os
+import time
+from services.supabase_client import get_supabase
+from services.food_service import food_service
+from services.archive_service import archive_service
+from services.nutrition_service import nutrition_service
+
+
+class SummaryRebuildService:
+    """Service for regenerating daily_nutrition_summary from food_logs in bulk"""
+
+    def __init__(self, page_size: int = 1000, batch_size: int = 500, concurrency: int = 4):
+        self.supabase = None
+        self.page_size = page_size
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+
+    def _get_supabase(self):
+        """Lazy load Supabase client"""
+        if self.supabase is None:
+            self.supabase = get_supabase()
+        return self.supabase
+
+    def iter_food_logs(self, after_user_id: Optional[str] = None) -> Iterator[Dict]:
+        """
+        Stream every food log ordered by (user_id, logged_at, id)
+
+        Pages are located by keyset, so the scan cost stays linear in the
+        number of rows.
+
+        Args:
+            after_user_id: Skip users up to and including this one (resume point)
+
+        Yields:
+            Food log rows with user_id, logged_at, food_category and calories
+        """
+        last = None
+        while True:
+            query = self._get_supabase().table("food_logs").select(
+                "id,user_id,logged_at,food_category,calories"
+            ).not_.is_("user_id", "null")
+
+            if last:
+                user_id, logged_at, log_id = last["user_id"], last["logged_at"], last["id"]
+                query = query.or_(
+                    f"user_id.gt.{user_id},"
+                    f'and(user_id.eq.{user_id},logged_at.gt."{logged_at}"),'
+                    f'and(user_id.eq.{user_id},logged_at.eq."{logged_at}",id.gt.{log_id})'
+                )
+            elif after_user_id:
+                query = query.gt("user_id", after_user_id)
+
+            response = query.order("user_id").order("logged_at").order("id").limit(self.page_size).execute()
+            rows = response.data if response.data else []
+            yield from rows
+
+            if len(rows) < self.page_size:
+                break
+            last = rows[-1]
+
+    def iter_summary_days(self, since: date, after_user_id: Optional[str] = None) -> Iterator[Dict]:
+        """
+        Stream the (user_id, date) of every summary from a date on, ordered by (user_id, date)
+
+        Args:
+            since: First date to include
+            after_user_id: Skip users up to and including this one (resume point)
+
+        Yields:
+            Rows with user_id and date
+        """
+        last = None
+        while True:
+            query = self._get_supabase().table("daily_nutrition_summary").select(
+                "user_id,date"
+            ).gte("date", since.isoformat())
+
+            if last:
+                user_id, day = last["user_id"], last["date"]
+                query = query.or_(f"user_id.gt.{user_id},and(user_id.eq.{user_id},date.gt.{day})")
+            elif after_user_id:
+                query = query.gt("user_id", after_user_id)
+
+            response = query.order("user_id").order("date").limit(self.page_size).execute()
+            rows = response.data if response.data else []
+            yield from rows
+
+            if len(rows) < self.page_size:
+                break
+            last = rows[-1]
+
+    async def rebuild(self, checkpoint_path: Optional[str] = None) -> Dict:
+        """
+        Recompute every user's daily summaries in a single pass over food_logs
+
+        Logs arrive grouped by user and day, so each (user, date) summary is
+        finished as soon as the next group starts. Existing summaries are
+        walked alongside in the same user order, and any day from the
+        archive cutoff on that no longer has logs is zeroed (older days'
+        logs live in the archive, so their summaries are left alone).
+        Finished summaries are upserted in batches with bounded concurrency,
+        and the last fully written user is saved to the checkpoint file so
+        an interrupted run can resume where it stopped.
+
+        Args:
+            checkpoint_path: Optional JSON file used to resume and record progress
+
+        Returns:
+            Report with logs scanned, summaries written (and zeroed) and rows/sec
+        """
+        started = time.perf_counter()
+        resume_after = self._read_checkpoint(checkpoint_path)
+
+        logs_scanned = 0
+        summaries_written = 0
+        summaries_zeroed = 0
+        pending: List[Dict] = []
+        day_logs: List[Dict] = []
+        user_days: Set[str] = set()
+        current_user: Optional[str] = None
+        current_day: Optional[str] = None
+        last_finished_user: Optional[str] = resume_after
+
+        summaries = self.iter_summary_days(archive_service.archive_cutoff(), after_user_id=resume_after)
+        next_summary = next(summaries, None)
+
+        async def write_pending() -> None:
+            nonlocal summaries_written
+            await self._upsert_batches("daily_nutrition_summary", pending, "user_id,date")
+            summaries_written += len(pending)
+            pending.clear()
+            self._write_checkpoint(checkpoint_path, last_finished_user)
+
+        def finish_day() -> None:
+            if day_logs:
+                pending.append(food_service.build_daily_summary(
+                    current_user, date.fromisoformat(current_day), day_logs
+                ))
+                user_days.add(current_day)
+                day_logs.clear()
+
+        def zero_stale_days(through_user: Optional[str]) -> None:
+            """Zero summaries up to through_user (all users if None) whose day had no logs in the scan"""
+            nonlocal next_summary, summaries_zeroed
+            while next_summary is not None and (through_user is None or next_summary["user_id"] <= through_user):
+                user_id, day = next_summary["user_id"], next_summary["date"]
+                if not (user_id == current_user and day in user_days):
+                    pending.append(food_service.build_daily_summary(user_id, date.fromisoformat(day), []))
+                    summaries_zeroed += 1
+                next_summary = next(summaries, None)
+
+        for log in self.iter_food_logs(after_user_id=resume_after):
+            logs_scanned += 1
+            user_id = log["user_id"]
+            day = str(log["logged_at"])[:10]
+
+            if user_id != current_user:
+                finish_day()
+                if current_user is not None:
+                    zero_stale_days(current_user)
+                    last_finished_user = current_user
+                    # Only write whole users so the checkpoint is always safe to resume from
+                    if len(pending) >= self.batch_size * self.concurrency:
+                        await write_pending()
+                current_user, current_day = user_id, day
+                user_days.clear()
+            elif day != current_day:
+                finish_day()
+                current_day = day
+
+            day_logs.append(log)
+
+        finish_day()
+        if current_user is not None:
+            last_finished_user = current_user
+        # The last user's days, then users after them with no logs left at all
+        zero_stale_days(None)
+        await write_pending()
+
+        duration = time.perf_counter() - started
+        return {
+            "logs_scanned": logs_scanned,
+            "summaries_written": summaries_written,
+            "summaries_zeroed": summaries_zeroed,
+            "resumed_after_user": resume_after,
+            "last_user": last_finished_user,
+            "duration_seconds": round(duration, 3),
+            "rows_per_second": round(logs_scanned / duration, 1) if duration > 0 else 0.0,
+        }
+
+    def iter_complete_days(self) -> Iterator[Dict]:
+        """
+        Stream every 100%-complete day ordered by (user_id, date)
+
+        Yields:
+            Rows with user_id and date
+        """
+        last = None
+        while True:
+            query = self._get_supabase().table("daily_nutrition_summary").select(
+                "user_id,date"
+            ).eq("completion_percentage", 100)
+
+            if last:
+                user_id, day = last["user_id"], last["date"]
+                query = query.or_(f"user_id.gt.{user_id},and(user_id.eq.{user_id},date.gt.{day})")
+
+            response = query.order("user_id").order("date").limit(self.page_size).execute()
+            rows = response.data if response.data else []
+            yield from rows
+
+            if len(rows) < self.page_size:
+                break
+            last = rows[-1]
+
+    async def rebuild_streaks(self) -> Dict:
+        """
+        Recompute every user's user_streaks row from daily_nutrition_summary
+
+        Repairs streaks after summaries were rebuilt or edited outside the
+        app. Users whose complete days are all gone are reset to zero.
+
+        Returns:
+            Report with days scanned, streaks written and duration
+        """
+        started = time.perf_counter()
+        days_scanned = 0
+        pending: List[Dict] = []
+        seen = set()
+        current_user: Optional[str] = None
+        user_days: List[date] = []
+
+        def finish_user() -> None:
+            if current_user is None:
+                return
+            current, longest, last = nutrition_service.streak_from_days(user_days)
+            pending.append({
+                "user_id": current_user,
+                "current_streak": current,
+                "longest_streak": longest,
+                "last_logged_date": last.isoformat() if last else None,
+            })
+            seen.add(current_user)
+            user_days.clear()
+
+        for row in self.iter_complete_days():
+            days_scanned += 1
+            if row["user_id"] != current_user:
+                finish_user()
+                current_user = row["user_id"]
+            user_days.append(date.fromisoformat(row["date"]))
+        finish_user()
+
+        # Streak rows left over from days that are no longer complete
+        last_user = None
+        while True:
+            query = self._get_supabase().table("user_streaks").select("user_id").gt("longest_streak", 0)
+            if last_user:
+                query = query.gt("user_id", last_user)
+            rows = query.order("user_id").limit(self.page_size).execute().data or []
+            pending.extend(
+                {"user_id": row["user_id"], "current_streak": 0, "longest_streak": 0, "last_logged_date": None}
+                for row in rows if row["user_id"] not in seen
+            )
+            if len(rows) < self.page_size:
+                break
+            last_user = rows[-1]["user_id"]
+
+        await self._upsert_batches("user_streaks", pending, "user_id")
+
+        duration = time.perf_counter() - started
+        return {
+            "days_scanned": days_scanned,
+            "streaks_written": len(pending),
+            "duration_seconds": round(duration, 3),
+        }
+
+    async def _upsert_batches(self, table: str, rows: List[Dict], on_conflict: str) -> None:
+        """Upsert rows in batch_size chunks with at most `concurrency` requests in flight"""
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def upsert(batch: List[Dict]) -> None:
+            async with semaphore:
+                await asyncio.to_thread(
+                    lambda: self._get_supabase().table(table).upsert(batch, on_conflict=on_conflict).execute()
+                )
+
+        batches = [rows[i:i + self.batch_size] for i in range(0, len(rows), self.batch_size)]
+        await asyncio.gather(*(upsert(batch) for batch in batches))
+
+    def _read_checkpoint(self, path: Optional[str]) -> Optional[str]:
+        """Last fully rebuilt user from a checkpoint file, if any"""
+        if not path or not os.path.exists(path):
+            return None
+        with open(path) as f:
+            return json.load(f).get("last_user_id")
+
+    def _write_checkpoint(self, path: Optional[str], user_id: Optional[str]) -> None:
+        """Atomically record the last fully rebuilt user"""
+        if not path or user_id is None:
+            return
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"last_user_id": user_id}, f)
+        os.replace(tmp_path, path)
+
+
+# Global service instance
+summary_rebuild_service = SummaryRebuildService()
@@ -0,0 +1,6 @@
+import os
+
+# Settings are read at import time; tests never reach Supabase
+os.environ.setdefault("SUPABASE_URL", "https://example.supabase.co")
+os.environ.setdefault("SUPABASE_KEY", "test-key")
+os.environ.setdefault("SUPABASE_JWT_SECRET", "test-secret")
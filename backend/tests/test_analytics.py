@@ -0,0 +1,76 @@
+import asyncio
+from datetime import date
+import pytest
+from services.analytics_service import AnalyticsService
+
+
+class FakeQuery:
+    """Chainable stand-in for a PostgREST query that returns fixed rows"""
+
+    def __init__(self, rows):
+        self.rows = rows
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self
+
+    def execute(self):
+        return type("Response", (), {"data": self.rows})()
+
+
+def trends(rows, **kwargs):
+    service = AnalyticsService()
+    service._get_supabase = lambda: type("Client", (), {"table": lambda self, name: FakeQuery(rows)})()
+    return asyncio.run(service.get_trends("user", **kwargs))
+
+
+def summary(day, calories, completion, **groups):
+    return {"date": day, "total_calories": calories, "completion_percentage": completion, **groups}
+
+
+@pytest.mark.parametrize("start, end, requested, expected", [
+    (date(2026, 1, 1), date(2026, 4, 2), None, "day"),      # 92 days
+    (date(2026, 1, 1), date(2026, 4, 3), None, "week"),     # 93 days
+    (date(2026, 1, 1), date(2026, 1, 7), "week", "week"),   # never finer than requested
+    (date(2019, 1, 1), date(2026, 1, 1), None, "month"),    # 366 weeks
+    (date(2010, 1, 1), date(2026, 1, 1), "day", "month"),   # more months than fit is still month
+])
+def test_choose_bucket(start, end, requested, expected):
+    assert AnalyticsService().choose_bucket(start, end, requested) == expected
+
+
+def test_week_count_includes_partial_weeks():
+    service = AnalyticsService()
+    service.MAX_TREND_POINTS = 2
+    # Sunday to the following Monday: 9 days over 3 Monday-based weeks
+    assert service.choose_bucket(date(2026, 10, 4), date(2026, 10, 12)) == "month"
+    # Monday to Sunday of the next week: 2 full weeks
+    assert service.choose_bucket(date(2026, 10, 5), date(2026, 10, 18), "week") == "week"
+
+
+def test_daily_series_and_rolling_means():
+    result = trends(
+        [summary("2026-10-02", 2000, 60, fruits_count=1), summary("2026-10-04", 1000, 100, fruits_count=2, dairy_count=1)],
+        days=4, window=2, end_date=date(2026, 10, 4),
+    )
+    assert result["days_logged"] == 2
+    assert result["average_calories"] == 1500.0
+    assert result["average_completion"] == 40.0
+    assert result["coverage"]["fruits"] == 0.5
+    assert result["coverage"]["dairy"] == 0.25
+    assert [point["calories_rolling"] for point in result["series"]] == [0.0, 2000.0, 2000.0, 1000.0]
+    assert [point["completion_rolling"] for point in result["series"]] == [0.0, 30.0, 30.0, 50.0]
+
+
+def test_weekly_buckets_follow_monday_weeks():
+    # 2026-10-01 is a Thursday, so the first and last weeks are partial
+    result = trends(
+        [summary("2026-10-03", 1200, 100), summary("2026-10-06", 1800, 40), summary("2026-10-07", 2400, 40)],
+        days=14, bucket="week", end_date=date(2026, 10, 14),
+    )
+    assert result["bucket"] == "week"
+    assert [(point["start_date"], point["end_date"]) for point in result["series"]] == [
+        ("2026-10-01", "2026-10-04"), ("2026-10-05", "2026-10-11"), ("2026-10-12", "2026-10-14"),
+    ]
+    assert [point["days_logged"] for point in result["series"]] == [1, 2, 0]
+    assert [point["average_calories"] for point in result["series"]] == [1200.0, 2100.0, 0.0]
+    assert [point["average_completion"] for point in result["series"]] == [25.0, 11.4, 0.0]
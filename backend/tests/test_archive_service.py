@@ -0,0 +1,65 @@
+from datetime import date
+import pytest
+from config.settings import settings
+from services.archive_service import ArchiveService
+
+
+USER = "0b6f3c1e-8d2a-4c57-9e0f-2a1b3c4d5e6f"
+
+
+@pytest.fixture
+def archive(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "ARCHIVE_URI", str(tmp_path))
+    service = ArchiveService()
+    march = [
+        {"id": f"m{day}", "user_id": USER, "logged_at": f"2020-03-{day:02d}T10:00:00+00:00",
+         "food_category": "fruit", "calories": day, "image_url": f"https://x/m{day}.jpg"}
+        for day in range(1, 11)
+    ]
+    service._write_partition(USER, "2020-03", march)
+    service._write_partition(USER, "2020-04", [
+        {"id": "a1", "user_id": USER, "logged_at": "2020-04-02T00:30:00+00:00", "food_category": "dairy"},
+    ])
+    return service
+
+
+def archived_ids(service):
+    return sorted(row["id"] for row in service.read_archived_logs(USER))
+
+
+def test_rewriting_a_partition_is_idempotent(archive):
+    march = [{"id": "m1", "user_id": USER, "logged_at": "2020-03-01T10:00:00+00:00"}]
+    archive._write_partition(USER, "2020-03", march)
+    assert len(archived_ids(archive)) == 11
+
+
+def test_range_delete_rewrites_partitions(archive):
+    deleted = archive.delete_archived_logs(USER, date(2020, 3, 3), date(2020, 4, 5))
+
+    assert sorted(row["id"] for row in deleted) == ["a1", "m10", "m3", "m4", "m5", "m6", "m7", "m8", "m9"]
+    assert all(row["user_id"] == USER and isinstance(row["logged_at"], str) for row in deleted)
+    assert archived_ids(archive) == ["m1", "m2"]
+    # The emptied month is removed and the rewritten one is a single file
+    assert archive._user_months(USER) == ["2020-03"]
+    assert len(archive._partition_files(f"{archive._root}/user_id={USER}/month=2020-03")) == 1
+    assert archive.delete_archived_logs(USER, date(2020, 3, 3), date(2020, 4, 5)) == []
+
+
+@pytest.mark.parametrize("start_date, end_date, remaining", [
+    (None, date(2020, 3, 8), ["a1", "m10", "m9"]),
+    (date(2020, 3, 9), None, ["m1", "m2", "m3", "m4", "m5", "m6", "m7", "m8"]),
+    (None, None, []),
+])
+def test_one_sided_ranges(archive, start_date, end_date, remaining):
+    archive.delete_archived_logs(USER, start_date, end_date)
+    assert archived_ids(archive) == remaining
+
+
+def test_month_ranges_are_clipped_newest_first(archive):
+    assert archive.archived_month_ranges(USER, date(2020, 3, 15)) == [
+        (date(2020, 4, 1), date(2020, 4, 30)),
+        (date(2020, 3, 15), date(2020, 3, 31)),
+    ]
+    assert archive.archived_month_ranges(USER, end_date=date(2020, 3, 20)) == [
+        (date(2020, 3, 1), date(2020, 3, 20)),
+    ]
@@ -0,0 +1,103 @@
+import asyncio
+import pytest
+from utils import cache as cache_module
+from utils.cache import ReadThroughCache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache_module, "time", clock)
+    return clock
+
+
+def loader(value):
+    calls = []
+
+    async def load():
+        calls.append(value)
+        if isinstance(value, Exception):
+            raise value
+        return value
+
+    return load, calls
+
+
+def test_fresh_entries_are_served_without_loading(clock):
+    cache = ReadThroughCache(ttl_seconds=30)
+    load, calls = loader("v1")
+    assert asyncio.run(cache.get("k", load)) == "v1"
+    clock.now += 29
+    assert asyncio.run(cache.get("k", load)) == "v1"
+    assert calls == ["v1"]
+
+    clock.now += 2
+    reload, calls = loader("v2")
+    assert asyncio.run(cache.get("k", reload)) == "v2"
+    assert calls == ["v2"]
+    assert cache.stats()["hit_rate"] == round(1 / 3, 4)
+
+
+def test_stale_value_is_served_only_while_kept(clock):
+    cache = ReadThroughCache(ttl_seconds=30, stale_seconds=60)
+    cache.set("k", "old")
+    failing, _ = loader(RuntimeError("db down"))
+
+    clock.now += 31
+    assert asyncio.run(cache.get("k", failing)) == "old"
+    clock.now += 60
+    with pytest.raises(RuntimeError):
+        asyncio.run(cache.get("k", failing))
+    assert cache.stats()["stale_served"] == 1
+    assert cache.stats()["load_errors"] == 2
+
+
+def test_invalidate_forces_a_reload_but_keeps_the_fallback(clock):
+    cache = ReadThroughCache()
+    cache.set("k", "old")
+    cache.invalidate("k")
+    failing, calls = loader(RuntimeError("db down"))
+    assert asyncio.run(cache.get("k", failing)) == "old"
+    assert len(calls) == 1
+
+
+def test_load_racing_an_invalidation_is_not_cached(clock):
+    cache = ReadThroughCache()
+
+    async def scenario():
+        started = asyncio.Event()
+        release = asyncio.Event()
+
+        async def slow_load():
+            started.set()
+            await release.wait()
+            return "read before the write"
+
+        read = asyncio.create_task(cache.get("k", slow_load))
+        await started.wait()
+        cache.invalidate("k")
+        release.set()
+        assert await read == "read before the write"
+        fresh, calls = loader("after")
+        assert await cache.get("k", fresh) == "after"
+        return calls
+
+    assert asyncio.run(scenario()) == ["after"]
+
+
+def test_least_recently_used_entries_are_evicted(clock):
+    cache = ReadThroughCache(max_entries=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    asyncio.run(cache.get("a", loader(None)[0]))
+    cache.set("c", 3)
+    assert set(cache._entries) == {"a", "c"}
+    assert cache.stats()["evictions"] == 1
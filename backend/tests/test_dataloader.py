@@ -0,0 +1,36 @@
+import asyncio
+from utils.dataloader import BatchLoader
+
+
+def test_keys_from_one_tick_are_fetched_together():
+    batches = []
+
+    async def fetch(keys):
+        batches.append(sorted(keys))
+        return {key: key.upper() for key in keys if key != "missing"}
+
+    loader = BatchLoader("test-batch", fetch, max_batch_size=2)
+
+    async def scenario():
+        first = await asyncio.gather(*(loader.load(key) for key in ["a", "b", "a", "c", "missing"]))
+        second = await loader.load("d")
+        return first, second
+
+    first, second = asyncio.run(scenario())
+    assert first == ["A", "B", "A", "C", None]
+    assert second == "D"
+    assert batches == [["a", "b"], ["c", "missing"], ["d"]]
+    assert loader.stats() == {"loads": 6, "keys": 5, "batches": 3, "average_batch_size": 1.67}
+
+
+def test_batch_failure_reaches_every_caller_in_the_batch():
+    async def fetch(keys):
+        raise RuntimeError("db down")
+
+    loader = BatchLoader("test-failure", fetch)
+
+    async def scenario():
+        return await asyncio.gather(loader.load("a"), loader.load("b"), return_exceptions=True)
+
+    results = asyncio.run(scenario())
+    assert [type(result) for result in results] == [RuntimeError, RuntimeError]
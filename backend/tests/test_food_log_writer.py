@@ -0,0 +1,82 @@
+import asyncio
+import pytest
+from postgrest.exceptions import APIError
+from services.food_log_writer import FoodLogWriteBuffer
+from services.storage_service import storage_service
+
+
+class FakeRpc:
+    def __init__(self, client, rows):
+        self.client = client
+        self.rows = rows
+
+    def execute(self):
+        self.client.calls.append([row["id"] for row in self.rows])
+        return self.client.handler(self.rows)
+
+
+class FakeClient:
+    def __init__(self, handler):
+        self.handler = handler
+        self.calls = []
+
+    def rpc(self, name, params):
+        assert name == "insert_food_logs"
+        return FakeRpc(self, params["p_logs"])
+
+
+class Response:
+    def __init__(self, data):
+        self.data = data
+
+
+def flush(handler, ids):
+    """Flush one batch of rows with the given ids, returning the futures and the RPC calls made"""
+    storage_service._public_url_prefix = "https://example.supabase.co/storage/v1/object/public/food-images/"
+    writer = FoodLogWriteBuffer()
+    writer.supabase = FakeClient(handler)
+
+    async def run():
+        loop = asyncio.get_running_loop()
+        batch = [({"id": i}, loop.create_future()) for i in ids]
+        await writer._flush(batch)
+        return [future for _, future in batch]
+
+    return asyncio.run(run()), writer.supabase.calls
+
+
+def test_successful_batch_is_one_request():
+    futures, calls = flush(lambda rows: Response(rows), [1, 2, 3])
+    assert calls == [[1, 2, 3]]
+    assert [future.result()["id"] for future in futures] == [1, 2, 3]
+
+
+def test_row_error_isolates_the_bad_row():
+    def handler(rows):
+        if any(row["id"] == 3 for row in rows):
+            raise APIError({"code": "23503", "message": "foreign key violation"})
+        return Response(rows)
+
+    futures, calls = flush(handler, [1, 2, 3, 4])
+    assert [future.result()["id"] for future in futures if not future.exception()] == [1, 2, 4]
+    assert isinstance(futures[2].exception(), APIError)
+    assert calls == [[1, 2, 3, 4], [1, 2], [3, 4], [3], [4]]
+
+
+@pytest.mark.parametrize("error", [
+    TimeoutError("read timed out"),
+    APIError({"code": "57014", "message": "canceling statement due to statement timeout"}),
+])
+def test_transport_errors_fail_the_batch_without_retrying(error):
+    def handler(rows):
+        raise error
+
+    futures, calls = flush(handler, [1, 2, 3, 4])
+    assert calls == [[1, 2, 3, 4]]
+    assert all(type(future.exception()) is type(error) for future in futures)
+
+
+def test_short_response_fails_the_batch_without_retrying():
+    futures, calls = flush(lambda rows: Response(rows[:-1]), [1, 2])
+    assert calls == [[1, 2]]
+    assert all(isinstance(future.exception(), RuntimeError) for future in futures)
@@ -0,0 +1,69 @@
+import asyncio
+import pytest
+from services.idempotency_service import IdempotencyService, MemoryIdempotencyStore, SQLiteIdempotencyStore
+from utils.exceptions import ValidationError
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    if request.param == "memory":
+        return MemoryIdempotencyStore(max_entries=2)
+    return SQLiteIdempotencyStore(str(tmp_path / "keys.db"), max_entries=2)
+
+
+def counting_operation(result):
+    calls = []
+
+    async def operation():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return result
+
+    return operation, calls
+
+
+def test_completed_keys_replay_their_result(store):
+    service = IdempotencyService(store)
+    operation, calls = counting_operation({"log_id": "1"})
+
+    assert asyncio.run(service.run("user:key", "fp", operation)) == {"log_id": "1"}
+    assert asyncio.run(service.run("user:key", "fp", operation)) == {"log_id": "1"}
+    assert len(calls) == 1
+    with pytest.raises(ValidationError):
+        asyncio.run(service.run("user:key", "other-payload", operation))
+
+
+def test_concurrent_retries_wait_for_the_first_attempt(store):
+    service = IdempotencyService(store)
+    operation, calls = counting_operation({"log_id": "1"})
+
+    async def scenario():
+        return await asyncio.gather(*(service.run("user:key", "fp", operation) for _ in range(3)))
+
+    assert asyncio.run(scenario()) == [{"log_id": "1"}] * 3
+    assert len(calls) == 1
+
+
+def test_failed_attempts_are_not_recorded(store):
+    service = IdempotencyService(store)
+
+    async def failing():
+        raise RuntimeError("ML service down")
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(service.run("user:key", "fp", failing))
+    operation, calls = counting_operation({"log_id": "2"})
+    assert asyncio.run(service.run("user:key", "fp", operation)) == {"log_id": "2"}
+
+
+def test_store_keeps_only_the_newest_entries(store):
+    for key in ["a", "b", "c"]:
+        store.set(key, "fp", {"key": key})
+    assert store.get("a") is None
+    assert store.get("c") == ("fp", {"key": "c"})
+
+
+def test_expired_entries_are_ignored(store):
+    store.ttl_seconds = -1
+    store.set("a", "fp", {})
+    assert store.get("a") is None
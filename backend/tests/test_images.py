@@ -0,0 +1,46 @@
+import io
+from PIL import Image
+from utils.images import DERIVATIVE_SPECS, render_derivatives
+
+
+def encode(image, format, **params):
+    output = io.BytesIO()
+    image.save(output, format=format, **params)
+    return output.getvalue()
+
+
+def decode(data):
+    image = Image.open(io.BytesIO(data))
+    image.load()
+    return image
+
+
+def test_derivatives_are_webp_bounded_by_their_longest_edge():
+    derivatives = render_derivatives(encode(Image.new("RGB", (1600, 900), "orange"), "JPEG"))
+
+    assert set(derivatives) == set(DERIVATIVE_SPECS)
+    for name, (max_edge, _) in DERIVATIVE_SPECS.items():
+        image = decode(derivatives[name])
+        assert image.format == "WEBP"
+        assert max(image.size) == max_edge
+        assert abs(image.size[1] - image.size[0] * 9 / 16) <= 1
+
+
+def test_small_images_are_not_upscaled():
+    derivatives = render_derivatives(encode(Image.new("RGB", (120, 80), "green"), "PNG"))
+    assert decode(derivatives["medium"]).size == (120, 80)
+
+
+def test_exif_orientation_is_applied():
+    exif = Image.Exif()
+    exif[0x0112] = 6  # rotated 90 degrees clockwise
+    data = encode(Image.new("RGB", (400, 200), "blue"), "JPEG", exif=exif)
+
+    assert decode(render_derivatives(data)["thumb"]).size == (100, 200)
+
+
+def test_palette_images_keep_transparency():
+    image = Image.new("P", (300, 300))
+    image.info["transparency"] = 0
+    derivatives = render_derivatives(encode(image, "GIF"))
+    assert decode(derivatives["thumb"]).mode == "RGBA"
@@ -0,0 +1,104 @@
+import asyncio
+import io
+import pytest
+from services import import_service as import_module
+from services.import_service import ImportService
+
+
+def test_parse_csv_strips_bom_and_blank_cells():
+    data = "\ufefffood_category, detected_food_name ,calories\nfruit,apple,\ngrain,\"rice, white\",200\n"
+    rows = list(ImportService().parse_csv(io.BytesIO(data.encode("utf-8"))))
+    assert rows == [
+        {"food_category": "fruit", "detected_food_name": "apple", "calories": None},
+        {"food_category": "grain", "detected_food_name": "rice, white", "calories": "200"},
+    ]
+
+
+@pytest.mark.parametrize("data", [
+    '  \n[{"n": 1}, {"n": 2},\n {"n": 3}]',
+    '{"n": 1}\n\n{"n": 2}\r\n  {"n": 3}',
+    '\ufeff{"n": 1}\n{"n": 2}\n{"n": 3}\n',
+])
+def test_parse_json_reads_arrays_and_ndjson(data):
+    assert list(ImportService().parse_json(io.BytesIO(data.encode("utf-8")))) == [{"n": 1}, {"n": 2}, {"n": 3}]
+
+
+def test_parse_json_single_record_without_newline():
+    assert list(ImportService().parse_json(io.BytesIO(b'{"n": 1}'))) == [{"n": 1}]
+
+
+class FakeFoodService:
+    def __init__(self, fail_batches=()):
+        self.fail_batches = set(fail_batches)
+        self.batches = []
+        self.summary_days = []
+
+    async def create_food_logs(self, rows, update_summaries=True):
+        self.batches.append(rows)
+        if len(self.batches) in self.fail_batches:
+            raise RuntimeError("duplicate key")
+        return rows
+
+    async def update_daily_summary(self, user_id, day, update_streak=True):
+        self.summary_days.append(day.isoformat())
+
+
+class FakeNutritionService:
+    def __init__(self):
+        self.recomputes = 0
+
+    async def recompute_streak(self, user_id):
+        self.recomputes += 1
+
+
+def record(logged_at, category="fruit", **extra):
+    return {"logged_at": logged_at, "detected_food_name": "apple", "food_category": category,
+            "healthiness_score": 80, **extra}
+
+
+def run_import(monkeypatch, records, **fake_kwargs):
+    food, nutrition = FakeFoodService(**fake_kwargs), FakeNutritionService()
+    monkeypatch.setattr(import_module, "food_service", food)
+    monkeypatch.setattr(import_module, "nutrition_service", nutrition)
+    report = asyncio.run(ImportService(batch_size=2).import_records("user", records))
+    return report, food, nutrition
+
+
+def test_import_batches_rows_and_recomputes_each_utc_day_once(monkeypatch):
+    report, food, nutrition = run_import(monkeypatch, [
+        record("2026-10-01T09:00:00"),
+        record("2026-10-01T23:30:00-02:00", category=" Dairy ", meal_type="LUNCH"),
+        record("2026-10-02T08:00:00+00:00"),
+        record("2026-10-01T12:00:00Z", category="pastry"),
+        record("not a date"),
+    ])
+
+    assert [len(batch) for batch in food.batches] == [2, 1]
+    assert food.batches[0][1]["food_category"] == "dairy"
+    assert food.batches[0][1]["meal_type"] == "lunch"
+    assert report["imported"] == 3
+    assert report["rejected"] == 2
+    assert [error["row"] for error in report["errors"]] == [4, 5]
+    assert report["errors"][0]["error"].startswith("food_category:")
+    assert food.summary_days == ["2026-10-01", "2026-10-02"]
+    assert report["affected_days"] == 2
+    assert nutrition.recomputes == 1
+
+
+def test_failed_insert_rejects_only_its_batch(monkeypatch):
+    report, food, nutrition = run_import(monkeypatch, [
+        record("2026-10-01T09:00:00"), record("2026-10-02T09:00:00"), record("2026-10-03T09:00:00"),
+    ], fail_batches=[1])
+
+    assert report["imported"] == 1
+    assert report["errors"] == [
+        {"row": 1, "error": "Insert failed: duplicate key"},
+        {"row": 2, "error": "Insert failed: duplicate key"},
+    ]
+    assert food.summary_days == ["2026-10-03"]
+
+
+def test_nothing_imported_skips_the_streak(monkeypatch):
+    report, food, nutrition = run_import(monkeypatch, [record("yesterday")])
+    assert report["imported"] == 0
+    assert nutrition.recomputes == 0
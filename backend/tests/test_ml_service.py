@@ -0,0 +1,43 @@
+import asyncio
+import httpx
+from services import ml_service as ml_module
+from services.ml_service import MLService
+
+
+def analyze(monkeypatch, handler, images):
+    """Run analyze_food_images against a fake ML service"""
+    real_client = httpx.AsyncClient
+    monkeypatch.setattr(
+        ml_module.httpx, "AsyncClient",
+        lambda **kwargs: real_client(transport=httpx.MockTransport(handler), **kwargs),
+    )
+    service = MLService()
+    service.ml_service_url = "http://ml"
+    return asyncio.run(service.analyze_food_images(images))
+
+
+def result(name):
+    return {"food_name": name, "category": "fruit", "healthiness_score": 80, "calories": 90, "confidence": 0.9}
+
+
+def test_failed_images_get_errors(monkeypatch):
+    def handler(request):
+        return httpx.Response(200, json={"results": [result("Pear"), None], "errors": [None, "Could not decode image"]})
+
+    pear, failed = analyze(monkeypatch, handler, ["a", "b"])
+    assert pear["food_name"] == "Pear"
+    assert isinstance(failed, ValueError) and "decode" in str(failed)
+
+
+def test_batch_failure_falls_back_to_single_calls(monkeypatch):
+    paths = []
+
+    def handler(request):
+        paths.append(request.url.path)
+        if request.url.path == "/analyze-batch":
+            return httpx.Response(500)
+        return httpx.Response(200, json=result("Kiwi"))
+
+    results = analyze(monkeypatch, handler, ["a", "b"])
+    assert [r["food_name"] for r in results] == ["Kiwi", "Kiwi"]
+    assert paths == ["/analyze-batch", "/analyze", "/analyze"]
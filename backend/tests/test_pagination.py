@@ -0,0 +1,114 @@
+import asyncio
+import base64
+import json
+import pytest
+from services.food_service import FoodService
+from utils.pagination import (
+    build_select,
+    decode_cursor,
+    decode_search_cursor,
+    encode_cursor,
+    encode_search_cursor,
+    parse_fields,
+    project_rows,
+)
+
+
+LOG_ID = "0b6f3c1e-8d2a-4c57-9e0f-2a1b3c4d5e6f"
+
+
+def raw_cursor(value) -> str:
+    return base64.urlsafe_b64encode(json.dumps(value).encode("utf-8")).decode("ascii").rstrip("=")
+
+
+class RecordingQuery:
+    """Chainable stand-in for a PostgREST query that records its calls"""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.calls = []
+
+    def __getattr__(self, name):
+        def call(*args, **kwargs):
+            self.calls.append((name, args))
+            return self
+        return call
+
+    def execute(self):
+        limit = next(args[0] for name, args in self.calls if name == "limit")
+        return type("Response", (), {"data": self.rows[:limit]})()
+
+
+def test_cursor_round_trip():
+    cursor = encode_cursor("2026-10-18T12:00:00+00:00", LOG_ID)
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == ("2026-10-18T12:00:00+00:00", LOG_ID)
+
+
+@pytest.mark.parametrize("value", [
+    ["2026-10-18T12:00:00+00:00\",id.gt.0", LOG_ID],
+    ["2026-10-18T12:00:00+00:00", "not-a-uuid"],
+    [1, LOG_ID],
+    ["2026-10-18T12:00:00+00:00"],
+    {"logged_at": "2026-10-18T12:00:00+00:00"},
+])
+def test_cursor_rejects_bad_values(value):
+    with pytest.raises(ValueError):
+        decode_cursor(raw_cursor(value))
+
+
+@pytest.mark.parametrize("cursor", ["", "%%%", "bm90IGpzb24"])
+def test_cursor_rejects_garbage(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
+
+
+def test_projection_keeps_cursor_columns_out_of_the_response():
+    columns = parse_fields(" detected_food_name, calories ,")
+    assert columns == ["detected_food_name", "calories"]
+    assert build_select(columns) == "detected_food_name,calories,logged_at,id"
+    assert build_select(None) == "*"
+    rows = [{"detected_food_name": "apple", "calories": 80, "logged_at": "2026-10-18", "id": LOG_ID}]
+    assert project_rows(rows, columns) == [{"detected_food_name": "apple", "calories": 80}]
+    assert parse_fields("") is None
+    with pytest.raises(ValueError):
+        parse_fields("calories,password")
+
+
+def test_page_seeks_past_the_cursor_and_returns_the_next_one():
+    rows = [
+        {"id": f"0b6f3c1e-8d2a-4c57-9e0f-2a1b3c4d5e6{i}", "logged_at": f"2026-10-1{9 - i}T12:00:00+00:00"}
+        for i in range(3)
+    ]
+    query = RecordingQuery(rows)
+    service = FoodService()
+    service._get_supabase = lambda: type("Client", (), {"table": lambda self, name: query})()
+    cursor = encode_cursor("2026-10-20T08:00:00+00:00", LOG_ID)
+
+    page = asyncio.run(service.get_food_logs_page("user", limit=2, cursor=cursor))
+
+    assert page["logs"] == rows[:2]
+    assert decode_cursor(page["next_cursor"]) == (rows[1]["logged_at"], rows[1]["id"])
+    assert ("or_", (
+        f'logged_at.lt."2026-10-20T08:00:00+00:00",and(logged_at.eq."2026-10-20T08:00:00+00:00",id.lt.{LOG_ID})',
+    )) in query.calls
+
+    last = asyncio.run(service.get_food_logs_page("user", limit=3))
+    assert last["next_cursor"] is None
+
+
+def test_search_cursor_round_trip():
+    cursor = encode_search_cursor(0.4705882, "2026-10-18T12:00:00+00:00", LOG_ID)
+    assert decode_search_cursor(cursor) == (0.4705882, "2026-10-18T12:00:00+00:00", LOG_ID)
+
+
+@pytest.mark.parametrize("value", [
+    ["high", "2026-10-18T12:00:00+00:00", LOG_ID],
+    [True, "2026-10-18T12:00:00+00:00", LOG_ID],
+    [0.5, "yesterday", LOG_ID],
+    [0.5, "2026-10-18T12:00:00+00:00", "1) or (true"],
+    [0.5, "2026-10-18T12:00:00+00:00"],
+])
+def test_search_cursor_rejects_bad_values(value):
+    with pytest.raises(ValueError):
+        decode_search_cursor(raw_cursor(value))
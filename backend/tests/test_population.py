@@ -0,0 +1,99 @@
+import asyncio
+from datetime import date, datetime, timedelta, timezone
+import pytest
+from services.population_service import PopulationAnalyticsService
+
+
+def log(day, category, meal_type, score=None, calories=None):
+    return {
+        "logged_at": f"{day}T12:00:00+00:00", "food_category": category,
+        "meal_type": meal_type, "healthiness_score": score, "calories": calories,
+    }
+
+
+def summary(user_id, day, completion, **groups):
+    return {"user_id": user_id, "date": day, "completion_percentage": completion, "total_calories": 0, **groups}
+
+
+@pytest.fixture
+def population():
+    service = PopulationAnalyticsService()
+    service._logs = service._log_columns([
+        log("2026-10-05", "fruit", "breakfast", 90, 80),     # Monday
+        log("2026-10-05", "fruit", "snack", 70, None),
+        log("2026-10-06", "grain", "lunch", None, None),
+        log("2026-11-02", "protein", None, 40, 300),         # Monday, unknown meal type
+        log("2026-11-03", "pastry", "dinner", 10, 500),      # unknown category
+    ])
+    service._summaries = service._summary_columns([
+        summary("a", "2026-10-05", 100, fruits_count=1, dairy_count=1),
+        summary("b", "2026-10-05", 20, fruits_count=0),
+        summary("a", "2026-10-06", 40, fruits_count=2),
+    ])
+    service._snapshot_at = service._full_at = datetime.now(timezone.utc)
+    return service
+
+
+def groups(result):
+    return {group.pop("group"): group for group in result["groups"]}
+
+
+def test_metric_stats_skip_missing_values(population):
+    result = groups(asyncio.run(population.aggregate("food_logs", "food_category", "healthiness_score")))
+    assert result["fruit"] == {"count": 2, "mean": 80.0, "sum": 160.0, "min": 70.0, "max": 90.0}
+    assert result["grain"] == {"count": 1, "mean": None, "sum": 0.0, "min": None, "max": None}
+    assert result["unknown"]["count"] == 1
+    assert "vegetable" not in result
+
+
+def test_group_by_weekday_month_and_date_range(population):
+    weekdays = groups(asyncio.run(population.aggregate("food_logs", "weekday")))
+    assert {label: group["count"] for label, group in weekdays.items()} == {"monday": 3, "tuesday": 2}
+
+    months = groups(asyncio.run(population.aggregate("food_logs", "month", "calories")))
+    assert months["2026-10"]["sum"] == 80.0
+    assert months["2026-11"]["mean"] == 400.0
+
+    november = groups(asyncio.run(population.aggregate(
+        "food_logs", "meal_type", start_date=date(2026, 11, 1), end_date=date(2026, 11, 30)
+    )))
+    assert {label: group["count"] for label, group in november.items()} == {"dinner": 1, "unknown": 1}
+
+
+def test_summary_completion_buckets_and_weekday_coverage(population):
+    buckets = groups(asyncio.run(population.aggregate("daily_summaries", "completion_percentage")))
+    assert {label: group["count"] for label, group in buckets.items()} == {"20": 1, "40": 1, "100": 1}
+
+    coverage = {row["weekday"]: row for row in asyncio.run(population.coverage_by_weekday())["groups"]}
+    assert coverage["monday"]["days"] == 2
+    assert coverage["monday"]["fruits"] == 0.5
+    assert coverage["monday"]["dairy"] == 0.5
+    assert coverage["tuesday"]["fruits"] == 1.0
+    assert coverage["sunday"] == {"weekday": "sunday", "days": 0, "fruits": 0.0, "vegetables": 0.0,
+                                  "protein": 0.0, "dairy": 0.0, "grains": 0.0}
+
+
+@pytest.mark.parametrize("table, group_by, metric", [
+    ("users", "weekday", None),
+    ("food_logs", "completion_percentage", None),
+    ("daily_summaries", "weekday", "healthiness_score"),
+])
+def test_unsupported_queries_are_rejected(population, table, group_by, metric):
+    with pytest.raises(ValueError):
+        asyncio.run(population.aggregate(table, group_by, metric))
+
+
+def test_incremental_refresh_appends_logs_and_reloads_recent_summaries(population, monkeypatch):
+    today = date.today()
+    recent = (today - timedelta(days=1)).isoformat()
+    population._summaries = population._summary_columns([
+        summary("a", "2026-01-01", 100), summary("a", recent, 20),
+    ])
+    monkeypatch.setattr(population, "_fetch_logs", lambda after: ([log(today.isoformat(), "dairy", "lunch")], None))
+    monkeypatch.setattr(population, "_fetch_summaries", lambda since: [summary("a", recent, 60)])
+
+    report = population.refresh()
+
+    assert report["full"] is False
+    assert report["logs_total"] == 6
+    assert sorted(population._summaries["completion_percentage"].tolist()) == [60, 100]
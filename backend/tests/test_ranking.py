@@ -0,0 +1,71 @@
+import asyncio
+import random
+from datetime import date
+import pytest
+from services.leaderboard_service import LeaderboardService
+from utils.ranking import RankedSet
+
+
+def expected_order(scores):
+    return sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_ranked_set_matches_a_sorted_list(seed):
+    rng = random.Random(seed)
+    ranked = RankedSet(seed=seed)
+    scores = {}
+    for _ in range(500):
+        member = f"user-{rng.randrange(60):02d}"
+        if rng.random() < 0.2:
+            ranked.discard(member)
+            scores.pop(member, None)
+        else:
+            score = rng.randrange(10)
+            ranked.set(member, score)
+            scores[member] = score
+
+    order = expected_order(scores)
+    assert len(ranked) == len(scores)
+    assert ranked.slice(0, len(order)) == order
+    for position, (member, score) in enumerate(order):
+        assert ranked.position(member) == position
+        assert ranked.score(member) == score
+        assert ranked.count_above(score) == sum(1 for other in scores.values() if other > score)
+    start = rng.randrange(len(order) + 1)
+    assert ranked.slice(start, start + 7) == order[start:start + 7]
+
+
+def test_ranked_set_edges():
+    ranked = RankedSet(seed=0)
+    assert ranked.slice(0, 10) == []
+    assert ranked.position("missing") is None
+    ranked.set("a", 3)
+    ranked.set("b", 3)
+    ranked.discard("missing")
+    assert ranked.slice(-5, 100) == [("a", 3), ("b", 3)]
+    assert ranked.count_above(3) == 0
+    assert ranked.count_above(2) == 2
+
+
+def test_leaderboard_ranks_ties_and_drops_stale_streaks():
+    leaderboard = LeaderboardService()
+    leaderboard._loaded = True
+    today = date.today()
+    leaderboard.update("a", 5, 9, today)
+    leaderboard.update("b", 3, 3, today)
+    leaderboard.update("c", 3, 4, today)
+    leaderboard.update("d", 1, 1, today)
+    leaderboard.update("e", 7, 7, date(2020, 1, 1))
+
+    top = asyncio.run(leaderboard.top("current", 10))
+    assert [(entry["rank"], entry["user_id"]) for entry in top] == [(1, "a"), (2, "b"), (2, "c"), (4, "d")]
+
+    around = asyncio.run(leaderboard.around("c", "current", k=1))
+    assert around["rank"] == 2
+    assert [(entry["rank"], entry["user_id"]) for entry in around["entries"]] == [(2, "b"), (2, "c"), (4, "d")]
+
+    assert asyncio.run(leaderboard.around("e", "current")) == {"rank": None, "streak": 0, "entries": []}
+    assert [entry["user_id"] for entry in asyncio.run(leaderboard.top("longest", 2))] == ["a", "e"]
+    with pytest.raises(ValueError):
+        asyncio.run(leaderboard.top("weekly"))
@@ -0,0 +1,80 @@
+import asyncio
+import pytest
+from utils.singleflight import SingleFlight
+
+
+def test_concurrent_calls_share_one_execution():
+    flight = SingleFlight("test-share")
+    executions = []
+
+    async def read():
+        executions.append(1)
+        await asyncio.sleep(0.01)
+        return {"streak": 3}
+
+    async def scenario():
+        results = await asyncio.gather(*(flight.do("user", read) for _ in range(5)))
+        later = await flight.do("user", read)
+        return results, later
+
+    results, later = asyncio.run(scenario())
+    assert results == [{"streak": 3}] * 5
+    assert later == {"streak": 3}
+    assert len(executions) == 2
+    assert flight.stats()["coalesced"] == 4
+    assert flight.stats()["in_flight"] == 0
+
+
+def test_errors_reach_every_waiter():
+    flight = SingleFlight("test-errors")
+
+    async def read():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("db down")
+
+    async def scenario():
+        return await asyncio.gather(*(flight.do("user", read) for _ in range(3)), return_exceptions=True)
+
+    results = asyncio.run(scenario())
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+
+def test_cancelled_follower_does_not_cancel_the_leader():
+    flight = SingleFlight("test-cancel")
+
+    async def read():
+        await asyncio.sleep(0.02)
+        return "value"
+
+    async def scenario():
+        leader = asyncio.create_task(flight.do("user", read))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(flight.do("user", read))
+        await asyncio.sleep(0)
+        follower.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await follower
+        return await leader
+
+    assert asyncio.run(scenario()) == "value"
+
+
+def test_forget_starts_a_new_execution():
+    flight = SingleFlight("test-forget")
+    reads = []
+
+    async def read():
+        reads.append(len(reads))
+        number = len(reads)
+        await asyncio.sleep(0.01)
+        return number
+
+    async def scenario():
+        first = asyncio.create_task(flight.do("user", read))
+        await asyncio.sleep(0)
+        flight.forget("user")  # e.g. a write landed while the first read was running
+        second = asyncio.create_task(flight.do("user", read))
+        return await first, await second
+
+    assert asyncio.run(scenario()) == (1, 2)
+    assert flight.stats()["in_flight"] == 0
@@ -0,0 +1,95 @@
+import asyncio
+import random
+from datetime import date, timedelta
+import pytest
+from services.nutrition_service import NutritionService
+
+
+START = date(2026, 1, 1)
+
+
+def days(*offsets):
+    return [START + timedelta(days=offset) for offset in offsets]
+
+
+@pytest.mark.parametrize("complete_days, expected", [
+    ([], (0, 0, None)),
+    (days(0), (1, 1, START)),
+    (days(0, 1, 2, 5, 6), (2, 3, START + timedelta(days=6))),
+    (days(0, 2, 3, 4, 5), (4, 4, START + timedelta(days=5))),
+])
+def test_streak_from_days(complete_days, expected):
+    assert NutritionService().streak_from_days(complete_days) == expected
+
+
+class StreakHarness:
+    """NutritionService whose streak row lives in memory instead of Supabase"""
+
+    def __init__(self, monkeypatch):
+        self.service = NutritionService()
+        self.complete = set()
+        self.row = {}
+        self.recomputes = 0
+        monkeypatch.setattr(self.service, "_save_streak", self.save)
+        monkeypatch.setattr(self.service, "recompute_streak", self.recompute)
+
+    def save(self, user_id, current, longest, last):
+        self.row = {
+            "current_streak": current,
+            "longest_streak": longest,
+            "last_logged_date": last.isoformat() if last else None,
+        }
+        return {}
+
+    async def recompute(self, user_id):
+        self.recomputes += 1
+        return self.save(user_id, *self.service.streak_from_days(sorted(self.complete)))
+
+    def set_day(self, day, complete):
+        was_complete = day in self.complete
+        if complete:
+            self.complete.add(day)
+        else:
+            self.complete.discard(day)
+        asyncio.run(self.service.record_day_completion(
+            "user", day, complete, was_complete=was_complete, streak_row=dict(self.row)
+        ))
+
+    def state(self):
+        last = self.row.get("last_logged_date")
+        return (
+            self.row.get("current_streak") or 0,
+            self.row.get("longest_streak") or 0,
+            date.fromisoformat(last) if last else None,
+        )
+
+
+def test_extending_the_run_needs_no_recompute(monkeypatch):
+    harness = StreakHarness(monkeypatch)
+    for day in days(0, 1, 2, 4, 5):
+        harness.set_day(day, True)
+
+    assert harness.state() == (2, 3, START + timedelta(days=5))
+    assert harness.recomputes == 0
+
+
+def test_uncompleting_inside_a_shorter_run_splits_it_in_place(monkeypatch):
+    harness = StreakHarness(monkeypatch)
+    for day in days(0, 1, 2, 3, 4, 10, 11, 12):
+        harness.set_day(day, True)
+
+    harness.set_day(START + timedelta(days=11), False)
+    assert harness.state() == (1, 5, START + timedelta(days=12))
+    harness.set_day(START + timedelta(days=12), False)
+    assert harness.recomputes == 1
+    assert harness.state() == (1, 5, START + timedelta(days=10))
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_incremental_updates_match_a_full_recompute(monkeypatch, seed):
+    rng = random.Random(seed)
+    harness = StreakHarness(monkeypatch)
+    for _ in range(60):
+        day = START + timedelta(days=rng.randrange(15))
+        harness.set_day(day, rng.random() < 0.7)
+        assert harness.state() == harness.service.streak_from_days(sorted(harness.complete))
@@ -0,0 +1,54 @@
+import asyncio
+from services.summary_rebuild_service import SummaryRebuildService
+
+
+def rebuild(logs, summaries):
+    """Run a rebuild over in-memory logs and existing summary days, returning the upserted rows"""
+    service = SummaryRebuildService(batch_size=2, concurrency=1)
+    service.iter_food_logs = lambda after_user_id=None: iter(logs)
+    service.iter_summary_days = lambda since, after_user_id=None: iter(summaries)
+    written = []
+
+    async def upsert(table, rows, on_conflict):
+        written.extend(dict(row) for row in rows)
+
+    service._upsert_batches = upsert
+    report = asyncio.run(service.rebuild())
+    return report, {(row["user_id"], row["date"]): row for row in written}
+
+
+def log(user_id, day, category, calories=100):
+    return {"user_id": user_id, "logged_at": f"{day}T12:00:00+00:00", "food_category": category, "calories": calories}
+
+
+def test_summaries_are_built_per_user_and_day():
+    report, written = rebuild(
+        [log("a", "2026-10-01", "fruit"), log("a", "2026-10-01", "dairy"), log("a", "2026-10-01", "other"),
+         log("a", "2026-10-02", "grain"), log("b", "2026-10-01", "protein")],
+        [],
+    )
+    assert report["logs_scanned"] == 5
+    assert written[("a", "2026-10-01")]["log_count"] == 3
+    assert written[("a", "2026-10-01")]["fruits_count"] == 1
+    assert written[("a", "2026-10-01")]["dairy_count"] == 1
+    assert written[("a", "2026-10-01")]["total_calories"] == 300
+    assert written[("a", "2026-10-02")]["grains_count"] == 1
+    assert written[("b", "2026-10-01")]["completion_percentage"] == 20
+
+
+def test_days_without_logs_are_zeroed():
+    summaries = [
+        {"user_id": "a", "date": "2026-10-01"},
+        {"user_id": "a", "date": "2026-10-05"},  # logs deleted
+        {"user_id": "b", "date": "2026-10-03"},  # user has no logs left
+        {"user_id": "c", "date": "2026-10-01"},
+        {"user_id": "d", "date": "2026-10-02"},  # after the last user with logs
+    ]
+    report, written = rebuild([log("a", "2026-10-01", "fruit"), log("c", "2026-10-01", "grain")], summaries)
+
+    assert report["summaries_zeroed"] == 3
+    assert written[("a", "2026-10-01")]["fruits_count"] == 1
+    assert written[("c", "2026-10-01")]["grains_count"] == 1
+    for key in [("a", "2026-10-05"), ("b", "2026-10-03"), ("d", "2026-10-02")]:
+        assert written[key]["completion_percentage"] == 0
+        assert written[key]["total_calories"] == 0
@@ -0,0 +1,49 @@
+import asyncio
+import hashlib
+import io
+import pytest
+from fastapi import UploadFile
+from utils.exceptions import PayloadTooLargeError, UnsupportedMediaTypeError
+from utils.uploads import UPLOAD_CHUNK_SIZE, read_image_upload, sniff_image_type
+
+
+PNG = b"\x89PNG\r\n\x1a\n" + b"\x00" * 8
+
+
+def upload(data, size=None):
+    return UploadFile(io.BytesIO(data), size=size, filename="meal.png")
+
+
+@pytest.mark.parametrize("header, expected", [
+    (b"\xff\xd8\xff\xe0" + b"\x00" * 12, ("image/jpeg", "jpg")),
+    (PNG, ("image/png", "png")),
+    (b"GIF89a" + b"\x00" * 10, ("image/gif", "gif")),
+    (b"RIFF\x00\x00\x00\x00WEBPVP8 ", ("image/webp", "webp")),
+    (b"RIFF\x00\x00\x00\x00WAVEfmt ", None),
+    (b"<svg xmlns=", None),
+])
+def test_sniff_image_type(header, expected):
+    assert sniff_image_type(header) == expected
+
+
+def test_reads_and_hashes_a_multi_chunk_upload():
+    data = PNG + b"x" * (UPLOAD_CHUNK_SIZE * 2)
+    image = asyncio.run(read_image_upload(upload(data), max_bytes=len(data)))
+    assert image.data == data
+    assert image.size == len(data)
+    assert image.content_hash == hashlib.sha256(data).hexdigest()
+    assert (image.content_type, image.file_extension) == ("image/png", "png")
+
+
+def test_rejects_oversized_uploads_with_or_without_a_declared_size():
+    data = PNG + b"x" * UPLOAD_CHUNK_SIZE
+    with pytest.raises(PayloadTooLargeError):
+        asyncio.run(read_image_upload(upload(data, size=len(data)), max_bytes=1024))
+    with pytest.raises(PayloadTooLargeError):
+        asyncio.run(read_image_upload(upload(data), max_bytes=len(data) - 1))
+
+
+@pytest.mark.parametrize("data", [b"", b"%PDF-1.7 not an image"])
+def test_rejects_empty_and_non_image_uploads(data):
+    with pytest.raises(UnsupportedMediaTypeError):
+        asyncio.run(read_image_upload(upload(data)))
@@ -0,0 +1,98 @@
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+from collections import OrderedDict
+import time
+
+
+class ReadThroughCache:
+    """
+    Bounded in-process read-through cache with TTL and stale fallback
+
+    Entries are served while fresh (ttl_seconds). Expired or invalidated
+    entries are reloaded on the next read, but kept for stale_seconds so
+    that a read can still be answered from them when the loader fails.
+    Least recently used entries are evicted beyond max_entries.
+    """
+
+    def __init__(self, max_entries: int = 10000, ttl_seconds: float = 30, stale_seconds: float = 600):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.stale_seconds = stale_seconds
+        # key -> (value, fresh until, keep until)
+        self._entries: "OrderedDict[Hashable, Tuple[Any, float, float]]" = OrderedDict()
+        self._stats = {"hits": 0, "misses": 0, "stale_served": 0, "load_errors": 0, "invalidations": 0, "evictions": 0}
+        # Keys being loaded (with reader counts) and the invalidations that hit them mid-load
+        self._loading: Dict[Hashable, int] = {}
+        self._invalidated: Dict[Hashable, int] = {}
+        self._generation = 0
+
+    async def get(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Return the cached value for key, loading it on a miss
+
+        Args:
+            key: Cache key
+            loader: Coroutine function fetching the current value
+
+        Returns:
+            Cached or freshly loaded value
+
+        Raises:
+            Whatever the loader raises, when there is no stale value to fall back on
+        """
+        now = time.monotonic()
+        entry = self._entries.get(key)
+        if entry is not None and entry[1] > now:
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            return entry[0]
+
+        self._stats["misses"] += 1
+        started = self._generation
+        self._loading[key] = self._loading.get(key, 0) + 1
+        try:
+            value = await loader()
+        except Exception:
+            self._stats["load_errors"] += 1
+            if entry is not None and entry[2] > now:
+                self._stats["stale_served"] += 1
+                return entry[0]
+            raise
+        finally:
+            invalidated = self._invalidated.get(key, 0) > started
+            self._loading[key] -= 1
+            if not self._loading[key]:
+                del self._loading[key]
+                self._invalidated.pop(key, None)
+
+        # A load that raced with a write may have read the old row; don't keep it
+        if not invalidated:
+            self.set(key, value)
+        return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Store a fresh value for key"""
+        now = time.monotonic()
+        self._entries[key] = (value, now + self.ttl_seconds, now + self.ttl_seconds + self.stale_seconds)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._stats["evictions"] += 1
+
+    def invalidate(self, key: Hashable) -> None:
+        """Force the next read of key to reload (the old value is kept as a stale fallback)"""
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries[key] = (entry[0], 0.0, entry[2])
+        if key in self._loading:
+            self._generation += 1
+            self._invalidated[key] = self._generation
+        self._stats["invalidations"] += 1
+
+    def stats(self) -> Dict:
+        """Counters plus current size and hit rate"""
+        lookups = self._stats["hits"] + self._stats["misses"]
+        return {
+            **self._stats,
+            "size": len(self._entries),
+            "hit_rate": round(self._stats["hits"] / lookups, 4) if lookups else 0.0,
+        }
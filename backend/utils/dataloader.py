@@ -0,0 +1,95 @@
+from typing import Awaitable, Callable, Dict, Generic, Hashable, List, Optional, Set, TypeVar
+import asyncio
+
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+# Every BatchLoader created, by name, for metrics
+_loaders: Dict[str, "BatchLoader"] = {}
+
+
+class BatchLoader(Generic[K, V]):
+    """
+    DataLoader-style batching of per-key lookups
+
+    Keys requested during the same event loop tick (typically by many
+    concurrent requests) are collected and fetched with one call to
+    batch_fn, e.g. a single in_("user_id", [...]) query, and each caller
+    gets its own key's value back.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        batch_fn: Callable[[List[K]], Awaitable[Dict[K, V]]],
+        max_batch_size: int = 100,
+    ):
+        self.name = name
+        self.batch_fn = batch_fn
+        self.max_batch_size = max_batch_size
+        self._pending: Dict[K, asyncio.Future] = {}
+        self._scheduled = False
+        self._tasks: Set[asyncio.Task] = set()
+        self._stats = {"loads": 0, "keys": 0, "batches": 0}
+        _loaders[name] = self
+
+    async def load(self, key: K) -> Optional[V]:
+        """
+        Fetch one key's value as part of the next batch
+
+        Args:
+            key: Key to look up
+
+        Returns:
+            The value batch_fn returned for key, or None if it returned none
+        """
+        self._stats["loads"] += 1
+        future = self._pending.get(key)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = loop.create_future()
+            # Consume the exception even if every caller has gone away
+            future.add_done_callback(lambda f: f.cancelled() or f.exception())
+            self._pending[key] = future
+            if not self._scheduled:
+                self._scheduled = True
+                loop.call_soon(self._dispatch)
+        return await asyncio.shield(future)
+
+    def _dispatch(self) -> None:
+        """Send everything collected this tick, in batches of max_batch_size"""
+        pending, self._pending = self._pending, {}
+        self._scheduled = False
+        keys = list(pending)
+        for i in range(0, len(keys), self.max_batch_size):
+            task = asyncio.create_task(self._run({k: pending[k] for k in keys[i:i + self.max_batch_size]}))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, futures: Dict[K, asyncio.Future]) -> None:
+        self._stats["batches"] += 1
+        self._stats["keys"] += len(futures)
+        try:
+            results = await self.batch_fn(list(futures))
+        except Exception as e:
+            for future in futures.values():
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for key, future in futures.items():
+            if not future.done():
+                future.set_result(results.get(key))
+
+    def stats(self) -> Dict:
+        """Load, key and batch counters with the average batch size"""
+        batches = self._stats["batches"]
+        return {
+            **self._stats,
+            "average_batch_size": round(self._stats["keys"] / batches, 2) if batches else 0.0,
+        }
+
+
+def dataloader_stats() -> Dict[str, Dict]:
+    """Stats of every BatchLoader, by name"""
+    return {name: loader.stats() for name, loader in _loaders.items()}
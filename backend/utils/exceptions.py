@@ -46,3 +46,20 @@ class ServerError(HTTPException):
             detail=detail,
         )
 
+
+class PayloadTooLargeError(HTTPException):
+    """Raised when an uploaded file exceeds the size limit"""
+    def __init__(self, detail: str = "Payload too large"):
+        super().__init__(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=detail,
+        )
+
+
+class UnsupportedMediaTypeError(HTTPException):
+    """Raised when an uploaded file is not of an accepted type"""
+    def __init__(self, detail: str = "Unsupported media type"):
+        super().__init__(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail=detail,
+        )
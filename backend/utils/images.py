@@ -0,0 +1,41 @@
+from typing import Dict, Tuple
+import io
+from PIL import Image, ImageOps
+
+
+# Longest-edge size and WebP quality of each derivative
+DERIVATIVE_SPECS: Dict[str, Tuple[int, int]] = {
+    "thumb": (200, 70),
+    "medium": (800, 80),
+}
+
+
+def render_derivatives(image_data: bytes) -> Dict[str, bytes]:
+    """
+    Render downscaled WebP versions of an image
+
+    This is CPU-bound; call it through asyncio.to_thread from request handlers.
+
+    Args:
+        image_data: Original image bytes
+
+    Returns:
+        Dict mapping derivative name (thumb, medium) to WebP bytes
+    """
+    with Image.open(io.BytesIO(image_data)) as original:
+        image = ImageOps.exif_transpose(original)
+        if image.mode not in ("RGB", "RGBA"):
+            # Palette images carry transparency in info rather than an alpha band
+            transparent = "A" in image.getbands() or "transparency" in image.info
+            image = image.convert("RGBA" if transparent else "RGB")
+
+        derivatives = {}
+        for name, (max_edge, quality) in DERIVATIVE_SPECS.items():
+            resized = image.copy()
+            resized.thumbnail((max_edge, max_edge), Image.LANCZOS)
+
+            output = io.BytesIO()
+            resized.save(output, format="WEBP", quality=quality, method=4)
+            derivatives[name] = output.getvalue()
+
+        return derivatives
@@ -0,0 +1,170 @@
+import base64
+import json
+from datetime import datetime
+from uuid import UUID
+from typing import Dict, List, Optional, Tuple
+
+
+# Columns clients may request through the `fields` projection parameter
+FOOD_LOG_COLUMNS = [
+    "id",
+    "user_id",
+    "image_url",
+    "thumbnail_url",
+    "medium_url",
+    "detected_food_name",
+    "food_category",
+    "healthiness_score",
+    "calories",
+    "meal_type",
+    "logged_at",
+    "created_at",
+]
+
+# Columns always selected because the keyset cursor is built from them
+CURSOR_COLUMNS = ["logged_at", "id"]
+
+
+def encode_cursor(logged_at: str, log_id: str) -> str:
+    """
+    Encode a keyset position into an opaque cursor string
+
+    Args:
+        logged_at: logged_at timestamp of the last row on the page
+        log_id: id of the last row on the page
+
+    Returns:
+        URL-safe cursor string
+    """
+    raw = json.dumps([logged_at, log_id], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, str]:
+    """
+    Decode an opaque cursor back into its keyset position
+
+    The values are interpolated into a PostgREST filter, so only an
+    ISO-8601 timestamp and a UUID are accepted.
+
+    Args:
+        cursor: Cursor string previously returned by encode_cursor
+
+    Returns:
+        Tuple of (logged_at, id)
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        logged_at, log_id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        if not isinstance(logged_at, str) or not isinstance(log_id, str):
+            raise ValueError
+        datetime.fromisoformat(logged_at)
+        UUID(log_id)
+        return logged_at, log_id
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+
+def encode_search_cursor(score: float, logged_at: str, log_id: str) -> str:
+    """
+    Encode a position in ranked search results into an opaque cursor string
+
+    Args:
+        score: Relevance score of the last result on the page
+        logged_at: logged_at timestamp of the last result on the page
+        log_id: id of the last result on the page
+
+    Returns:
+        URL-safe cursor string
+    """
+    raw = json.dumps([score, logged_at, log_id], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_search_cursor(cursor: str) -> Tuple[float, str, str]:
+    """
+    Decode a search cursor back into its (score, logged_at, id) position
+
+    Args:
+        cursor: Cursor string previously returned by encode_search_cursor
+
+    Returns:
+        Tuple of (score, logged_at, id)
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        score, logged_at, log_id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        if isinstance(score, bool) or not isinstance(score, (int, float)):
+            raise ValueError
+        if not isinstance(logged_at, str) or not isinstance(log_id, str):
+            raise ValueError
+        datetime.fromisoformat(logged_at)
+        UUID(log_id)
+        return float(score), logged_at, log_id
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+
+def parse_fields(fields: Optional[str]) -> Optional[List[str]]:
+    """
+    Parse a comma-separated `fields` parameter into a list of columns
+
+    Args:
+        fields: Comma-separated column names, or None for all columns
+
+    Returns:
+        List of requested columns, or None when no projection was requested
+
+    Raises:
+        ValueError: If an unknown column is requested
+    """
+    if not fields:
+        return None
+
+    columns = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = [c for c in columns if c not in FOOD_LOG_COLUMNS]
+    if unknown:
+        raise ValueError(
+            f"Unknown fields: {', '.join(unknown)}. Allowed: {', '.join(FOOD_LOG_COLUMNS)}"
+        )
+    return columns or None
+
+
+def build_select(columns: Optional[List[str]]) -> str:
+    """
+    Build the PostgREST select clause for a projection
+
+    The cursor columns are always included so the next page can be located.
+
+    Args:
+        columns: Requested columns, or None for all columns
+
+    Returns:
+        Select clause string
+    """
+    if not columns:
+        return "*"
+    selected = list(dict.fromkeys(columns + CURSOR_COLUMNS))
+    return ",".join(selected)
+
+
+def project_rows(rows: List[Dict], columns: Optional[List[str]]) -> List[Dict]:
+    """
+    Drop cursor-only columns the client did not ask for
+
+    Args:
+        rows: Rows as returned by Supabase
+        columns: Requested columns, or None for all columns
+
+    Returns:
+        Rows containing only the requested columns
+    """
+    if not columns:
+        return rows
+    return [{c: row.get(c) for c in columns} for row in rows]
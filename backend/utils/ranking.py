@@ -0,0 +1,145 @@
+from typing import Dict, Hashable, List, Optional, Tuple
+import math
+import random
+
+
+class _Node:
+    __slots__ = ("key", "next", "width")
+
+    def __init__(self, key, levels: int):
+        self.key = key
+        self.next: List[Optional["_Node"]] = [None] * levels
+        # width[level]: positions skipped by following next[level]
+        self.width: List[int] = [1] * levels
+
+
+class RankedSet:
+    """
+    Members ordered by score (highest first) with O(log n) rank queries
+
+    An indexable skip list: every link stores how many positions it skips,
+    so updating a score, finding a member's position and reading the
+    members at positions i..j all take O(log n) (plus the members read).
+    Equal scores are ordered by member.
+    """
+
+    MAX_LEVELS = 24  # Enough for ~16M members
+
+    def __init__(self, seed: Optional[int] = None):
+        self._random = random.Random(seed)
+        self._head = _Node(None, self.MAX_LEVELS)
+        self._scores: Dict[Hashable, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._scores)
+
+    def __contains__(self, member: Hashable) -> bool:
+        return member in self._scores
+
+    def score(self, member: Hashable) -> Optional[int]:
+        """Member's score, or None if absent"""
+        return self._scores.get(member)
+
+    def set(self, member: Hashable, score: int) -> None:
+        """Add a member or change its score"""
+        old = self._scores.get(member)
+        if old == score:
+            return
+        if old is not None:
+            self._remove((-old, member))
+        self._insert((-score, member))
+        self._scores[member] = score
+
+    def discard(self, member: Hashable) -> None:
+        """Remove a member if present"""
+        old = self._scores.pop(member, None)
+        if old is not None:
+            self._remove((-old, member))
+
+    def position(self, member: Hashable) -> Optional[int]:
+        """Zero-based position of a member, or None if absent"""
+        score = self._scores.get(member)
+        if score is None:
+            return None
+        return self._count_before((-score, member))
+
+    def count_above(self, score: int) -> int:
+        """Number of members with a strictly higher score"""
+        position = 0
+        node = self._head
+        for level in reversed(range(self.MAX_LEVELS)):
+            while node.next[level] is not None and -node.next[level].key[0] > score:
+                position += node.width[level]
+                node = node.next[level]
+        return position
+
+    def slice(self, start: int, stop: int) -> List[Tuple[Hashable, int]]:
+        """(member, score) pairs at positions start..stop-1"""
+        start = max(start, 0)
+        stop = min(stop, len(self._scores))
+        if start >= stop:
+            return []
+
+        # Walk down to the node at position start (the head is position -1)
+        node = self._head
+        remaining = start + 1
+        for level in reversed(range(self.MAX_LEVELS)):
+            while node.next[level] is not None and node.width[level] <= remaining:
+                remaining -= node.width[level]
+                node = node.next[level]
+
+        items = []
+        while node is not None and len(items) < stop - start:
+            items.append((node.key[1], -node.key[0]))
+            node = node.next[0]
+        return items
+
+    def _count_before(self, key: Tuple) -> int:
+        position = 0
+        node = self._head
+        for level in reversed(range(self.MAX_LEVELS)):
+            while node.next[level] is not None and node.next[level].key < key:
+                position += node.width[level]
+                node = node.next[level]
+        return position
+
+    def _insert(self, key: Tuple) -> None:
+        chain: List[_Node] = [self._head] * self.MAX_LEVELS
+        steps = [0] * self.MAX_LEVELS
+        node = self._head
+        for level in reversed(range(self.MAX_LEVELS)):
+            while node.next[level] is not None and node.next[level].key < key:
+                steps[level] += node.width[level]
+                node = node.next[level]
+            chain[level] = node
+
+        levels = min(self.MAX_LEVELS, 1 - int(math.log(1.0 - self._random.random(), 2.0)))
+        new = _Node(key, levels)
+        skipped = 0
+        for level in range(levels):
+            prev = chain[level]
+            new.next[level] = prev.next[level]
+            prev.next[level] = new
+            new.width[level] = prev.width[level] - skipped
+            prev.width[level] = skipped + 1
+            skipped += steps[level]
+        for level in range(levels, self.MAX_LEVELS):
+            chain[level].width[level] += 1
+
+    def _remove(self, key: Tuple) -> None:
+        chain: List[_Node] = [self._head] * self.MAX_LEVELS
+        node = self._head
+        for level in reversed(range(self.MAX_LEVELS)):
+            while node.next[level] is not None and node.next[level].key < key:
+                node = node.next[level]
+            chain[level] = node
+
+        target = chain[0].next[0]
+        if target is None or target.key != key:
+            return
+        for level in range(len(target.next)):
+            prev = chain[level]
+            prev.width[level] += target.width[level] - 1
+            prev.next[level] = target.next[level]
+        for level in range(len(target.next), self.MAX_LEVELS):
+            chain[level].width[level] -= 1
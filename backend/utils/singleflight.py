@@ -0,0 +1,80 @@
+from typing import Awaitable, Callable, Dict, Hashable, TypeVar
+import asyncio
+
+
+T = TypeVar("T")
+
+# Every SingleFlight created, by name, for metrics
+_groups: Dict[str, "SingleFlight"] = {}
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls for the same key into one execution
+
+    The first caller for a key runs the operation; callers arriving while it
+    is in flight await the same result (or exception) instead of issuing
+    their own query. Nothing is cached once the call completes.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self._stats = {"calls": 0, "executions": 0, "coalesced": 0}
+        _groups[name] = self
+
+    async def do(self, key: Hashable, operation: Callable[[], Awaitable[T]]) -> T:
+        """
+        Run operation for key, or join the call already in flight
+
+        Args:
+            key: Identity of the read (e.g. user_id)
+            operation: Coroutine function performing the read
+
+        Returns:
+            The operation's result
+        """
+        self._stats["calls"] += 1
+        future = self._inflight.get(key)
+        if future is not None:
+            self._stats["coalesced"] += 1
+            # Shielded so one follower giving up does not cancel the shared call
+            return await asyncio.shield(future)
+
+        self._stats["executions"] += 1
+        future = asyncio.get_running_loop().create_future()
+        # Consume the exception even when nobody joined the call
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        self._inflight[key] = future
+        try:
+            result = await operation()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+
+    def forget(self, key: Hashable) -> None:
+        """Make the next call for key start a new execution (e.g. after a write)"""
+        self._inflight.pop(key, None)
+
+    def stats(self) -> Dict:
+        """Call counters and the share of calls that were coalesced"""
+        calls = self._stats["calls"]
+        return {
+            **self._stats,
+            "in_flight": len(self._inflight),
+            "coalescing_ratio": round(self._stats["coalesced"] / calls, 4) if calls else 0.0,
+        }
+
+
+def singleflight_stats() -> Dict[str, Dict]:
+    """Stats of every SingleFlight group, by name"""
+    return {name: group.stats() for name, group in _groups.items()}
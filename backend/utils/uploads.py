@@ -0,0 +1,108 @@
+from typing import Optional, Tuple
+import hashlib
+from fastapi import UploadFile
+from config.settings import settings
+from utils.exceptions import PayloadTooLargeError, UnsupportedMediaTypeError
+
+
+# Read uploads in small chunks so memory per upload stays bounded
+UPLOAD_CHUNK_SIZE = 64 * 1024
+
+
+class IngestedImage:
+    """An uploaded image read into a single buffer, with its hash and real type"""
+
+    def __init__(self, data: bytes, content_hash: str, content_type: str, file_extension: str):
+        self.data = data
+        self.content_hash = content_hash
+        self.content_type = content_type
+        self.file_extension = file_extension
+
+    @property
+    def size(self) -> int:
+        return len(self.data)
+
+
+def sniff_image_type(header: bytes) -> Optional[Tuple[str, str]]:
+    """
+    Detect an image type from its leading magic bytes
+
+    Args:
+        header: First bytes of the file (at least 12)
+
+    Returns:
+        Tuple of (content_type, file_extension), or None if not a supported image
+    """
+    if header.startswith(b"\xff\xd8\xff"):
+        return "image/jpeg", "jpg"
+    if header.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "image/png", "png"
+    if header.startswith((b"GIF87a", b"GIF89a")):
+        return "image/gif", "gif"
+    if header[:4] == b"RIFF" and header[8:12] == b"WEBP":
+        return "image/webp", "webp"
+    return None
+
+
+async def read_image_upload(upload: UploadFile, max_bytes: Optional[int] = None) -> IngestedImage:
+    """
+    Read an uploaded image with a size cap, type sniffing and hashing
+
+    The file is consumed in chunks: the SHA-256 is updated as each chunk
+    arrives, the type is checked on the first chunk, and the upload is
+    rejected as soon as it crosses the size limit.
+
+    Args:
+        upload: Uploaded file from the request
+        max_bytes: Size limit in bytes (defaults to settings.MAX_UPLOAD_BYTES)
+
+    Returns:
+        IngestedImage holding the bytes, SHA-256 hex digest and detected type
+
+    Raises:
+        PayloadTooLargeError: If the file exceeds the size limit
+        UnsupportedMediaTypeError: If the file is not a JPEG, PNG, GIF or WebP image
+    """
+    if max_bytes is None:
+        max_bytes = settings.MAX_UPLOAD_BYTES
+
+    too_large = f"Image exceeds the {max_bytes // (1024 * 1024)} MB upload limit"
+    if upload.size is not None and upload.size > max_bytes:
+        raise PayloadTooLargeError(too_large)
+
+    hasher = hashlib.sha256()
+    chunks = []
+    total = 0
+    detected = None
+
+    while True:
+        chunk = await upload.read(UPLOAD_CHUNK_SIZE)
+        if not chunk:
+            break
+
+        total += len(chunk)
+        if total > max_bytes:
+            raise PayloadTooLargeError(too_large)
+
+        if detected is None:
+            detected = sniff_image_type(chunk[:16])
+            if detected is None:
+                raise UnsupportedMediaTypeError("File must be a JPEG, PNG, GIF or WebP image")
+
+        hasher.update(chunk)
+        chunks.append(chunk)
+
+    if detected is None:
+        raise UnsupportedMediaTypeError("Uploaded file is empty")
+
+    content_type, file_extension = detected
+    # One join into the buffer shared by storage, derivatives and ML
+    data = b"".join(chunks)
+    chunks.clear()
+
+    return IngestedImage(
+        data=data,
+        content_hash=hasher.hexdigest(),
+        content_type=content_type,
+        file_extension=file_extension,
+    )
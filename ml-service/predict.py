@@ -57,14 +57,7 @@ def load_all_models(artifacts_dir: str = "artifacts", explicit_paths: Optional[L
             continue
     return loaded
 
-def _predict_single(model, classes, image_bytes: bytes):
-    img = Image.open(io.BytesIO(image_bytes)).convert("RGB")
-    x = transform(img).unsqueeze(0).to(DEVICE)
-    with torch.no_grad():
-        cls_logits, pyr_logits = model(x)
-        cls_probs = torch.softmax(cls_logits, dim=1).squeeze(0).cpu().numpy()
-        pyr_probs = torch.sigmoid(pyr_logits).squeeze(0).cpu().numpy()
-
+def _format_prediction(classes, cls_probs, pyr_probs):
     topk = np.argsort(-cls_probs)[:3]
     answers = ["Yes" if p >= 0.5 else "No" for p in pyr_probs]
     # confidence score: blend of top1 prob and margin
@@ -84,15 +77,53 @@ def _predict_single(model, classes, image_bytes: bytes):
         "score": float(score),
     }
 
+def _predict_single(model, classes, image_bytes: bytes):
+    return _predict_batch(model, classes, [image_bytes])[0]
+
+def _load_image(image_bytes: bytes):
+    return transform(Image.open(io.BytesIO(image_bytes)).convert("RGB"))
+
+def _predict_tensors(model, classes, tensors: List[torch.Tensor]):
+    # One forward pass over the whole batch
+    x = torch.stack(tensors).to(DEVICE)
+    with torch.no_grad():
+        cls_logits, pyr_logits = model(x)
+        cls_probs = torch.softmax(cls_logits, dim=1).cpu().numpy()
+        pyr_probs = torch.sigmoid(pyr_logits).cpu().numpy()
+
+    return [
+        _format_prediction(classes, c, p) for c, p in zip(cls_probs, pyr_probs)
+    ]
+
+def _predict_batch(model, classes, images: List[bytes]):
+    return _predict_tensors(model, classes, [_load_image(b) for b in images])
+
 def predict_best(models: List[dict], image_bytes: bytes):
+    best = predict_best_batch(models, [image_bytes])[0]
+    if isinstance(best, Exception):
+        raise best
+    return best
+
+def predict_best_batch(models: List[dict], images: List[bytes]):
+    """Best prediction per image; images that cannot be decoded get their exception instead"""
     if not models:
         raise RuntimeError("No models loaded for prediction")
-    best = None
+    best = [None] * len(images)
+    tensors = []
+    for i, b in enumerate(images):
+        try:
+            tensors.append((i, _load_image(b)))
+        except Exception as e:
+            best[i] = ValueError(f"Could not decode image: {e}")
+    if not tensors:
+        return best
+
     for item in models:
-        res = _predict_single(item["model"], item["classes"], image_bytes)
-        res["model_name"] = item.get("name", "unknown")
-        if best is None or res.get("score", 0.0) > best.get("score", 0.0):
-            best = res
+        results = _predict_tensors(item["model"], item["classes"], [t for _, t in tensors])
+        for (i, _), res in zip(tensors, results):
+            res["model_name"] = item.get("name", "unknown")
+            if best[i] is None or res.get("score", 0.0) > best[i].get("score", 0.0):
+                best[i] = res
     return best
 
 # Backward-compatible alias